@@ -0,0 +1,233 @@
+"""
+Times the solver on the graded corpora in benchmarks/corpora.
+
+For each corpus (easy, hard and 17-clue puzzles) it reports p50/p99 solve
+latency, puzzles per second, peak traced memory and the time spent in each
+technique and in the search around them, with the number of search nodes.
+Techniques can be left out with --skip to see what they save, and the
+search engine (logic, dlx or hybrid) is picked with --engine; --sat-threshold
+hands long logic searches to the CDCL SAT solver. Results can be saved as JSON and
+compared against an earlier run, failing when a corpus got slower than the
+allowed threshold. A baseline is only compared against a run with the
+same backend, engine, SAT threshold, skipped techniques and corpus
+contents; anything else is refused rather than reported as a regression.
+
+Usage:
+    python benchmarks/solver_benchmark.py [--repeat N] [--backend bitmask|set]
+        [--engine logic|dlx|hybrid] [--sat-threshold NODES]
+        [--skip TECHNIQUE ...] [--save results.json] [--baseline results.json]
+        [--threshold 0.2]
+"""
+from pathlib import Path
+from datetime import datetime, timezone
+from hashlib import blake2b
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from bitmask_puzzle import BitmaskPuzzle
+from enums import Technique, SolverEngine
+from puzzle_io import read_puzzles
+from scheduler import TECHNIQUES, TechniqueScheduler
+from solve_profile import SolveProfile
+from sudoku import SudokuPuzzle
+from sudoku_solver import SudokuSolver
+
+CORPORA = Path(__file__).resolve().parent / "corpora"
+BACKENDS = {"bitmask": BitmaskPuzzle, "set": SudokuPuzzle}
+# Metrics compared against a baseline, and whether a higher value is better
+TRACKED = {"p50_ms": False, "p99_ms": False, "puzzles_per_sec": True}
+# Run settings that must match a baseline for its timings to be comparable
+SETTINGS = ("backend", "engine", "sat_threshold", "skipped")
+
+
+def load_corpora(names: list[str] | None = None) -> dict[str, list[np.ndarray]]:
+    """Reads the corpora, keyed by grade (the file name without .txt)."""
+    paths = sorted(CORPORA.glob("*.txt"))
+    corpora = {path.stem: list(read_puzzles(path)) for path in paths}
+    if names:
+        missing = set(names) - set(corpora)
+        if missing:
+            raise ValueError(f"Unknown corpora: {', '.join(sorted(missing))}")
+        corpora = {name: corpora[name] for name in names}
+    return corpora
+
+
+def bench_corpus(frames: list[np.ndarray], backend: type, repeat: int,
+                 scheduler: TechniqueScheduler | None = None,
+                 engine: SolverEngine = SolverEngine.LOGIC, sat_threshold: int | None = None) -> dict:
+    """
+    Solves every puzzle of a corpus `repeat` times.
+
+    Returns:
+        dict: Latency percentiles, throughput, peak memory, per-technique times
+            and search nodes.
+    """
+    solver = SudokuSolver(backend(frames[0]), scheduler=scheduler, engine=engine, sat_threshold=sat_threshold)
+    latencies = []
+    unsolved = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            begin = time.perf_counter()
+            solver.puzzle.load(frame)
+            solver.solve()
+            latencies.append(time.perf_counter() - begin)
+            unsolved += not solver.puzzle.has_valid_solution()
+    elapsed = time.perf_counter() - start
+
+    # Technique split and memory are measured in separate passes so their
+    # overhead does not distort the latencies above.
+    solver.profile = profile = SolveProfile()
+    for frame in frames:
+        solver.puzzle.load(frame)
+        solver.solve()
+    solver.profile = None
+    tracemalloc.start()
+    for frame in frames:
+        solver.puzzle.load(frame)
+        solver.solve()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    techniques_ms = {technique.name: stats.seconds * 1000 / len(frames)
+                     for technique, stats in profile.techniques.items()}
+    techniques_ms["SEARCH"] = profile.seconds * 1000 / len(frames) - sum(techniques_ms.values())
+    return {
+        "puzzles": len(frames),
+        "digest": blake2b(np.stack(frames).tobytes(), digest_size=16).hexdigest(),
+        "repeat": repeat,
+        "unsolved": unsolved,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "puzzles_per_sec": len(latencies) / elapsed,
+        "peak_memory_kib": peak / 1024,
+        "technique_ms_per_puzzle": techniques_ms,
+        "nodes": profile.nodes,
+        "profile": profile.to_dict(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Lists the tracked metrics that got worse than the baseline by more than `threshold`.
+
+    Args:
+        results (dict): Results of this run.
+        baseline (dict): Results of an earlier run.
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list[str]: One message per regression.
+    """
+    regressions = []
+    for grade, current in results["corpora"].items():
+        previous = baseline["corpora"].get(grade)
+        if previous is None:
+            continue
+        for metric, higher_is_better in TRACKED.items():
+            old, new = previous[metric], current[metric]
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > threshold:
+                regressions.append(f"{grade}: {metric} {old:.3f} -> {new:.3f} ({change:+.0%} worse)")
+    return regressions
+
+
+def mismatches(results: dict, baseline: dict) -> list[str]:
+    """
+    Lists the differences in settings and corpus contents that make a
+    baseline's timings not comparable with this run's.
+
+    Args:
+        results (dict): Results of this run.
+        baseline (dict): Results of an earlier run.
+
+    Returns:
+        list[str]: One message per difference; empty if the runs are comparable.
+    """
+    found = [f"{setting}: baseline {baseline.get(setting, 'not recorded')!r}, this run {results[setting]!r}"
+             for setting in SETTINGS if baseline.get(setting, "not recorded") != results[setting]]
+    for grade, current in results["corpora"].items():
+        previous = baseline["corpora"].get(grade)
+        if previous is not None and previous.get("digest") != current["digest"]:
+            found.append(f"{grade}: corpus contents differ from the baseline's "
+                         f"({previous['puzzles']} -> {current['puzzles']} puzzles)")
+    return found
+
+
+def print_results(results: dict):
+    for grade, result in results["corpora"].items():
+        unsolved = f", {result['unsolved']} unsolved" if result["unsolved"] else ""
+        print(f"{grade}: {result['puzzles']} puzzles x {result['repeat']}{unsolved}")
+        print(f"  p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   "
+              f"{result['puzzles_per_sec']:8.1f} puzzles/sec   peak {result['peak_memory_kib']:8.1f} KiB")
+        for name, ms in result["technique_ms_per_puzzle"].items():
+            print(f"    {name:<28} {ms:8.3f} ms/puzzle")
+        print(f"  search: {result['nodes']} nodes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="times each puzzle is solved")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="bitmask")
+    parser.add_argument("--corpus", action="append", help="corpus to run (default: all); may be repeated")
+    parser.add_argument("--engine", choices=[engine.name.lower() for engine in SolverEngine], default="logic")
+    parser.add_argument("--sat-threshold", type=int, metavar="NODES",
+                        help="switch a logic search to the SAT solver after this many nodes")
+    parser.add_argument("--skip", action="append", default=[], type=lambda name: Technique[name.upper()],
+                        metavar="TECHNIQUE", help="leave a technique out, e.g. X_WING; may be repeated")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare against results saved by an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown that counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+    scheduler = TechniqueScheduler(entry for entry in TECHNIQUES if entry[0] not in args.skip)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "engine": args.engine,
+        "sat_threshold": args.sat_threshold,
+        "skipped": [technique.name for technique in args.skip],
+        "corpora": {
+            grade: bench_corpus(frames, BACKENDS[args.backend], args.repeat, scheduler,
+                                SolverEngine[args.engine.upper()], args.sat_threshold)
+            for grade, frames in load_corpora(args.corpus).items()
+        },
+    }
+    print_results(results)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        different = mismatches(results, baseline)
+        if different:
+            print(f"Not comparing against {args.baseline}, which was run differently:", file=sys.stderr)
+            for difference in different:
+                print(f"  {difference}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions against {args.baseline} (threshold {args.threshold:.0%}):", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
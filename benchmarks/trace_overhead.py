@@ -0,0 +1,52 @@
+"""
+Compares solve times with step tracing on and off.
+
+Usage:
+    python benchmarks/trace_overhead.py [--repeat N]
+"""
+from pathlib import Path
+import argparse
+import sys
+import tempfile
+import time
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from bitmask_puzzle import BitmaskPuzzle
+from puzzle_io import read_puzzles
+from sudoku_logger import StepLogger, NULL_LOGGER
+from sudoku_solver import SudokuSolver
+
+
+def time_solves(frames, log: StepLogger, repeat: int) -> float:
+    """Returns the mean time in seconds to solve one puzzle."""
+    solver = SudokuSolver(BitmaskPuzzle(frames[0]), log)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            solver.puzzle.load(frame)
+            solver.solve()
+    return (time.perf_counter() - start) / (repeat * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="times each bundled puzzle is solved")
+    args = parser.parse_args()
+
+    puzzle_dir = SRC.parent / "puzzles"
+    frames = [frame for path in sorted(puzzle_dir.glob("*.txt")) for frame in read_puzzles(path)]
+
+    off = time_solves(frames, NULL_LOGGER, args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        with StepLogger.to_file(Path(tmp) / "sudoku_steps.log") as log:
+            on = time_solves(frames, log, args.repeat)
+
+    print(f"{len(frames)} puzzles x {args.repeat} runs")
+    print(f"trace off: {off * 1000:8.2f} ms/solve")
+    print(f"trace on:  {on * 1000:8.2f} ms/solve ({on / off:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
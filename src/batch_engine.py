@@ -0,0 +1,238 @@
+"""
+Vectorized propagation of many puzzles at once.
+
+A CandidateBatch holds N puzzles as an (N, 81) array of values and an
+(N, 81, 9) boolean candidate tensor (candidate d of a cell at index d - 1).
+Naked singles, hidden singles and pointing/claiming eliminations are applied
+to the whole batch as array operations, so most puzzles of an everyday feed
+are solved without touching a Python Cell. Puzzles the techniques cannot
+finish are left for the per-puzzle search in `SudokuSolver`.
+
+Since every technique only removes candidates no solution can use, a puzzle
+the batch fills in has exactly that one solution, and a puzzle it finds a
+contradiction in has none; only the rest need a search to count solutions.
+"""
+from typing import Iterable, Iterator
+
+import numpy.typing as npt
+import numpy as np
+
+from units import UNITS, CELL_UNITS, INTERSECTIONS
+
+DIGITS = np.arange(1, 10, dtype=np.int8)
+
+# (27, 9) cells of each unit
+UNIT_CELLS = np.array(UNITS, dtype=np.intp)
+# (81, 3) the units of each cell and the cell's position within each of them
+CELL_UNIT = np.array(CELL_UNITS, dtype=np.intp)
+CELL_UNIT_POS = np.array(
+    [[UNITS[unit].index(i) for unit in CELL_UNITS[i]] for i in range(81)], dtype=np.intp
+)
+# (54, 3) and (54, 6) cells of the box-line intersections
+INTERSECTION_CELLS = np.array([x.cells for x in INTERSECTIONS], dtype=np.intp)
+INTERSECTION_BOX_REST = np.array([x.box_rest for x in INTERSECTIONS], dtype=np.intp)
+INTERSECTION_LINE_REST = np.array([x.line_rest for x in INTERSECTIONS], dtype=np.intp)
+# (81, 4) intersections whose line rest / box rest contain each cell
+CELL_IN_LINE_REST = np.array(
+    [[n for n, x in enumerate(INTERSECTIONS) if i in x.line_rest] for i in range(81)], dtype=np.intp
+)
+CELL_IN_BOX_REST = np.array(
+    [[n for n, x in enumerate(INTERSECTIONS) if i in x.box_rest] for i in range(81)], dtype=np.intp
+)
+for _table in (DIGITS, UNIT_CELLS, CELL_UNIT, CELL_UNIT_POS, INTERSECTION_CELLS, INTERSECTION_BOX_REST,
+               INTERSECTION_LINE_REST, CELL_IN_LINE_REST, CELL_IN_BOX_REST):
+    # shared by every solve, so they must never change
+    _table.flags.writeable = False
+del _table
+
+
+class CandidateBatch:
+    """
+    A batch of puzzles propagated together with array operations.
+
+    Attributes:
+        values (np.ndarray): (N, 81) int8 cell values (0 if unsolved).
+        candidates (np.ndarray): (N, 81, 9) bool candidates of each cell (all False once solved).
+        contradiction (np.ndarray): (N,) bool, True for puzzles that propagation proved unsolvable.
+        passes (int): Number of propagation passes made by the last `propagate`.
+    """
+
+    def __init__(self, frames: npt.NDArray[np.int8]):
+        """
+        Args:
+            frames (np.ndarray): (N, 9, 9) integer array of puzzles (0 indicates unsolved cells).
+
+        Raises:
+            ValueError: If the frames are not 9x9 grids.
+        """
+        if frames.ndim != 3 or frames.shape[1:] != (9, 9):
+            raise ValueError("Expected an (N, 9, 9) array of puzzles")
+        self.values = frames.reshape(-1, 81).astype(np.int8)
+        self.candidates = np.repeat((self.values == 0)[:, :, None], 9, axis=2)
+        self.contradiction = np.zeros(len(self.values), dtype=bool)
+        self.passes = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def solved(self) -> npt.NDArray[np.bool_]:
+        """(N,) bool, True for puzzles whose cells are all filled without contradiction."""
+        return (self.values > 0).all(axis=1) & ~self.contradiction
+
+    def frames(self) -> npt.NDArray[np.int8]:
+        """
+        Returns the current values of the batch.
+
+        Returns:
+            np.ndarray: (N, 9, 9) int8 array (0 for unsolved cells).
+        """
+        return self.values.reshape(-1, 9, 9).copy()
+
+    def propagate(self):
+        """
+        Applies the techniques to every puzzle until none of them makes progress.
+
+        Each pass works only on the puzzles that changed in the previous pass;
+        puzzles are dropped from the working set once they settle or reach a
+        contradiction.
+        """
+        active = np.flatnonzero(~self.contradiction)
+        self.passes = 0
+        while len(active):
+            values, candidates, changed, contradiction = _propagation_pass(
+                self.values[active], self.candidates[active]
+            )
+            self.values[active] = values
+            self.candidates[active] = candidates
+            self.contradiction[active] = contradiction
+            self.passes += 1
+            active = active[changed & ~contradiction]
+
+
+def _propagation_pass(values: npt.NDArray[np.int8], candidates: npt.NDArray[np.bool_]):
+    """
+    Runs one round of eliminations and naked singles on a batch.
+
+    Args:
+        values (np.ndarray): (M, 81) int8 cell values.
+        candidates (np.ndarray): (M, 81, 9) bool candidates.
+
+    Returns:
+        tuple: New values and candidates, and (M,) bool arrays telling which
+            puzzles changed and which reached a contradiction.
+    """
+    before = candidates
+    solved = values > 0
+    placed = values[:, :, None] == DIGITS
+
+    # Remove placed digits from the candidates of every cell sharing a unit
+    unit_placed_count = placed[:, UNIT_CELLS].sum(axis=2)
+    unit_placed = unit_placed_count > 0
+    candidates = candidates & ~unit_placed[:, CELL_UNIT].any(axis=2) & ~solved[:, :, None]
+    duplicate = (unit_placed_count > 1).any(axis=(1, 2))
+
+    # Hidden singles: a digit with a single place left in a unit goes there
+    unit_candidates = candidates[:, UNIT_CELLS]
+    places = unit_candidates.sum(axis=2)
+    missing = ((places == 0) & ~unit_placed).any(axis=(1, 2))
+    forced_in_unit = unit_candidates & (places == 1)[:, :, None, :]
+    forced = forced_in_unit[:, CELL_UNIT, CELL_UNIT_POS].any(axis=2)
+    forced_count = forced.sum(axis=2)
+    overforced = (forced_count > 1).any(axis=1)
+    candidates = np.where((forced_count > 0)[:, :, None], candidates & forced, candidates)
+
+    # Pointing and claiming: a digit confined to where a box and a line cross
+    inside = candidates[:, INTERSECTION_CELLS].any(axis=2)
+    box_rest = candidates[:, INTERSECTION_BOX_REST].any(axis=2)
+    line_rest = candidates[:, INTERSECTION_LINE_REST].any(axis=2)
+    pointing = inside & ~box_rest
+    claiming = inside & ~line_rest
+    candidates = candidates & ~(
+        pointing[:, CELL_IN_LINE_REST].any(axis=2) | claiming[:, CELL_IN_BOX_REST].any(axis=2)
+    )
+
+    # Naked singles
+    counts = candidates.sum(axis=2)
+    empty = (~solved & (counts == 0)).any(axis=1)
+    single = ~solved & (counts == 1)
+    values = np.where(single, candidates.argmax(axis=2) + 1, values).astype(np.int8)
+    candidates[single] = False
+
+    changed = single.any(axis=1) | (candidates != before).any(axis=(1, 2))
+    contradiction = duplicate | missing | overforced | empty
+    return values, candidates, changed, contradiction
+
+
+def solve_frames(frames: Iterable[npt.NDArray[np.int8]], solver, batch_size: int = 4096) -> Iterator[npt.NDArray[np.int8]]:
+    """
+    Solves a stream of puzzles, propagating them in vectorized batches and
+    searching only the ones propagation leaves unfinished.
+
+    Args:
+        frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+        solver (SudokuSolver): Solver whose puzzle is reused for the leftovers.
+        batch_size (int): Number of puzzles propagated together.
+
+    Yields:
+        np.ndarray: The final 9x9 frame for each puzzle, in input order.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    frames = iter(frames)
+    while True:
+        chunk = []
+        for frame in frames:
+            chunk.append(frame)
+            if len(chunk) == batch_size:
+                break
+        if not chunk:
+            return
+        originals = np.stack(chunk)
+        batch = CandidateBatch(originals)
+        batch.propagate()
+        results = batch.frames()
+        # Unfinished puzzles are searched from their propagated values;
+        # contradictions go back from the givens so they fail the same way
+        # they would without the batch engine.
+        leftovers = np.flatnonzero(~batch.solved)
+        starts = np.where(batch.contradiction[leftovers, None, None], originals[leftovers], results[leftovers])
+        for i, frame in zip(leftovers, solver.solve_batch(starts)):
+            results[i] = frame
+        yield from results
+
+
+def count_frames(frames: Iterable[npt.NDArray[np.int8]], solver, limit: int = 2,
+                 batch_size: int = 4096) -> Iterator[int]:
+    """
+    Counts the solutions of a stream of puzzles, propagating them in vectorized
+    batches and searching only the ones propagation leaves unfinished.
+
+    Args:
+        frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+        solver (SudokuSolver): Solver whose puzzle is reused for the leftovers.
+        limit (int): Number of solutions after which to stop counting a puzzle.
+        batch_size (int): Number of puzzles propagated together.
+
+    Yields:
+        int: Number of solutions of each puzzle, capped at `limit`, in input order.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    frames = iter(frames)
+    while True:
+        chunk = []
+        for frame in frames:
+            chunk.append(frame)
+            if len(chunk) == batch_size:
+                break
+        if not chunk:
+            return
+        batch = CandidateBatch(np.stack(chunk))
+        batch.propagate()
+        solved = batch.solved
+        counts = np.where(solved, min(limit, 1), 0)
+        leftovers = np.flatnonzero(~solved & ~batch.contradiction)
+        for i, count in zip(leftovers, solver.count_solutions_batch(batch.frames()[leftovers], limit)):
+            counts[i] = count
+        yield from counts.tolist()
@@ -0,0 +1,416 @@
+from array import array
+from typing import Iterable
+
+import numpy.typing as npt
+import numpy as np
+
+from bitmasks import ALL_DIGITS_MASK, DIGIT_MASK, POPCOUNT, MASK_SETS, mask_of
+from sudoku import SudokuPuzzle
+from units import UNITS, PEERS, CELL_UNITS
+from validation import is_solution_values
+
+# Layout of the state buffer: three 81-entry sections in row-major cell
+# order, starting at these offsets.
+MASKS = 81
+ELIMINATED = 162
+STATE_SIZE = 243
+
+_CLEAR_MASKS = (0,) * (STATE_SIZE - MASKS)
+
+
+class BitmaskCell:
+    """
+    Lightweight view of one cell in a BitmaskPuzzle.
+
+    Exposes the same interface as `Cell`, but reads and writes the puzzle's
+    flat state buffer instead of holding its own sets. Candidate sets
+    are returned as shared frozensets from a lookup table, so reading them does
+    not allocate.
+
+    Attributes:
+        puzzle (BitmaskPuzzle): Puzzle that owns the cell's state.
+        index (int): Flat index of the cell (row * 9 + col).
+        slot (int): Position of the cell's candidate mask in the puzzle's state.
+        row (int): Row index (0-8).
+        col (int): Column index (0-8).
+        box (int): Box index (0-8).
+    """
+    __slots__ = ("puzzle", "index", "slot", "row", "col", "box")
+
+    def __init__(self, puzzle: "BitmaskPuzzle", index: int):
+        self.puzzle = puzzle
+        self.index = index
+        self.slot = MASKS + index
+        self.row = index // 9
+        self.col = index % 9
+        self.box = (self.row // 3) * 3 + (self.col // 3)
+
+    @property
+    def value(self) -> int:
+        return self.puzzle.state[self.index]
+
+    @property
+    def candidates(self) -> frozenset[int]:
+        return MASK_SETS[self.puzzle.state[self.slot]]
+
+    @candidates.setter
+    def candidates(self, s: set[int]):
+        self.puzzle.state[self.slot] = mask_of(s)
+
+    @property
+    def eliminated_candidates(self) -> frozenset[int]:
+        return MASK_SETS[self.puzzle.state[ELIMINATED + self.index]]
+
+    @property
+    def candidate_mask(self) -> int:
+        """Returns the candidates of this cell as a 9-bit mask."""
+        return self.puzzle.state[self.slot]
+
+    @property
+    def is_solved(self) -> bool:
+        """Returns True if the cell has a value assigned (i.e., is solved)."""
+        return self.puzzle.state[self.index] > 0
+
+    def eliminate_candidate(self, n: int) -> bool:
+        """
+        Eliminates a candidate value from this cell.
+
+        Args:
+            n (int): The candidate to remove.
+
+        Returns:
+            bool: True if the candidate was removed, False if it was not present.
+        """
+        return self.puzzle.eliminate_mask(self.index, DIGIT_MASK[n])
+
+    def eliminate_candidates(self, s: set[int]) -> bool:
+        """
+        Eliminates all candidate values in a set from this cell.
+
+        Args:
+            s (set[int]): Set of candidates to remove.
+
+        Returns:
+            bool: True if any candidate was removed, False if none were present.
+        """
+        return self.puzzle.eliminate_mask(self.index, mask_of(s))
+
+    def eliminate_mask(self, mask: int) -> bool:
+        """
+        Eliminates all candidate values in a 9-bit mask from this cell.
+
+        Args:
+            mask (int): Mask of candidates to remove.
+
+        Returns:
+            bool: True if any candidate was removed, False if none were present.
+        """
+        return self.puzzle.eliminate_mask(self.index, mask)
+
+    def set_value(self, n: int):
+        """
+        Sets the value of the cell and clears its candidates.
+
+        Args:
+            n (int): Value to assign to the cell.
+
+        Side Effects:
+            - Clears all remaining and eliminated candidates.
+            - Does not propagate updates to other cells (caller must handle that).
+        """
+        self.puzzle.set_value(self.index, n)
+
+    def __repr__(self) -> str:
+        return (f"BitmaskCell(row={self.row}, col={self.col}, box={self.box}, value={self.value}, "
+                f"candidates={set(self.candidates)}, eliminated_candidates={set(self.eliminated_candidates)})")
+
+
+class BitmaskPuzzle(SudokuPuzzle):
+    """
+    SudokuPuzzle backend that keeps the whole grid in one flat integer buffer.
+
+    Each unsolved cell keeps its candidates as a 9-bit mask (bit d - 1 set
+    when digit d is possible). The buffer holds the values (0 if unsolved),
+    then the candidate masks (0 once solved) at `MASKS`, then the masks of
+    the candidates removed by solving techniques at `ELIMINATED`. Since
+    values come first, `state[i]` is the value of cell i. Copying the buffer
+    copies the puzzle, which is how `copy.deepcopy` clones it and how
+    `snapshot` and `restore` save and put back a position.
+
+    Cells are exposed as `BitmaskCell` views, so the elimination techniques
+    and `SudokuSolver` work on this backend unchanged.
+
+    The buffer is a plain list rather than `array('H')`. Reading an array
+    element boxes a new int, which made solving 10-30% slower. Snapshots,
+    which are only stored and copied back, are `array('H')`: 2 bytes per
+    entry instead of an 8-byte reference.
+
+    Attributes:
+        state (list[int]): Values, candidate masks and eliminated masks of the
+            81 cells, `STATE_SIZE` entries.
+        cells (list[BitmaskCell]): Views over the 81 cells in row-major order.
+        trail (list | None): Undo trail of (index, value, mask, eliminated) entries
+            while recording, otherwise None.
+        recorder (TraceRecorder | None): Solve trace recorder while the puzzle is traced.
+        queue (PropagationQueue | None): Propagation queue told about every change while solving.
+    """
+
+    def __init__(self, arr: npt.NDArray[np.int8]):
+        """
+        Initializes a Sudoku puzzle from a 9x9 numpy array.
+
+        Args:
+            arr (np.ndarray): 9x9 integer array representing the puzzle
+                              (0 indicates unsolved cells).
+
+        Raises:
+            ValueError: If the input array is not 9x9.
+        """
+        if arr.shape != (9, 9):
+            raise ValueError("Sudoku grid must be 9x9")
+        self.state = [0] * STATE_SIZE
+        self.trail = None
+        self.recorder = None
+        self.queue = None
+        self._build_views()
+        self.load(arr)
+
+    def load(self, arr: npt.NDArray[np.int8]):
+        """
+        Resets the puzzle to a new 9x9 grid, reusing its buffer and cell views.
+
+        Args:
+            arr (np.ndarray): 9x9 integer array representing the puzzle
+                              (0 indicates unsolved cells).
+
+        Raises:
+            ValueError: If the input array is not 9x9.
+        """
+        if arr.shape != (9, 9):
+            raise ValueError("Sudoku grid must be 9x9")
+        self.trail = None
+        self.state[:MASKS] = arr.reshape(81).tolist()
+        self.state[MASKS:] = _CLEAR_MASKS
+        self.populate_candidates()
+
+    def _build_views(self):
+        self.cells = [BitmaskCell(self, i) for i in range(81)]
+        self._grid = np.empty((9, 9), dtype=object)
+        for cell in self.cells:
+            self._grid[cell.row, cell.col] = cell
+        self._index_cells()
+
+    @property
+    def grid(self) -> npt.NDArray[np.object_]:
+        """9x9 array of BitmaskCell views."""
+        return self._grid
+
+    def __deepcopy__(self, memo) -> "BitmaskPuzzle":
+        clone = BitmaskPuzzle.__new__(BitmaskPuzzle)
+        clone.state = self.state[:]
+        clone.trail = None
+        clone.recorder = None
+        clone.queue = None
+        clone._build_views()
+        memo[id(self)] = clone
+        return clone
+
+    def snapshot(self) -> array:
+        """
+        Returns a compact copy of the puzzle's state buffer, for `restore`.
+
+        Returns:
+            array: `STATE_SIZE` values, candidate masks and eliminated masks.
+        """
+        return array("H", self.state)
+
+    def restore(self, snapshot: array):
+        """
+        Puts the puzzle back in a state returned by `snapshot`. The undo trail
+        is not involved, so do not mix the two inside one recorded search.
+
+        Args:
+            snapshot (array): State from `snapshot`.
+        """
+        self.state[:] = snapshot
+
+    def mark(self) -> int:
+        """
+        Returns the current position on the undo trail, starting to record
+        changes if the puzzle is not recording yet.
+
+        Returns:
+            int: Position to pass to `undo`.
+        """
+        if self.trail is None:
+            self.trail = []
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        """
+        Rolls back every change recorded after `mark`.
+
+        Args:
+            mark (int): Position returned by `mark`.
+        """
+        trail = self.trail
+        if self.recorder is not None and len(trail) > mark:
+            self.recorder.undo(len(trail) - mark)
+        state = self.state
+        while len(trail) > mark:
+            index, state[index], state[MASKS + index], state[ELIMINATED + index] = trail.pop()
+
+    def clear_trail(self):
+        """Stops recording changes and discards the undo trail."""
+        self.trail = None
+
+    def set_recorder(self, recorder):
+        self.recorder = recorder
+
+    def set_queue(self, queue):
+        self.queue = queue
+
+    def eliminate_mask(self, index: int, mask: int) -> bool:
+        """
+        Removes the candidates in `mask` from the cell at `index`.
+
+        Args:
+            index (int): Flat cell index (0-80).
+            mask (int): Candidates to remove.
+
+        Returns:
+            bool: True if any candidate was removed.
+        """
+        state = self.state
+        slot = MASKS + index
+        removed = state[slot] & mask
+        if not removed:
+            return False
+        if self.trail is not None:
+            self.trail.append((index, state[index], state[slot], state[ELIMINATED + index]))
+        left = state[slot] ^ removed
+        state[slot] = left
+        state[ELIMINATED + index] |= removed
+        if self.recorder is not None:
+            self.recorder.eliminate(index, removed)
+        if self.queue is not None:
+            self.queue.eliminated(index, POPCOUNT[removed], POPCOUNT[left])
+        return True
+
+    def set_value(self, index: int, n: int):
+        """
+        Sets the value of the cell at `index` and clears its candidates.
+
+        Args:
+            index (int): Flat cell index (0-80).
+            n (int): Value to assign.
+        """
+        state = self.state
+        if self.trail is not None:
+            self.trail.append((index, state[index], state[MASKS + index], state[ELIMINATED + index]))
+        if self.recorder is not None:
+            self.recorder.assign(index, n)
+        state[index] = n
+        state[MASKS + index] = 0
+        state[ELIMINATED + index] = 0
+        if self.queue is not None:
+            self.queue.assigned(index)
+
+    def has_valid_solution(self) -> bool:
+        """
+        Returns a boolean value if all cells in the sodoku grid are solved and the solution is valid,
+        i.e. numbers 1 - 9 do not repeat for a given row, column or box.
+
+        Returns:
+            bool: True if the grid has a valid solution, otherwise false
+        """
+        # the values come first in the state
+        return is_solution_values(self.state)
+
+    def current_frame(self) -> npt.NDArray[np.int8]:
+        """
+        Returns the current numerical state of the puzzle as a 9x9 array.
+
+        Returns:
+            np.ndarray: 9x9 array of integers representing cell values (0 if unsolved).
+        """
+        return np.array(self.state[:MASKS], dtype=np.int8).reshape(9, 9)
+
+    def cell_at(self, row: int, col: int) -> BitmaskCell:
+        return self.cells[row * 9 + col]
+
+    def excluded_mask(self, cell: BitmaskCell) -> int:
+        """
+        Computes the mask of values that cannot appear in a given cell.
+
+        Args:
+            cell (BitmaskCell): The cell for which to compute exclusions.
+
+        Returns:
+            int: Mask of values already used in the cell's row, column or box,
+                 or previously eliminated from the cell.
+        """
+        state = self.state
+        used = state[ELIMINATED + cell.index]
+        for i in PEERS[cell.index]:
+            used |= DIGIT_MASK[state[i]]
+        return used
+
+    def excluded_at(self, cell: BitmaskCell) -> set[int]:
+        return set(MASK_SETS[self.excluded_mask(cell)])
+
+    def set_candidates(self, cell: BitmaskCell):
+        if self.state[cell.index] == 0:
+            self.state[MASKS + cell.index] = ALL_DIGITS_MASK & ~self.excluded_mask(cell)
+
+    def populate_candidates(self):
+        """Populates candidates for all cells in the puzzle."""
+        state = self.state
+        used_in_unit = [0] * 27
+        for u, unit in enumerate(UNITS):
+            for i in unit:
+                used_in_unit[u] |= DIGIT_MASK[state[i]]
+        for i in range(81):
+            if state[i] == 0:
+                row, col, box = CELL_UNITS[i]
+                used = used_in_unit[row] | used_in_unit[col] | used_in_unit[box] | state[ELIMINATED + i]
+                state[MASKS + i] = ALL_DIGITS_MASK & ~used
+
+    def is_solved(self) -> bool:
+        return 0 not in self.state[:MASKS]
+
+    def has_contradiction(self, units: Iterable[int] | None = None) -> bool:
+        state = self.state
+        for unit in (UNITS if units is None else (UNITS[u] for u in units)):
+            placed = 0
+            possible = 0
+            for i in unit:
+                if state[i]:
+                    bit = DIGIT_MASK[state[i]]
+                    if placed & bit:
+                        return True
+                    placed |= bit
+                else:
+                    mask = state[MASKS + i]
+                    if not mask:
+                        return True
+                    possible |= mask
+            if placed | possible != ALL_DIGITS_MASK:
+                return True
+        return False
+
+    def fewest_candidates_cell(self) -> BitmaskCell | None:
+        state = self.state
+        best = None
+        best_count = 10
+        for i, mask in enumerate(state[MASKS:ELIMINATED]):
+            if not state[i] and POPCOUNT[mask] < best_count:
+                best = i
+                best_count = POPCOUNT[mask]
+                if best_count <= 2:
+                    break
+        return None if best is None else self.cells[best]
+
+    def get_singles(self) -> list[BitmaskCell]:
+        state = self.state
+        return [cell for cell in self.cells if POPCOUNT[state[cell.slot]] == 1]
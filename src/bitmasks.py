@@ -0,0 +1,42 @@
+"""
+Lookup tables for 9-bit candidate masks.
+
+Digit d (1-9) is stored in bit d - 1, so a cell with candidates {1, 3, 9}
+has mask 0b100000101. Every table is indexed by a mask in range(512) and is
+built once at import.
+"""
+
+ALL_DIGITS_MASK = 0x1FF
+
+# DIGIT_MASK[d] is the single-bit mask for digit d; DIGIT_MASK[0] is 0 so an
+# unsolved value maps to the empty mask.
+DIGIT_MASK = tuple((1 << (d - 1)) if d else 0 for d in range(10))
+
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(512))
+
+LOWEST_BIT = tuple(mask & -mask for mask in range(512))
+
+# Lowest digit present in a mask (0 for the empty mask).
+LOWEST_DIGIT = tuple((mask & -mask).bit_length() for mask in range(512))
+
+MASK_DIGITS = tuple(
+    tuple(d for d in range(1, 10) if mask & DIGIT_MASK[d]) for mask in range(512)
+)
+
+MASK_SETS = tuple(frozenset(digits) for digits in MASK_DIGITS)
+
+
+def mask_of(digits) -> int:
+    """
+    Builds a candidate mask from an iterable of digits.
+
+    Args:
+        digits (Iterable[int]): Digits 1-9. Zeros are ignored.
+
+    Returns:
+        int: 9-bit mask with one bit set per digit.
+    """
+    mask = 0
+    for d in digits:
+        mask |= DIGIT_MASK[d]
+    return mask
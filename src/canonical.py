@@ -0,0 +1,206 @@
+"""
+Canonical forms of puzzles under the Sudoku symmetry group.
+
+These operations keep a grid valid and map its solutions onto each other:
+- relabelling the digits;
+- transposing;
+- permuting the bands (and the stacks);
+- permuting the rows inside a band (and the columns inside a stack).
+Every puzzle in the same orbit should get the same canonical form. A solved
+canonical grid can then be mapped back to any member through the inverse of
+that member's transform.
+
+Searching the whole group (about 1.2e12 elements) is out of the question, so
+the search is narrowed with invariants:
+1. Each line gets a key that survives every symmetry: the sorted weights of
+   its givens, where a given's weight combines how often its digit occurs in
+   the puzzle and how many givens its crossing line has.
+2. Lines are sorted by key inside their band, and bands by their sorted line
+   keys.
+3. Only lines or bands with equal keys are tried in every order.
+4. For each such arrangement, the digits are relabelled in order of first
+   appearance. Transposing just swaps the row and column keys, so only the
+   orientation whose keys sort first is tried, unless both tie.
+5. The smallest resulting grid is the canonical form.
+Highly symmetric puzzles can tie on many keys, so the arrangements tried
+are capped at `MAX_CANDIDATES`. Beyond that two members of an orbit may get
+different forms, which costs a cache hit, but every form is still reached
+by a genuine transform of its puzzle, so it is never wrong.
+
+`signature` is a much cheaper invariant. Puzzles with different signatures
+can never share a canonical form, so it can rule out a match without
+computing either form.
+"""
+from itertools import permutations, product
+
+import numpy.typing as npt
+import numpy as np
+
+MAX_CANDIDATES = 64
+
+
+class Transform:
+    """
+    A symmetry taking a puzzle to its canonical form.
+
+    Canonical cell (i, j) holds `digits[g[rows[i]][cols[j]]]`, where g is the
+    puzzle, transposed first if `transpose` is set.
+
+    Attributes:
+        transpose (bool): Whether the grid is transposed first.
+        rows (tuple[int, ...]): Source row of each canonical row.
+        cols (tuple[int, ...]): Source column of each canonical column.
+        digits (list[int]): Canonical label of each digit, indexed by digit (0 stays 0).
+    """
+    __slots__ = ("transpose", "rows", "cols", "digits")
+
+    def __init__(self, transpose: bool, rows, cols, digits: list[int]):
+        self.transpose = transpose
+        self.rows = tuple(rows)
+        self.cols = tuple(cols)
+        self.digits = digits
+
+    def apply(self, frame: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        """Maps a 9x9 frame of the puzzle to canonical coordinates and labels."""
+        source = (frame.T if self.transpose else frame).ravel().tolist()
+        digits, cols = self.digits, self.cols
+        values = bytes([digits[source[9 * row + col]] for row in self.rows for col in cols])
+        return np.frombuffer(values, dtype=np.int8).reshape(9, 9)
+
+    def invert(self, frame: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        """Maps a 9x9 frame in canonical coordinates and labels back to the puzzle's."""
+        labels = [0] * 10
+        for digit, label in enumerate(self.digits):
+            labels[label] = digit
+        values = frame.ravel().tolist()
+        grid = [0] * 81
+        position = 0
+        for row in self.rows:
+            for col in self.cols:
+                cell = 9 * col + row if self.transpose else 9 * row + col
+                grid[cell] = labels[values[position]]
+                position += 1
+        return np.array(grid, dtype=np.int8).reshape(9, 9)
+
+
+def canonical_form(frame: npt.NDArray[np.int8]) -> tuple[bytes, Transform]:
+    """
+    Computes the canonical form of a puzzle.
+
+    Args:
+        frame (np.ndarray): 9x9 int8 puzzle (0 for empty cells).
+
+    Returns:
+        tuple[bytes, Transform]: The 81 canonical cell values, and the transform
+            that maps the puzzle onto them.
+    """
+    frame = np.asarray(frame, dtype=np.int8)
+    given = frame > 0
+    frequency = np.bincount(frame.ravel(), minlength=10)
+    frequency[0] = 0
+    weights = frequency[frame] * 16
+    row_weights = np.where(given, weights + given.sum(axis=0)[None, :], 0)
+    col_weights = np.where(given, weights + given.sum(axis=1)[:, None], 0)
+    row_keys = np.sort(row_weights, axis=1).tolist()
+    col_keys = np.sort(col_weights, axis=0).T.tolist()
+    row_orders = _line_orders(row_keys)
+    col_orders = _line_orders(col_keys)
+
+    # Transposing swaps the roles of rows and columns, so the orientation
+    # whose rows come first in key order is tried, or both if they tie.
+    row_sequence = [row_keys[line] for line in row_orders[0]]
+    col_sequence = [col_keys[line] for line in col_orders[0]]
+    orientations = []
+    if (row_sequence, col_sequence) <= (col_sequence, row_sequence):
+        orientations.append((False, row_orders, col_orders))
+    if (col_sequence, row_sequence) <= (row_sequence, col_sequence):
+        orientations.append((True, col_orders, row_orders))
+
+    candidates = []
+    per_orientation = MAX_CANDIDATES // len(orientations)
+    for transpose, line_orders, cross_orders in orientations:
+        for count, (rows, cols) in enumerate(product(line_orders, cross_orders)):
+            if count == per_orientation:
+                break
+            candidates.append((transpose, rows, cols))
+
+    flat, flat_transposed = frame.ravel().tolist(), frame.T.ravel().tolist()
+    best = None
+    for transpose, rows, cols in candidates:
+        source = flat_transposed if transpose else flat
+        grid = [source[row * 9 + col] for row in rows for col in cols]
+        # relabel the digits in order of first appearance
+        labels = [0] * 10
+        label = 1
+        for value in grid:
+            if value and not labels[value]:
+                labels[value] = label
+                label += 1
+        for digit in range(1, 10):
+            if not labels[digit]:
+                labels[digit] = label
+                label += 1
+        form = bytes([labels[value] for value in grid])
+        if best is None or form < best[0]:
+            best = (form, transpose, rows, cols, labels)
+
+    form, transpose, rows, cols, labels = best
+    return form, Transform(transpose, rows, cols, labels)
+
+
+def signature(frame: npt.NDArray[np.int8]) -> bytes:
+    """
+    Returns a 33-byte invariant of a puzzle under the symmetry group, built
+    from the sorted digit counts and the sorted given counts of the rows,
+    columns, bands and stacks.
+
+    Args:
+        frame (np.ndarray): 9x9 int8 puzzle (0 for empty cells).
+    """
+    raw = np.asarray(frame, dtype=np.int8).tobytes()
+    rows = [9 - raw.count(0, start, start + 9) for start in range(0, 81, 9)]
+    cols = [9 - raw[col::9].count(0) for col in range(9)]
+    # transposing swaps rows and columns, so the two halves go in sorted order
+    lines = (bytes(sorted(rows) + sorted([sum(rows[0:3]), sum(rows[3:6]), sum(rows[6:9])])),
+             bytes(sorted(cols) + sorted([sum(cols[0:3]), sum(cols[3:6]), sum(cols[6:9])])))
+    return bytes(sorted([raw.count(digit) for digit in range(1, 10)])) + min(lines) + max(lines)
+
+
+def _line_orders(keys: list[list[int]]) -> list[tuple[int, ...]]:
+    """
+    Lists the orders of the 9 lines that sort them by key inside each band
+    and sort the bands by their line keys, trying every order of equal keys.
+
+    Args:
+        keys (list[list[int]]): Invariant key of each line.
+
+    Returns:
+        list[tuple[int, ...]]: Source line of each position, at most `MAX_CANDIDATES` orders.
+    """
+    bands = [sorted((start, start + 1, start + 2), key=keys.__getitem__) for start in (0, 3, 6)]
+    band_keys = [[keys[line] for line in lines] for lines in bands]
+    band_order = sorted(range(3), key=band_keys.__getitem__)
+    if all(key[0] != key[1] != key[2] for key in band_keys) and \
+            band_keys[band_order[0]] != band_keys[band_order[1]] != band_keys[band_order[2]]:
+        # no ties, by far the common case
+        return [tuple(bands[band_order[0]] + bands[band_order[1]] + bands[band_order[2]])]
+
+    band_orders = [_tied_orders(lines, keys) for lines in bands]
+    orders = []
+    for band_sequence in _tied_orders(band_order, band_keys):
+        for lines in product(*(band_orders[band] for band in band_sequence)):
+            orders.append(sum(lines, ()))
+            if len(orders) == MAX_CANDIDATES:
+                return orders
+    return orders
+
+
+def _tied_orders(items: list[int], keys) -> list[tuple[int, ...]]:
+    """Returns every reordering of sorted `items` that only swaps items with equal keys."""
+    groups = []
+    for item in items:
+        if groups and keys[groups[-1][0]] == keys[item]:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    return [sum(parts, ()) for parts in product(*(permutations(group) for group in groups))]
@@ -0,0 +1,284 @@
+"""
+A small conflict-driven clause-learning (CDCL) SAT solver in pure Python.
+
+It is meant for the formulas built by `cnf.encode`, which have a few hundred
+variables, and runs in-process without any external service. It uses the
+usual ingredients:
+- unit propagation with two watched literals per clause;
+- first-UIP conflict analysis with non-chronological backjumping;
+- VSIDS-style variable activities with phase saving;
+- Luby restarts.
+Learnt clauses are kept for the whole solve, which is fine at this size.
+
+Literals are non-zero ints: v for variable v true, -v for it false.
+"""
+from time import perf_counter
+
+
+def luby(i: int) -> int:
+    """Returns the i-th (1-based) term of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class CDCLSolver:
+    """
+    CDCL solver for one formula.
+
+    Attributes:
+        num_vars (int): Number of variables.
+        decisions (int): Decisions made by the last `solve`.
+        conflicts (int): Conflicts met by the last `solve`.
+        propagations (int): Literals assigned by unit propagation in the last `solve`.
+    """
+    RESTART_BASE = 64
+    ACTIVITY_DECAY = 0.95
+    # Propagations, or clauses loaded, between two looks at the clock
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, num_vars: int, clauses: list[list[int]]):
+        """
+        Args:
+            num_vars (int): Number of variables, numbered 1 to num_vars.
+            clauses (list[list[int]]): Clauses of the formula; `solve` copies
+                them before it reorders their literals.
+        """
+        self.num_vars = num_vars
+        self._formula = clauses
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+
+    def solve(self, conflict_limit: int | None = None, decision_limit: int | None = None,
+              deadline: float | None = None) -> list[bool] | None:
+        """
+        Looks for an assignment that satisfies every clause.
+
+        Args:
+            conflict_limit (int | None): Give up after this many conflicts.
+            decision_limit (int | None): Give up after this many decisions.
+            deadline (float | None): Give up once `time.perf_counter()` passes
+                this; checked at every conflict and decision, and every
+                `CLOCK_INTERVAL` propagations or clauses loaded.
+
+        Returns:
+            list[bool] | None: Truth value of each variable, indexed by variable
+                (index 0 unused), or None if the formula is unsatisfiable.
+
+        Raises:
+            TimeoutError: If a limit or the deadline was reached first.
+        """
+        n = self.num_vars
+        # value[v]: 1 true, -1 false, 0 unassigned
+        self._value = [0] * (n + 1)
+        self._level = [0] * (n + 1)
+        self._reason = [None] * (n + 1)
+        self._trail = []
+        self._trail_lim = []
+        self._qhead = 0
+        self._activity = [0.0] * (n + 1)
+        self._increment = 1.0
+        self._phase = [1] * (n + 1)
+        self._watches = [[] for _ in range(2 * n + 2)]
+        self.decisions = self.conflicts = self.propagations = 0
+        self._deadline = deadline
+
+        self._clauses = []
+        units = []
+        for index, clause in enumerate(self._formula):
+            if deadline is not None and not index % self.CLOCK_INTERVAL and perf_counter() > deadline:
+                raise TimeoutError("gave up at the deadline while loading the clauses")
+            clause = list(clause)
+            self._clauses.append(clause)
+            if not clause:
+                return None
+            if len(clause) == 1:
+                units.append(clause[0])
+            else:
+                self._watches[self._slot(clause[0])].append(index)
+                self._watches[self._slot(clause[1])].append(index)
+        for literal in units:
+            value = self._literal_value(literal)
+            if value < 0:
+                return None
+            if not value:
+                self._assign(literal, None)
+        if self._propagate() is not None:
+            return None
+
+        restarts = 0
+        budget = self.RESTART_BASE * luby(1)
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if conflict_limit is not None and self.conflicts > conflict_limit:
+                    raise TimeoutError(f"gave up after {conflict_limit} conflicts")
+                if deadline is not None and perf_counter() > deadline:
+                    raise TimeoutError(f"gave up at the deadline after {self.conflicts} conflicts")
+                if not self._trail_lim:
+                    return None
+                learnt, backjump = self._analyze(conflict)
+                self._cancel_until(backjump)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], None)
+                else:
+                    self._clauses.append(learnt)
+                    index = len(self._clauses) - 1
+                    self._watches[self._slot(learnt[0])].append(index)
+                    self._watches[self._slot(learnt[1])].append(index)
+                    self._assign(learnt[0], index)
+                self._increment /= self.ACTIVITY_DECAY
+                budget -= 1
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = self.RESTART_BASE * luby(restarts + 1)
+                self._cancel_until(0)
+                continue
+
+            var = self._pick_branch_variable()
+            if not var:
+                value = self._value
+                return [False] + [value[v] > 0 for v in range(1, n + 1)]
+            self.decisions += 1
+            if decision_limit is not None and self.decisions > decision_limit:
+                raise TimeoutError(f"gave up after {decision_limit} decisions")
+            if deadline is not None and perf_counter() > deadline:
+                raise TimeoutError(f"gave up at the deadline after {self.decisions} decisions")
+            self._trail_lim.append(len(self._trail))
+            self._assign(var if self._phase[var] > 0 else -var, None)
+
+    @staticmethod
+    def _slot(literal: int) -> int:
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def _literal_value(self, literal: int) -> int:
+        value = self._value[abs(literal)]
+        return value if literal > 0 else -value
+
+    def _assign(self, literal: int, reason: int | None):
+        var = abs(literal)
+        self._value[var] = 1 if literal > 0 else -1
+        self._level[var] = len(self._trail_lim)
+        self._reason[var] = reason
+        self._trail.append(literal)
+
+    def _propagate(self) -> int | None:
+        """Propagates the pending assignments; returns the index of a conflicting clause, if any."""
+        value, clauses, watches, trail = self._value, self._clauses, self._watches, self._trail
+        slot = self._slot
+        deadline = self._deadline
+        while self._qhead < len(trail):
+            literal = trail[self._qhead]
+            self._qhead += 1
+            self.propagations += 1
+            if deadline is not None and not self.propagations % self.CLOCK_INTERVAL and perf_counter() > deadline:
+                raise TimeoutError(f"gave up at the deadline after {self.propagations} propagations")
+            false_literal = -literal
+            watching = watches[slot(false_literal)]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                # keep the false literal in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = value[first] if first > 0 else -value[-first]
+                if first_value > 0:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    if (value[other] if other > 0 else -value[-other]) >= 0:
+                        clause[1], clause[k] = other, false_literal
+                        watches[slot(other)].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value < 0:
+                        kept.extend(watching[position + 1:])
+                        watches[slot(false_literal)] = kept
+                        self._qhead = len(trail)
+                        return index
+                    self._assign(first, index)
+            watches[slot(false_literal)] = kept
+        return None
+
+    def _analyze(self, conflict: int) -> tuple[list[int], int]:
+        """Derives the first-UIP clause of a conflict and the level to backjump to."""
+        level, reason, trail = self._level, self._reason, self._trail
+        current = len(self._trail_lim)
+        seen = bytearray(self.num_vars + 1)
+        learnt = [0]
+        pending = 0
+        literal = 0
+        clause = self._clauses[conflict]
+        position = len(trail) - 1
+        while True:
+            # a reason clause holds the literal it implied in position 0
+            for other in (clause if literal == 0 else clause[1:]):
+                var = abs(other)
+                if not seen[var] and level[var] > 0:
+                    seen[var] = 1
+                    self._bump(var)
+                    if level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            while not seen[abs(trail[position])]:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            seen[abs(literal)] = 0
+            pending -= 1
+            if not pending:
+                break
+            clause = self._clauses[reason[abs(literal)]]
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # watch the literal with the highest level after the asserting one
+        best = max(range(1, len(learnt)), key=lambda i: level[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def _bump(self, var: int):
+        activity = self._activity
+        activity[var] += self._increment
+        if activity[var] > 1e100:
+            for v in range(1, self.num_vars + 1):
+                activity[v] *= 1e-100
+            self._increment *= 1e-100
+
+    def _cancel_until(self, target: int):
+        if len(self._trail_lim) <= target:
+            return
+        value, phase, trail = self._value, self._phase, self._trail
+        start = self._trail_lim[target]
+        for literal in trail[start:]:
+            var = abs(literal)
+            phase[var] = value[var]
+            value[var] = 0
+            self._reason[var] = None
+        del trail[start:]
+        del self._trail_lim[target:]
+        self._qhead = len(trail)
+
+    def _pick_branch_variable(self) -> int:
+        """Returns the unassigned variable with the highest activity, or 0 if all are assigned."""
+        value, activity = self._value, self._activity
+        best, best_activity = 0, -1.0
+        for var in range(1, self.num_vars + 1):
+            if not value[var] and activity[var] > best_activity:
+                best, best_activity = var, activity[var]
+        return best
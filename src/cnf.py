@@ -0,0 +1,106 @@
+"""
+CNF encoding of a partly solved puzzle.
+
+Only the open part of the grid is encoded. There is one variable per
+candidate left in an unsolved cell, so every elimination made by
+propagation shrinks the formula before a SAT solver sees it. The clauses
+say:
+- each unsolved cell takes one of its candidates, and at most one;
+- each digit still missing from a row, column or box goes in one of the
+  cells of the unit that allow it, and in at most one of them.
+Placed values need no clauses, since their peers have already lost them as
+candidates.
+"""
+from itertools import combinations
+from time import perf_counter
+
+from units import UNITS
+from bitmasks import DIGIT_MASK, MASK_DIGITS
+
+
+class CNF:
+    """
+    A formula in conjunctive normal form over candidate variables.
+
+    Attributes:
+        num_vars (int): Number of variables, numbered 1 to num_vars.
+        clauses (list[list[int]]): Clauses as lists of literals (v or -v).
+        choices (list[tuple[int, int]]): (cell index, digit) placed by each
+            variable when true; choices[v - 1] belongs to variable v.
+    """
+    __slots__ = ("num_vars", "clauses", "choices")
+
+    def __init__(self, choices: list[tuple[int, int]], clauses: list[list[int]]):
+        self.num_vars = len(choices)
+        self.clauses = clauses
+        self.choices = choices
+
+    def to_dimacs(self) -> str:
+        """
+        Returns the formula in the DIMACS CNF text format read by SAT solvers,
+        with one comment line naming the (cell, digit) of each variable.
+        """
+        lines = [f"p cnf {self.num_vars} {len(self.clauses)}"]
+        lines.extend(f"c {var} r{cell // 9}c{cell % 9}={digit}"
+                     for var, (cell, digit) in enumerate(self.choices, 1))
+        lines.extend(" ".join(map(str, clause)) + " 0" for clause in self.clauses)
+        return "\n".join(lines) + "\n"
+
+    def decode(self, model: list[bool]) -> dict[int, int]:
+        """
+        Reads the placements out of a satisfying assignment.
+
+        Args:
+            model (list[bool]): Truth value of each variable, indexed by variable
+                number (index 0 unused).
+
+        Returns:
+            dict[int, int]: Digit of every cell the formula covers, by cell index.
+        """
+        return {cell: digit for var, (cell, digit) in enumerate(self.choices, 1) if model[var]}
+
+
+def encode(puzzle, deadline: float | None = None) -> CNF:
+    """
+    Encodes the unsolved cells of a puzzle, restricted to their candidates.
+
+    Args:
+        puzzle (SudokuPuzzle): Puzzle in any state; its values are taken as fixed.
+        deadline (float | None): Give up once `time.perf_counter()` passes
+            this; checked before each unit.
+
+    Returns:
+        CNF: The formula. It contains an empty clause if a cell or a missing
+            digit of a unit has no place left, so it is unsatisfiable.
+
+    Raises:
+        TimeoutError: If the deadline was reached first.
+    """
+    cells = puzzle.cells
+    choices = []
+    var_of = {}
+    clauses = []
+    for index, cell in enumerate(cells):
+        if cell.is_solved:
+            continue
+        cell_vars = []
+        for digit in MASK_DIGITS[cell.candidate_mask]:
+            choices.append((index, digit))
+            var_of[index * 9 + digit] = len(choices)
+            cell_vars.append(len(choices))
+        clauses.append(cell_vars)
+        clauses.extend([-a, -b] for a, b in combinations(cell_vars, 2))
+
+    for unit in UNITS:
+        if deadline is not None and perf_counter() > deadline:
+            raise TimeoutError("gave up at the deadline while encoding")
+        placed = 0
+        for index in unit:
+            placed |= DIGIT_MASK[cells[index].value]
+        for digit in range(1, 10):
+            if placed & DIGIT_MASK[digit]:
+                continue
+            unit_vars = [var_of[index * 9 + digit] for index in unit if index * 9 + digit in var_of]
+            clauses.append(unit_vars)
+            clauses.extend([-a, -b] for a, b in combinations(unit_vars, 2))
+    return CNF(choices, clauses)
@@ -0,0 +1,264 @@
+"""
+Exact-cover solving with Dancing Links (Knuth's Algorithm X).
+
+Sudoku is modelled as an exact-cover problem with 324 constraints (columns)
+and 729 choices (rows). The constraints say each cell holds a value and each
+row, column and box holds each digit once. A choice places digit d in cell i
+and satisfies four constraints. A solution is a set of 81 choices covering
+every constraint exactly once.
+
+The linked structure is kept in flat integer lists instead of one Python
+object per node. Node n links to L[n], R[n], U[n] and D[n], belongs to
+column COL[n] and encodes choice ROW[n]. Node 0 is the root, nodes 1-324
+are the column headers, and the four nodes of choice k are
+325 + 4k ... 328 + 4k. The links of the empty grid are built once at
+import as tuples; each solve works on list copies of them, so nothing has
+to be restored between puzzles and concurrent solves share nothing.
+"""
+from time import perf_counter
+
+from bitmasks import DIGIT_MASK
+
+N_COLUMNS = 324
+N_CHOICES = 729
+FIRST_NODE = N_COLUMNS + 1
+
+
+def choice_columns(choice: int) -> tuple[int, int, int, int]:
+    """
+    Returns the four constraint columns (1-324) satisfied by a choice.
+
+    Args:
+        choice (int): cell * 9 + digit - 1.
+
+    Returns:
+        tuple[int, int, int, int]: Cell, row-digit, column-digit and box-digit columns.
+    """
+    cell, d = divmod(choice, 9)
+    row, col = divmod(cell, 9)
+    box = (row // 3) * 3 + col // 3
+    return (1 + cell, 82 + row * 9 + d, 163 + col * 9 + d, 244 + box * 9 + d)
+
+
+def _build_links():
+    size = FIRST_NODE + 4 * N_CHOICES
+    left = list(range(-1, size - 1))
+    right = list(range(1, size + 1))
+    up = list(range(size))
+    down = list(range(size))
+    column = list(range(size))
+    row = [-1] * size
+    # header ring: root and the column headers
+    left[0], right[N_COLUMNS] = N_COLUMNS, 0
+    for choice in range(N_CHOICES):
+        first = FIRST_NODE + 4 * choice
+        for k, col in enumerate(choice_columns(choice)):
+            node = first + k
+            column[node] = col
+            row[node] = choice
+            # append at the bottom of the column
+            up[node], down[node] = up[col], col
+            down[up[col]] = node
+            up[col] = node
+        left[first], right[first + 3] = first + 3, first
+    sizes = [0] + [9] * N_COLUMNS  # every constraint starts with 9 choices
+    return tuple(left), tuple(right), tuple(up), tuple(down), tuple(column), tuple(row), tuple(sizes)
+
+
+L, R, U, D, COL, ROW, SIZES = _build_links()
+
+
+class DancingLinks:
+    """
+    Exact-cover engine for 9x9 grids.
+
+    Attributes:
+        nodes (int): Choices tried by the last `solve` or `count`.
+        solution (list[int] | None): The 81 values of the first solution found
+            by the last `solve` or `count`, if any.
+        exhausted (bool): True if the last `solve` or `count` ran out of its
+            node limit or deadline before it finished.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.solution = None
+        self.exhausted = False
+        self._node_limit = None
+        self._deadline = None
+
+    def solve(self, values: list[int], masks: list[int] | None = None, node_limit: int | None = None,
+              deadline: float | None = None) -> list[int] | None:
+        """
+        Finds a solution of a grid.
+
+        Args:
+            values (list[int]): 81 cell values, 0 for empty cells.
+            masks (list[int] | None): 81 candidate masks. If given, only the
+                candidates left in each empty cell are tried.
+            node_limit (int | None): Give up after trying this many choices.
+            deadline (float | None): Give up once `time.perf_counter()` passes this.
+
+        Returns:
+            list[int] | None: The 81 values of a solution, or None if there is
+                none or the search gave up (see `exhausted`).
+        """
+        self.count(values, masks, 1, node_limit, deadline)
+        return self.solution
+
+    def count(self, values: list[int], masks: list[int] | None = None, limit: int = 2,
+              node_limit: int | None = None, deadline: float | None = None) -> int:
+        """
+        Counts the solutions of a grid, stopping as soon as `limit` are found.
+
+        Args:
+            values (list[int]): 81 cell values, 0 for empty cells.
+            masks (list[int] | None): 81 candidate masks, as for `solve`.
+            limit (int): Number of solutions after which to stop.
+            node_limit (int | None): Give up after trying this many choices.
+            deadline (float | None): Give up once `time.perf_counter()` passes this.
+
+        Returns:
+            int: Number of solutions, capped at `limit`. If the search gave up
+                (see `exhausted`), the number found so far.
+        """
+        self.nodes = 0
+        self.solution = None
+        self.exhausted = False
+        self._node_limit = node_limit
+        self._deadline = deadline
+        self._left, self._right = list(L), list(R)
+        self._up, self._down = list(U), list(D)
+        self._sizes = list(SIZES)
+        chosen = []
+        if not self._place(values, masks, chosen):
+            return 0
+        return self._search(chosen, limit)
+
+    def _place(self, values: list[int], masks: list[int] | None, chosen: list[int]) -> bool:
+        """Selects the givens and drops ruled-out choices; False if the givens clash."""
+        right = self._right
+        covered = bytearray(N_COLUMNS + 1)
+        for cell, value in enumerate(values):
+            if not value:
+                continue
+            choice = cell * 9 + value - 1
+            node = FIRST_NODE + 4 * choice
+            for k in range(4):
+                if covered[COL[node + k]]:
+                    return False
+            for k in range(4):
+                covered[COL[node + k]] = 1
+                self._cover(COL[node + k])
+            chosen.append(choice)
+        if masks is not None:
+            for cell, mask in enumerate(masks):
+                if values[cell]:
+                    continue
+                for d in range(1, 10):
+                    if not mask & DIGIT_MASK[d]:
+                        self._remove_choice(cell * 9 + d - 1, covered)
+        # a constraint left without choices can never be covered
+        col = right[0]
+        while col:
+            if not self._sizes[col]:
+                return False
+            col = right[col]
+        return True
+
+    def _remove_choice(self, choice: int, covered: bytearray):
+        """Unlinks a choice's nodes from the columns that are still open."""
+        up, down, sizes = self._up, self._down, self._sizes
+        node = FIRST_NODE + 4 * choice
+        for j in range(node, node + 4):
+            col = COL[j]
+            if covered[col]:
+                # the choice clashes with a given; covering already dropped it
+                return
+        for j in range(node, node + 4):
+            down[up[j]] = down[j]
+            up[down[j]] = up[j]
+            sizes[COL[j]] -= 1
+
+    def _cover(self, col: int):
+        left, right, up, down, sizes = self._left, self._right, self._up, self._down, self._sizes
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[COL[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col: int):
+        left, right, up, down, sizes = self._left, self._right, self._up, self._down, self._sizes
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                sizes[COL[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def _search(self, chosen: list[int], limit: int) -> int:
+        if (self._node_limit is not None or self._deadline is not None) and self._out_of_budget():
+            return 0
+        right, down, sizes = self._right, self._down, self._sizes
+        if not right[0]:
+            if self.solution is None:
+                solution = [0] * 81
+                for choice in chosen:
+                    cell, d = divmod(choice, 9)
+                    solution[cell] = d + 1
+                self.solution = solution
+            return 1
+
+        # the column with the fewest choices left
+        best, best_size = 0, N_CHOICES
+        col = right[0]
+        while col:
+            if sizes[col] < best_size:
+                best, best_size = col, sizes[col]
+                if best_size < 2:
+                    break
+            col = right[col]
+        if not best_size:
+            return 0
+
+        found = 0
+        self._cover(best)
+        i = down[best]
+        while i != best:
+            self.nodes += 1
+            chosen.append(ROW[i])
+            j = right[i]
+            while j != i:
+                self._cover(COL[j])
+                j = right[j]
+            found += self._search(chosen, limit - found)
+            j = self._left[i]
+            while j != i:
+                self._uncover(COL[j])
+                j = self._left[j]
+            chosen.pop()
+            if found >= limit or self.exhausted:
+                break
+            i = down[i]
+        self._uncover(best)
+        return found
+
+    def _out_of_budget(self) -> bool:
+        """Checks the node limit, and the deadline every 64 nodes, setting `exhausted`."""
+        if self._node_limit is not None and self.nodes > self._node_limit:
+            self.exhausted = True
+        elif self._deadline is not None and not self.nodes & 63 and perf_counter() > self._deadline:
+            self.exhausted = True
+        return self.exhausted
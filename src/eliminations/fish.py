@@ -0,0 +1,159 @@
+from sudoku import SudokuPuzzle
+from enums import FishType, GroupType
+from sudoku_logger import StepLogger, NULL_LOGGER
+from bitmasks import POPCOUNT, MASK_DIGITS, DIGIT_MASK
+from itertools import combinations
+from typing import Iterable, TypeAlias
+
+# (digit, base group type, base lines mask, cover lines mask) of a fish
+Fish: TypeAlias = tuple[int, GroupType, int, int]
+
+def eliminate_x_wings(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                      units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate candidates covered by an X-Wing (fish of size 2).
+        See `find_fish` for `skip_complements`.
+    """
+    return eliminate_fish(puzzle, 2, FishType.X_WING, log, skip_complements)
+
+def eliminate_swordfish(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                        units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate candidates covered by a Swordfish (fish of size 3).
+        See `find_fish` for `skip_complements`.
+    """
+    return eliminate_fish(puzzle, 3, FishType.SWORDFISH, log, skip_complements)
+
+def eliminate_jellyfish(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                        units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate candidates covered by a Jellyfish (fish of size 4).
+        See `find_fish` for `skip_complements`.
+    """
+    return eliminate_fish(puzzle, 4, FishType.JELLYFISH, log, skip_complements)
+
+def eliminate_fish(puzzle: SudokuPuzzle, n: int, fish_type: FishType, log: StepLogger = NULL_LOGGER,
+                   skip_complements: bool = True) -> bool:
+    """
+        Eliminate candidates covered by fish of size n.
+
+        A fish involves a single digit across whole rows and columns, so every
+        digit is checked on each call; the `units` argument of the public
+        functions is accepted for a uniform technique signature but not used.
+    """
+    changed = False
+    row_cols, col_rows = digit_line_masks(puzzle)
+    for digit, base_type, base, cover in find_fish(row_cols, col_rows, n, skip_complements):
+        bit = DIGIT_MASK[digit]
+        for line in range(9):
+            if not cover >> line & 1:
+                continue
+            for cross in range(9):
+                if base >> cross & 1:
+                    continue
+                row, col = (cross, line) if base_type == GroupType.ROW else (line, cross)
+                cell = puzzle.cells[row * 9 + col]
+                if cell.candidate_mask & bit:
+                    if log.enabled:
+                        log.step(f"{fish_type.name} on {digit} ({base_type.name} base {[i for i in range(9) if base >> i & 1]}): Eliminate candidate '{digit}' from Cell({cell.row}, {cell.col})")
+                    if cell.eliminate_mask(bit):
+                        changed = True
+
+    return changed
+
+def digit_line_masks(puzzle: SudokuPuzzle) -> tuple[list[list[int]], list[list[int]]]:
+    """
+        Builds the per-digit line index: for each digit, the mask of columns that
+        allow it in each row, and the mask of rows that allow it in each column.
+
+        Returns:
+            tuple[list[list[int]], list[list[int]]]: row_cols[digit][row] and
+                col_rows[digit][col] (digit index 0 unused).
+    """
+    row_cols = [[0] * 9 for _ in range(10)]
+    col_rows = [[0] * 9 for _ in range(10)]
+    for cell in puzzle.cells:
+        mask = cell.candidate_mask
+        if mask:
+            row, col = cell.row, cell.col
+            for digit in MASK_DIGITS[mask]:
+                row_cols[digit][row] |= 1 << col
+                col_rows[digit][col] |= 1 << row
+    return row_cols, col_rows
+
+def find_fish(row_cols: list[list[int]], col_rows: list[list[int]], n: int,
+              skip_complements: bool = True) -> list[Fish]:
+    """
+        Identifies fish of size n: for one digit, n base lines (rows or columns)
+        whose candidates all lie in the same n cover lines. The digit must go in
+        the cover lines at the crossings with the base lines, so it can be
+        eliminated from the rest of the cover lines.
+
+        Args:
+            row_cols, col_rows: per-digit line index from `digit_line_masks`
+            n int: number of base (and cover) lines
+            skip_complements bool: skip digits open in fewer than 2n rows.
+                There every fish is the complement of a smaller fish in the
+                other direction, found by hidden singles (size 1) and the fish
+                techniques of sizes 2 to n - 1. Only safe while those
+                techniques run too (see `TechniqueScheduler`).
+
+        Returns:
+            list[tuple[int, GroupType, int, int]]: digit, base group type, mask of
+                base lines and mask of cover lines (bit i for line i) of each fish
+                that still has candidates to eliminate.
+    """
+    fishes = []
+    for digit in range(1, 10):
+        # With k lines still open for the digit, a fish of size n in rows is
+        # the same as a fish of size k - n in columns (and vice versa), making
+        # the same eliminations, so only the smaller one has to be searched.
+        if skip_complements and 9 - row_cols[digit].count(0) < 2 * n:
+            continue
+        for base_type, lines, crossing in ((GroupType.ROW, row_cols[digit], col_rows[digit]),
+                                           (GroupType.COL, col_rows[digit], row_cols[digit])):
+            if n == 2:
+                candidates = x_wings_from_lines(lines)
+            else:
+                possible = [i for i in range(9) if 2 <= POPCOUNT[lines[i]] <= n]
+                candidates = fish_from_lines(lines, possible, n) if len(possible) >= n else ()
+            for base, cover in candidates:
+                # only worth reporting if a cover line has the digit outside the base lines
+                if any(crossing[j] & ~base for j in range(9) if cover >> j & 1):
+                    fishes.append((digit, base_type, base, cover))
+
+    return fishes
+
+def fish_from_lines(lines: list[int], possible: list[int], n: int) -> list[tuple[int, int]]:
+    """
+        Combines n of the `possible` base lines whose cover masks union to n lines.
+
+        Returns:
+            list[tuple[int, int]]: Mask of the base lines and mask of the cover lines.
+    """
+    found = []
+    for combination in combinations(possible, n):
+        cover = 0
+        for i in combination:
+            cover |= lines[i]
+        if POPCOUNT[cover] != n:
+            continue
+        base = 0
+        for i in combination:
+            base |= 1 << i
+        found.append((base, cover))
+    return found
+
+def x_wings_from_lines(lines: list[int]) -> list[tuple[int, int]]:
+    """
+        Finds X-Wings without trying combinations: two base lines form one
+        exactly when both allow the digit in the same two cover lines only.
+
+        Returns:
+            list[tuple[int, int]]: As for `fish_from_lines`.
+    """
+    bases_at = {}
+    for i, cover in enumerate(lines):
+        if POPCOUNT[cover] == 2:
+            bases_at[cover] = bases_at.get(cover, 0) | 1 << i
+    return [(base, cover) for cover, base in bases_at.items() if POPCOUNT[base] == 2]
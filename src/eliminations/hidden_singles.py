@@ -1,30 +1,33 @@
+from typing import Iterable
+
 from sudoku import SudokuPuzzle
 from sudoku_cell import Cell
-from sudoku_logger import log_step
-from enums import GroupType
+from sudoku_logger import StepLogger, NULL_LOGGER
+from bitmasks import DIGIT_MASK, LOWEST_DIGIT, MASK_SETS
 
 
-def eliminate_hidden_singles(puzzle: SudokuPuzzle):
+def eliminate_hidden_singles(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                             units: Iterable[int] | None = None):
     """
     Eliminates hidden singles from a row, column or box.
+
+    Only the units numbered in `units` are checked, if given (default: all 27).
     """
-    group_types = [GroupType.ROW, GroupType.COL, GroupType.BOX]
     hidden_singles = []
-    for i in range(9):
-         for group_type in group_types:
-            group = puzzle.group_for_loc(i, group_type)
-            hidden_singles += hidden_singles_for_group(group)
+    for unit in (range(27) if units is None else units):
+        hidden_singles += hidden_singles_for_group(puzzle.units[unit])
 
     if not hidden_singles:
         return False
 
     changed = False
     for cell, candidate in hidden_singles:
-        to_keep = {candidate}
-        if to_keep != cell.candidates:
-            to_eliminate = cell.candidates - to_keep
-            log_step(f"Hidden Single {candidate}: Eliminate candidates {to_eliminate} from Cell({cell.row}, {cell.col}){{{cell.candidates}}}")
-            changed = cell.eliminate_candidates(to_eliminate)
+        to_eliminate = cell.candidate_mask & ~DIGIT_MASK[candidate]
+        if to_eliminate:
+            if log.enabled:
+                log.step(f"Hidden Single {candidate}: Eliminate candidates {set(MASK_SETS[to_eliminate])} from Cell({cell.row}, {cell.col}){{{set(cell.candidates)}}}")
+            if cell.eliminate_mask(to_eliminate):
+                changed = True
 
     return changed
 
@@ -39,14 +42,19 @@ def hidden_singles_for_group(group: list[Cell]) -> list[tuple[Cell, int]]:
             list[tuple[Cell, int]]: List of tuples (cell, candidate) where
                                      candidate is a hidden single in that cell.
         """
-        counts: dict[int, int] = dict()
+        # Candidates seen at least once / at least twice in the group
+        seen_once = 0
+        seen_twice = 0
         for cell in group:
-            for candidate in cell.candidates:
-                counts[candidate] = counts.get(candidate, 0) + 1
-        
-        hidden_singles = {candidate for candidate, count in counts.items() if count == 1}
+            mask = cell.candidate_mask
+            seen_twice |= seen_once & mask
+            seen_once |= mask
+
+        hidden_singles = seen_once & ~seen_twice
+        if not hidden_singles:
+            return []
 
         return [
-            (cell, next(iter(cell.candidates & hidden_singles)))
-            for cell in group if cell.candidates & hidden_singles
+            (cell, LOWEST_DIGIT[cell.candidate_mask & hidden_singles])
+            for cell in group if cell.candidate_mask & hidden_singles
         ]
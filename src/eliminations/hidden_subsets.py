@@ -0,0 +1,162 @@
+from sudoku import SudokuPuzzle
+from sudoku_cell import Cell
+from enums import NakedSubsetType
+from sudoku_logger import StepLogger, NULL_LOGGER
+from bitmasks import ALL_DIGITS_MASK, POPCOUNT, MASK_DIGITS, MASK_SETS, DIGIT_MASK
+from units import UNIT_TYPE
+from itertools import combinations
+from typing import Iterable, TypeAlias
+
+# (digits mask, cells) of a hidden subset: n digits confined to n cells of a group
+HiddenSubset: TypeAlias = tuple[int, tuple[Cell, ...]]
+
+def eliminate_hidden_pairs(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                           units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate the other candidates from cells holding a hidden pair.
+        Only the units numbered in `units` are checked, if given (default: all 27).
+        See `find_hidden_subsets_for_group` for `skip_complements`.
+    """
+    return eliminate_hidden_subsets(puzzle, 2, NakedSubsetType.HIDDEN_PAIR, log, units, skip_complements)
+
+def eliminate_hidden_triples(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                             units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate the other candidates from cells holding a hidden triple.
+        Only the units numbered in `units` are checked, if given (default: all 27).
+        See `find_hidden_subsets_for_group` for `skip_complements`.
+    """
+    return eliminate_hidden_subsets(puzzle, 3, NakedSubsetType.HIDDEN_TRIPLE, log, units, skip_complements)
+
+def eliminate_hidden_quads(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                           units: Iterable[int] | None = None, skip_complements: bool = True):
+    """
+        Eliminate the other candidates from cells holding a hidden quad.
+        Only the units numbered in `units` are checked, if given (default: all 27).
+        See `find_hidden_subsets_for_group` for `skip_complements`.
+    """
+    return eliminate_hidden_subsets(puzzle, 4, NakedSubsetType.HIDDEN_QUAD, log, units, skip_complements)
+
+def eliminate_hidden_subsets(puzzle: SudokuPuzzle, n: int, elimination_type: NakedSubsetType,
+                             log: StepLogger = NULL_LOGGER, units: Iterable[int] | None = None,
+                             skip_complements: bool = True) -> bool:
+    """
+        Eliminate candidates from cells identified as hidden subsets of size n.
+    """
+    changed = False
+    for unit in (range(27) if units is None else units):
+        group = puzzle.units[unit]
+        for digits, cells in find_hidden_subsets_for_group(group, n, skip_complements):
+            others = ALL_DIGITS_MASK & ~digits
+            for cell in cells:
+                to_eliminate = cell.candidate_mask & others
+                if to_eliminate:
+                    if log.enabled:
+                        log.step(f"Hidden {elimination_type} {set(MASK_SETS[digits])} ({UNIT_TYPE[unit].name}): Eliminate candidates {set(MASK_SETS[to_eliminate])} from Cell({cell.row}, {cell.col}){{{set(cell.candidates)}}}")
+                    if cell.eliminate_mask(to_eliminate):
+                        changed = True
+
+    return changed
+
+def digit_positions(masks: list[int]) -> list[int]:
+    """
+        Builds the dual view of a group's candidates: for each digit, the mask
+        of positions (0-8 within the group) of the cells that allow it.
+
+        Args:
+            masks list[int]: candidate mask of each cell of the group, in order
+
+        Returns:
+            list[int]: 10 position masks indexed by digit (index 0 unused).
+    """
+    positions = [0] * 10
+    for position, mask in enumerate(masks):
+        if mask:
+            bit = 1 << position
+            for digit in MASK_DIGITS[mask]:
+                positions[digit] |= bit
+    return positions
+
+def find_hidden_subsets_for_group(group: list[Cell], n: int, skip_complements: bool = True) -> list[HiddenSubset]:
+    """
+        Identifies hidden subsets in a row, column or box: n digits whose only
+        places in the group are the same n cells. Those cells can hold nothing
+        but these digits, so their other candidates can be eliminated.
+
+        Subsets are found by combining digit-to-position masks, so the search
+        runs over the digits that fit in at most n cells rather than over cells.
+
+        Args:
+            group list[Cell]:  group of cells from row, column or box
+            n int: number of digits (and cells) in a subset
+            skip_complements bool: skip groups with at most 2n unsolved cells.
+                There every hidden subset is the complement of a naked subset
+                of at most n cells, found more cheaply by naked singles and the
+                naked subset techniques of sizes 2 to n. Only safe while those
+                techniques run too (see `TechniqueScheduler`).
+
+        Returns:
+            list[tuple[int, tuple[Cell]]]: Mask of the subset's digits and its cells,
+                for each hidden subset that still has candidates to eliminate.
+    """
+    masks = [cell.candidate_mask for cell in group]
+    # With k unsolved cells, n digits hidden in n cells are the complement of
+    # a naked subset of the other k - n cells, which the naked subset search
+    # finds more cheaply when k - n <= n.
+    if skip_complements and 9 - masks.count(0) <= 2 * n:
+        return []
+
+    positions = digit_positions(masks)
+    counts = [POPCOUNT[where] for where in positions]
+    if n == 2:
+        return hidden_pairs_from_positions(group, masks, positions, counts)
+
+    possible = [digit for digit in range(1, 10) if 0 < counts[digit] <= n]
+    if len(possible) < n:
+        return []
+
+    subsets = []
+    for combination in combinations(possible, n):
+        union_of_positions = 0
+        for digit in combination:
+            union_of_positions |= positions[digit]
+        if POPCOUNT[union_of_positions] != n:
+            continue
+        digits = 0
+        for digit in combination:
+            digits |= DIGIT_MASK[digit]
+        cells = [position for position in range(9) if union_of_positions >> position & 1]
+        # only worth reporting if one of the cells has another candidate
+        if any(masks[position] & ~digits for position in cells):
+            subsets.append((digits, tuple(group[position] for position in cells)))
+
+    return subsets
+
+def hidden_pairs_from_positions(group: list[Cell], masks: list[int], positions: list[int],
+                                counts: list[int]) -> list[HiddenSubset]:
+    """
+        Finds hidden pairs without trying combinations: two digits form a hidden
+        pair exactly when both are allowed in the same two cells and nowhere else.
+
+        Args:
+            group list[Cell]:  group of cells from row, column or box
+            masks list[int]: candidate mask of each cell of the group
+            positions list[int]: position mask of each digit (see `digit_positions`)
+            counts list[int]: number of cells allowing each digit
+
+        Returns:
+            list[tuple[int, tuple[Cell]]]: As for `find_hidden_subsets_for_group`.
+    """
+    digits_at = {}
+    for digit in range(1, 10):
+        if counts[digit] == 2:
+            digits_at[positions[digit]] = digits_at.get(positions[digit], 0) | DIGIT_MASK[digit]
+
+    subsets = []
+    for where, digits in digits_at.items():
+        if POPCOUNT[digits] != 2:
+            continue
+        cells = [position for position in range(9) if where >> position & 1]
+        if any(masks[position] & ~digits for position in cells):
+            subsets.append((digits, tuple(group[position] for position in cells)))
+    return subsets
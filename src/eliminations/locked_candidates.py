@@ -1,47 +1,67 @@
+from typing import Iterable
+
 from sudoku import SudokuPuzzle
-from enums import LockType
-from sudoku_logger import log_step
+from enums import GroupType, LockType
+from sudoku_logger import StepLogger, NULL_LOGGER
+from bitmasks import DIGIT_MASK, MASK_DIGITS
+from units import BOX_INTERSECTIONS, ROW_INTERSECTIONS, COL_INTERSECTIONS, INTERSECTION_AT
+
 
 
+def eliminate_locked_candidates(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                                units: Iterable[int] | None = None) -> bool:
+        """
+        Eliminates locked candidates (pointing and claiming).
 
-def eliminate_locked_candidates(puzzle: SudokuPuzzle) -> bool:
+        Only the units numbered in `units` are checked, if given (default: all 27):
+        pointing depends only on the cells of a box and claiming only on the
+        cells of a row or column.
+        """
         changes = False
         eliminations = []
-        for i in range(9):
-            eliminations += locked_candidates_for_box(puzzle, i)
-            eliminations += locked_candidates_for_column(puzzle, i)
-            eliminations += locked_candidates_for_row(puzzle, i)
+        for unit in (range(27) if units is None else units):
+            if unit < 9:
+                eliminations += locked_candidates_for_row(puzzle, unit)
+            elif unit < 18:
+                eliminations += locked_candidates_for_column(puzzle, unit - 9)
+            else:
+                eliminations += locked_candidates_for_box(puzzle, unit - 18)
 
         for elimination in eliminations:
             box, row_or_col, candidate, lock_type = elimination
+            bit = DIGIT_MASK[candidate]
             if lock_type == LockType.BOX_ROW_LOCK:
-                row = puzzle.row_at(row_or_col)
-                cells = [cell for cell in row if cell.box != box and candidate in cell.candidates]
+                rest = INTERSECTION_AT[box, GroupType.ROW, row_or_col].line_rest
+                cells = [puzzle.cells[i] for i in rest if puzzle.cells[i].candidate_mask & bit]
                 for cell in cells:
-                    has_change = cell.eliminate_candidate(candidate)
+                    has_change = cell.eliminate_mask(bit)
                     changes = changes or has_change
-                    log_step(f"'{candidate}' is locked to row {row_or_col}  inside box {box}. Eliminate candidate from Cell({cell.row}, {cell.col})")
+                    if log.enabled:
+                        log.step(f"'{candidate}' is locked to row {row_or_col}  inside box {box}. Eliminate candidate from Cell({cell.row}, {cell.col})")
             if lock_type == LockType.BOX_COL_LOCK:
-                col = puzzle.col_at(row_or_col)
-                cells = [cell for cell in col if cell.box != box and candidate in cell.candidates]
+                rest = INTERSECTION_AT[box, GroupType.COL, row_or_col].line_rest
+                cells = [puzzle.cells[i] for i in rest if puzzle.cells[i].candidate_mask & bit]
                 for cell in cells:
-                    has_change = cell.eliminate_candidate(candidate)
+                    has_change = cell.eliminate_mask(bit)
                     changes = changes or has_change
-                    log_step(f"'{candidate}' is locked to column {row_or_col} inside box {box}. Eliminate candidate from Cell({cell.row}, {cell.col})")
+                    if log.enabled:
+                        log.step(f"'{candidate}' is locked to column {row_or_col} inside box {box}. Eliminate candidate from Cell({cell.row}, {cell.col})")
             if lock_type == LockType.ROW_LOCK:
-                bx = puzzle.box_at(box)
-                cells = [cell for cell in bx if cell.row != row_or_col and candidate in cell.candidates]
+                rest = INTERSECTION_AT[box, GroupType.ROW, row_or_col].box_rest
+                cells = [puzzle.cells[i] for i in rest if puzzle.cells[i].candidate_mask & bit]
                 for cell in cells:
-                    has_change = cell.eliminate_candidate(candidate)
+                    has_change = cell.eliminate_mask(bit)
                     changes = changes or has_change
-                    log_step(f"'{candidate}' is locked to row {row_or_col}. Eliminate candidate '{candidate}' from Cell({cell.row}, {cell.col})")
+                    if log.enabled:
+                        log.step(f"'{candidate}' is locked to row {row_or_col}. Eliminate candidate '{candidate}' from Cell({cell.row}, {cell.col})")
             if lock_type == LockType.COL_LOCK:
-                bx = puzzle.box_at(box)
-                cells = [cell for cell in bx if cell.col != row_or_col and candidate in cell.candidates]
+                rest = INTERSECTION_AT[box, GroupType.COL, row_or_col].box_rest
+                cells = [puzzle.cells[i] for i in rest if puzzle.cells[i].candidate_mask & bit]
                 for cell in cells:
-                    has_change = cell.eliminate_candidate(candidate)
+                    has_change = cell.eliminate_mask(bit)
                     changes = changes or has_change
-                    log_step(f"'{candidate}' is locked to column {row_or_col}. Eliminate candidate '{candidate}' from Cell({cell.row}, {cell.col})")
+                    if log.enabled:
+                        log.step(f"'{candidate}' is locked to column {row_or_col}. Eliminate candidate '{candidate}' from Cell({cell.row}, {cell.col})")
 
         return changes
 
@@ -59,22 +79,19 @@ def locked_candidates_for_box(puzzle: SudokuPuzzle, box: int):
             list[tuple[int, int, int, LockType]]: Tuples describing locked candidates:
                 (box, row_or_col, candidate, LockType.ROW_LOCK | LockType.COL_LOCK)
         """
-        cells = puzzle.box_at(box)
-        all_candidates = set()
-
-        for cell in cells:
-            all_candidates |= cell.candidates
-
+        cells = puzzle.cells
         locked_candidates = []
-        for candidate in all_candidates:
-            cells_with_candidate = [cell for cell in cells if candidate in cell.candidates]
-            rows = {cell.row for cell in cells_with_candidate}
-            cols = {cell.col for cell in cells_with_candidate}
-            if len(rows) == 1: #candidate is locked to row
-                locked_candidates.append((box, next(iter(rows)), candidate, LockType.BOX_ROW_LOCK))
-            if len(cols) == 1: # candidate is locked to column
-                locked_candidates.append((box, next(iter(cols)), candidate, LockType.BOX_COL_LOCK))
-
+        for intersection in BOX_INTERSECTIONS[box]:
+            inside = 0
+            for i in intersection.cells:
+                inside |= cells[i].candidate_mask
+            rest = 0
+            for i in intersection.box_rest:
+                rest |= cells[i].candidate_mask
+            # candidates of the box that only appear where it crosses this row or column
+            lock_type = LockType.BOX_ROW_LOCK if intersection.line_type == GroupType.ROW else LockType.BOX_COL_LOCK
+            for candidate in MASK_DIGITS[inside & ~rest]:
+                locked_candidates.append((box, intersection.line, candidate, lock_type))
 
         return locked_candidates
     
@@ -92,22 +109,19 @@ def locked_candidates_for_column(puzzle: SudokuPuzzle, col: int):
             list[tuple[int, int, int, LockType]]: Tuples describing locked candidates:
                 (box, col, candidate, LockType.BOX_COL_LOCK)
         """
-        cells = puzzle.col_at(col)
-        all_candidates = set()
-
-        # get all candidates in a column
-        for cell in cells:
-            all_candidates |= cell.candidates
-
+        cells = puzzle.cells
         locked_candidates = []
-        for candidate in all_candidates:
-            # filter all cells for a candidate
-            cells_with_candidate = [cell for cell in cells if candidate in cell.candidates]
-            # find which boxes these cells belong to
-            boxes = {cell.box for cell in cells_with_candidate}
-            if len(boxes) == 1: 
-                locked_candidates.append((next(iter(boxes)), col, candidate, LockType.COL_LOCK))
-        
+        for intersection in COL_INTERSECTIONS[col]:
+            inside = 0
+            for i in intersection.cells:
+                inside |= cells[i].candidate_mask
+            rest = 0
+            for i in intersection.line_rest:
+                rest |= cells[i].candidate_mask
+            # candidates of the column that only appear inside this box
+            for candidate in MASK_DIGITS[inside & ~rest]:
+                locked_candidates.append((intersection.box, col, candidate, LockType.COL_LOCK))
+
         return locked_candidates
     
 def locked_candidates_for_row(puzzle: SudokuPuzzle, row: int):
@@ -124,20 +138,17 @@ def locked_candidates_for_row(puzzle: SudokuPuzzle, row: int):
             list[tuple[int, int, int, LockType]]: Tuples describing locked candidates:
                 (box, row, candidate, LockType.BOX_ROW_LOCK)
         """
-        cells = puzzle.row_at(row)
-        all_candidates = set()
-
-        # get all candidates in a column
-        for cell in cells:
-            all_candidates |= cell.candidates
-
+        cells = puzzle.cells
         locked_candidates = []
-        for candidate in all_candidates:
-            # filter all cells for a candidate
-            cells_with_candidate = [cell for cell in cells if candidate in cell.candidates]
-            # find which boxes these cells belong to
-            boxes = {cell.box for cell in cells_with_candidate}
-            if len(boxes) == 1: 
-                locked_candidates.append((next(iter(boxes)), row, candidate, LockType.ROW_LOCK))
-        
+        for intersection in ROW_INTERSECTIONS[row]:
+            inside = 0
+            for i in intersection.cells:
+                inside |= cells[i].candidate_mask
+            rest = 0
+            for i in intersection.line_rest:
+                rest |= cells[i].candidate_mask
+            # candidates of the row that only appear inside this box
+            for candidate in MASK_DIGITS[inside & ~rest]:
+                locked_candidates.append((intersection.box, row, candidate, LockType.ROW_LOCK))
+
         return locked_candidates
\ No newline at end of file
@@ -1,9 +1,11 @@
 from sudoku import SudokuPuzzle
 from sudoku_cell import Cell
 from enums import GroupType, NakedSubsetType
-from sudoku_logger import log_step
+from sudoku_logger import StepLogger, NULL_LOGGER
+from bitmasks import POPCOUNT, MASK_SETS
+from units import UNIT_TYPE
 from itertools import combinations
-from typing import Union, TypeAlias
+from typing import Iterable, Union, TypeAlias
 
 NakedSubset: TypeAlias = Union[
     tuple[Cell, Cell],
@@ -11,65 +13,72 @@ NakedSubset: TypeAlias = Union[
     tuple[Cell, Cell, Cell, Cell],
 ]
 
-def eliminate_naked_pairs(puzzle: SudokuPuzzle):
+def eliminate_naked_pairs(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                          units: Iterable[int] | None = None):
     """
-        Eliminate candidates from cells identified as naked triples in the same group. 
+        Eliminate candidates from cells identified as naked pairs in the same group. 
+        Only the units numbered in `units` are checked, if given (default: all 27).
     """
     changed = False
-    group_types = [GroupType.ROW, GroupType.COL, GroupType.BOX]
-    for i in range(9):
-        for group_type in group_types:
-            group = puzzle.group_for_loc(i, group_type)
-            pairs = find_naked_pairs_for_group(group)
-            if pairs:
-                if eliminate_candidates_for_group(group, pairs, NakedSubsetType.PAIR, group_type):
-                    changed = True
-                                
+    for unit in (range(27) if units is None else units):
+        group = puzzle.units[unit]
+        group_type = UNIT_TYPE[unit]
+        pairs = find_naked_pairs_for_group(group)
+        if pairs:
+            if eliminate_candidates_for_group(group, pairs, NakedSubsetType.PAIR, group_type, log):
+                changed = True
+                            
     return changed
 
-def eliminate_naked_triples(puzzle: SudokuPuzzle):
+def eliminate_naked_triples(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                          units: Iterable[int] | None = None):
     """
         Eliminate candidates from cells identified as naked triples in the same group. 
+        Only the units numbered in `units` are checked, if given (default: all 27).
     """
     changed = False
-    group_types = [GroupType.ROW, GroupType.COL, GroupType.BOX]
-    for i in range(9):
-        for group_type in group_types:
-            group = puzzle.group_for_loc(i, group_type)
-            triples = find_naked_triples_for_group(group)
-            if triples:
-                if eliminate_candidates_for_group(group, triples, NakedSubsetType.TRIPLE, group_type):
-                    changed = True
-                                
+    for unit in (range(27) if units is None else units):
+        group = puzzle.units[unit]
+        group_type = UNIT_TYPE[unit]
+        triples = find_naked_triples_for_group(group)
+        if triples:
+            if eliminate_candidates_for_group(group, triples, NakedSubsetType.TRIPLE, group_type, log):
+                changed = True
+                            
     return changed
 
-def eliminate_naked_quads(puzzle: SudokuPuzzle):
+def eliminate_naked_quads(puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                          units: Iterable[int] | None = None):
     """
-        Eliminate candidates from cells identified as naked triples in the same group. 
+        Eliminate candidates from cells identified as naked quads in the same group. 
+        Only the units numbered in `units` are checked, if given (default: all 27).
     """
     changed = False
-    group_types = [GroupType.ROW, GroupType.COL, GroupType.BOX]
-    for i in range(9):
-        for group_type in group_types:
-            group = puzzle.group_for_loc(i, group_type)
-            quads = find_naked_quads_for_group(group)
-            if quads:
-                if  eliminate_candidates_for_group(group, quads, NakedSubsetType.QUAD, group_type):
-                    changed = True
-                                
+    for unit in (range(27) if units is None else units):
+        group = puzzle.units[unit]
+        group_type = UNIT_TYPE[unit]
+        quads = find_naked_quads_for_group(group)
+        if quads:
+            if  eliminate_candidates_for_group(group, quads, NakedSubsetType.QUAD, group_type, log):
+                changed = True
+                            
     return changed
 
-def eliminate_candidates_for_group(group: list[Cell], naked_subsets: NakedSubset, elimination_type: NakedSubsetType, group_type: GroupType) -> bool:
+def eliminate_candidates_for_group(group: list[Cell], naked_subsets: NakedSubset, elimination_type: NakedSubsetType, group_type: GroupType, log: StepLogger = NULL_LOGGER) -> bool:
     """
         Eliminate candidates from a group of cells.
     """
     changed = False
     for cells in naked_subsets:
-        eliminations = set().union(*(cell.candidates for cell in cells))
+        eliminations = 0
+        for cell in cells:
+            eliminations |= cell.candidate_mask
         for cell in group:
-            if cell not in cells and eliminations & cell.candidates:
-                log_step(f"Naked {elimination_type} ({group_type.name}): Eliminate candidates {eliminations} from Cell({cell.row}, {cell.col}){{{cell.candidates}}}")
-                changed = cell.eliminate_candidates(eliminations)
+            if cell not in cells and eliminations & cell.candidate_mask:
+                if log.enabled:
+                    log.step(f"Naked {elimination_type} ({group_type.name}): Eliminate candidates {set(MASK_SETS[eliminations])} from Cell({cell.row}, {cell.col}){{{set(cell.candidates)}}}")
+                if cell.eliminate_mask(eliminations):
+                    changed = True
 
     return changed
 
@@ -90,7 +99,8 @@ def find_naked_subsets_for_group(group: list[Cell], n: int) -> list[NakedSubset]
         Returns: list[tuple[Cell]]
     """
     # There must be n cells in a group with n or less candidates
-    possible_subsets = [cell for cell in group if not cell.is_solved and len(cell.candidates) <= n]
+    unsolved = [(cell, cell.candidate_mask) for cell in group if not cell.is_solved]
+    possible_subsets = [(cell, mask) for cell, mask in unsolved if POPCOUNT[mask] <= n]
 
     if len(possible_subsets) < n:
         return []
@@ -98,14 +108,14 @@ def find_naked_subsets_for_group(group: list[Cell], n: int) -> list[NakedSubset]
     # find all subset cell combinations
     subset_combinations = []
     for combination in combinations(possible_subsets, n):
-        union_of_candidates = set()
-        for cell in combination:
-            union_of_candidates |= cell.candidates
-        if len(union_of_candidates) == n:
-            # Ensure only these three cells in the group have these candidates
-            matching_cells = [c for c in group if c.candidates <= union_of_candidates and not c.is_solved]
+        union_of_candidates = 0
+        for _, mask in combination:
+            union_of_candidates |= mask
+        if POPCOUNT[union_of_candidates] == n:
+            # Ensure only these n cells in the group have these candidates
+            matching_cells = [c for c, mask in unsolved if not mask & ~union_of_candidates]
             if len(matching_cells) == n:
-                subset_combinations.append(combination)
+                subset_combinations.append(tuple(cell for cell, _ in combination))
 
     return subset_combinations
     
@@ -1,10 +1,20 @@
 from sudoku import SudokuPuzzle
-from sudoku_logger import log_step
+from sudoku_logger import StepLogger, NULL_LOGGER
 from enums import GroupType
 
-def eliminate_candidate_for_group(puzzle: SudokuPuzzle, r: int, candidate: int, group_type: GroupType):
+def eliminate_candidate_for_group(puzzle: SudokuPuzzle, r: int, candidate: int, group_type: GroupType, log: StepLogger = NULL_LOGGER):
         group = puzzle.group_for_loc(r, group_type)
         for cell in group:
             if candidate in cell.candidates:
                 cell.eliminate_candidate(candidate)
-                log_step(f"Cell ({cell.row}, {cell.col}): Eliminate candidate '{candidate}'")
\ No newline at end of file
+                if log.enabled:
+                    log.step(f"Cell ({cell.row}, {cell.col}): Eliminate candidate '{candidate}'")
+
+
+def eliminate_candidate_for_peers(puzzle: SudokuPuzzle, cell, candidate: int, log: StepLogger = NULL_LOGGER):
+        """
+        Eliminates a candidate from the 20 cells that share a row, column or box with `cell`.
+        """
+        for peer in puzzle.peers[cell.row * 9 + cell.col]:
+            if peer.eliminate_candidate(candidate) and log.enabled:
+                log.step(f"Cell ({peer.row}, {peer.col}): Eliminate candidate '{candidate}'")
@@ -19,4 +19,53 @@ class NakedSubsetType(Enum):
     """Enumeration of naked subset types used in Sudoku solving."""
     PAIR = 1
     TRIPLE = 2
-    QUAD = 3
\ No newline at end of file
+    QUAD = 3
+    HIDDEN_PAIR = 4
+    HIDDEN_TRIPLE = 5
+    HIDDEN_QUAD = 6
+
+class FishType(Enum):
+    """Enumeration of fish sizes used in Sudoku solving."""
+    X_WING = 2
+    SWORDFISH = 3
+    JELLYFISH = 4
+
+class Technique(Enum):
+    """Enumeration of solving steps recorded in a solve trace."""
+    SINGLE = 1
+    HIDDEN_SINGLE = 2
+    LOCKED_CANDIDATES = 3
+    NAKED_PAIR = 4
+    NAKED_TRIPLE = 5
+    NAKED_QUAD = 6
+    GUESS = 7
+    UNDO = 8
+    HIDDEN_PAIR = 9
+    HIDDEN_TRIPLE = 10
+    HIDDEN_QUAD = 11
+    X_WING = 12
+    SWORDFISH = 13
+    JELLYFISH = 14
+    EXACT_COVER = 15
+    SAT = 16
+
+class SolverEngine(Enum):
+    """Enumeration of the search engines SudokuSolver can finish a puzzle with."""
+    LOGIC = 1
+    DLX = 2
+    HYBRID = 3
+
+class SolveStatus(Enum):
+    """Enumeration of the outcomes of a budgeted solve (see `SudokuSolver.solve_report`)."""
+    SOLVED = 1
+    UNSOLVABLE = 2
+    MULTIPLE = 3
+    BUDGET_EXCEEDED = 4
+
+class Difficulty(Enum):
+    """Enumeration of puzzle grades, by the hardest step solving needs (see `generator.grade`)."""
+    EASY = 1
+    MEDIUM = 2
+    HARD = 3
+    EXPERT = 4
+    SEARCH = 5
@@ -0,0 +1,252 @@
+"""
+Generator of puzzles with a unique solution, graded by difficulty.
+
+A puzzle is made in three steps:
+1. A random full grid. The three boxes on the diagonal share no unit, so
+   they are filled with random permutations, and the exact-cover engine
+   completes the grid.
+2. Clues are removed in random order, and a removal is kept only if the
+   puzzle still has exactly one solution. A clue that the other clues force
+   as a naked single can always go. Any other removal is checked with the
+   exact-cover counter, which stops at the second solution.
+3. The puzzle is graded by the hardest step SudokuSolver needed to solve it
+   (see `grade`).
+
+With a target difficulty, a removal that makes the puzzle harder than the
+target is undone, and a puzzle that ends up easier is thrown away. Taking
+away a naked single never changes the grade: it is the first thing the
+solver deduces.
+
+`generate_parallel` spreads the work over worker processes. Each task gets
+its own seed from one SeedSequence, so a run is reproducible for a given
+seed and chunk size.
+
+Usage:
+    python generator.py COUNT -o CORPUS [-j WORKERS] [--difficulty LEVEL] [--seed SEED]
+"""
+from collections import Counter
+from contextlib import nullcontext
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterator
+import argparse
+import os
+import sys
+import time
+
+import numpy.typing as npt
+import numpy as np
+
+from bitmask_puzzle import BitmaskPuzzle
+from sudoku_solver import SudokuSolver
+from solve_profile import SolveProfile
+from dlx import DancingLinks
+from bitmasks import ALL_DIGITS_MASK, DIGIT_MASK
+from units import PEERS, BOXES
+from enums import Difficulty, Technique
+from puzzle_io import format_line, PackedWriter, PACKED_SUFFIX
+
+# Difficulty of the puzzles that need each technique
+TECHNIQUE_DIFFICULTY = {
+    Technique.SINGLE: Difficulty.EASY,
+    Technique.HIDDEN_SINGLE: Difficulty.EASY,
+    Technique.LOCKED_CANDIDATES: Difficulty.MEDIUM,
+    Technique.NAKED_PAIR: Difficulty.HARD,
+    Technique.HIDDEN_PAIR: Difficulty.HARD,
+    Technique.NAKED_TRIPLE: Difficulty.HARD,
+    Technique.HIDDEN_TRIPLE: Difficulty.HARD,
+    Technique.NAKED_QUAD: Difficulty.HARD,
+    Technique.HIDDEN_QUAD: Difficulty.HARD,
+    Technique.X_WING: Difficulty.EXPERT,
+    Technique.SWORDFISH: Difficulty.EXPERT,
+    Technique.JELLYFISH: Difficulty.EXPERT,
+}
+
+
+class PuzzleGenerator:
+    """
+    Makes graded puzzles one at a time.
+
+    Attributes:
+        rng (np.random.Generator): Source of randomness.
+        difficulty (Difficulty | None): Grade every puzzle must have, if set.
+        attempts (int): Puzzles made so far, including those thrown away for
+            missing the target difficulty.
+    """
+
+    def __init__(self, rng: np.random.Generator | None = None, difficulty: Difficulty | None = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.difficulty = difficulty
+        self.attempts = 0
+        self._exact_cover = DancingLinks()
+        self._solver = SudokuSolver(BitmaskPuzzle(np.zeros((9, 9), dtype=np.int8)))
+
+    def generate(self) -> tuple[npt.NDArray[np.int8], Difficulty]:
+        """
+        Makes a puzzle with a unique solution, at the target difficulty if one is set.
+
+        Returns:
+            tuple[np.ndarray, Difficulty]: The 9x9 puzzle and its grade.
+        """
+        while True:
+            self.attempts += 1
+            values = self.remove_clues(self.full_grid())
+            frame = np.array(values, dtype=np.int8).reshape(9, 9)
+            difficulty = grade(frame, self._solver)
+            if self.difficulty is None or difficulty == self.difficulty:
+                return frame, difficulty
+
+    def full_grid(self) -> list[int]:
+        """
+        Makes a random solved grid.
+
+        Returns:
+            list[int]: The 81 values in row-major order.
+        """
+        values = [0] * 81
+        for box in (0, 4, 8):
+            for cell, value in zip(BOXES[box], self.rng.permutation(9).tolist()):
+                values[cell] = value + 1
+        return self._exact_cover.solve(values)
+
+    def remove_clues(self, values: list[int]) -> list[int]:
+        """
+        Removes clues from a solved grid in random order while the solution
+        stays unique and, with a target difficulty, the puzzle no harder than it.
+
+        Args:
+            values (list[int]): 81 values of a solved grid.
+
+        Returns:
+            list[int]: The 81 values of the puzzle, 0 for removed clues.
+        """
+        values = list(values)
+        limit = self.difficulty.value if self.difficulty is not None else None
+        for cell in self.rng.permutation(81).tolist():
+            value = values[cell]
+            values[cell] = 0
+            used = 0
+            for peer in PEERS[cell]:
+                used |= DIGIT_MASK[values[peer]]
+            if used | DIGIT_MASK[value] == ALL_DIGITS_MASK:
+                # still a naked single: the puzzle and its grade are unchanged
+                continue
+            if self._exact_cover.count(values, limit=2) != 1:
+                values[cell] = value
+            elif limit is not None and \
+                    grade(np.array(values, dtype=np.int8).reshape(9, 9), self._solver).value > limit:
+                values[cell] = value
+        return values
+
+
+def grade(frame: npt.NDArray[np.int8], solver: SudokuSolver | None = None) -> Difficulty:
+    """
+    Grades a puzzle by the hardest step SudokuSolver needs to solve it.
+
+    The solver applies its techniques cheapest first and only moves on to a
+    costlier one once the cheaper ones are stuck, so every technique that
+    removes a candidate was needed. A puzzle that needs a guess is SEARCH.
+
+    Args:
+        frame (np.ndarray): 9x9 puzzle with a unique solution.
+        solver (SudokuSolver | None): Solver to reuse; its puzzle is reloaded
+            and its profile replaced.
+
+    Returns:
+        Difficulty: The puzzle's grade.
+    """
+    if solver is None:
+        solver = SudokuSolver(BitmaskPuzzle(frame))
+    else:
+        solver.puzzle.load(frame)
+    solver.profile = SolveProfile()
+    solver.solve()
+    if solver.nodes > 1:
+        return Difficulty.SEARCH
+    needed = [TECHNIQUE_DIFFICULTY.get(technique, Difficulty.SEARCH)
+              for technique, stats in solver.profile.techniques.items() if stats.eliminations]
+    return max(needed, key=lambda difficulty: difficulty.value, default=Difficulty.EASY)
+
+
+def generate_parallel(count: int, workers: int | None = None, difficulty: Difficulty | None = None,
+                      seed: int | None = None,
+                      chunk_size: int = 16) -> Iterator[tuple[npt.NDArray[np.int8], Difficulty]]:
+    """
+    Makes puzzles on a pool of worker processes.
+
+    Args:
+        count (int): Number of puzzles.
+        workers (int | None): Number of worker processes (default: CPU count).
+        difficulty (Difficulty | None): Grade every puzzle must have, if set.
+        seed (int | None): Seed of the whole run (default: fresh entropy).
+        chunk_size (int): Puzzles made per task sent to a worker.
+
+    Yields:
+        tuple[np.ndarray, Difficulty]: Each 9x9 puzzle and its grade, as
+            the chunks complete in order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    sizes = [chunk_size] * (count // chunk_size) + ([count % chunk_size] if count % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = iter(zip(sizes, seeds, [difficulty] * len(sizes)))
+    with Pool(workers) as pool:
+        for puzzles, grades in pool.imap(_generate_chunk, tasks):
+            yield from zip(puzzles, grades)
+
+
+def _generate_chunk(task: tuple[int, np.random.SeedSequence, Difficulty | None]) \
+        -> tuple[npt.NDArray[np.int8], list[Difficulty]]:
+    """Makes one chunk of puzzles in a worker process."""
+    size, seed, difficulty = task
+    generator = PuzzleGenerator(np.random.default_rng(seed), difficulty)
+    made = [generator.generate() for _ in range(size)]
+    return np.stack([frame for frame, _ in made]), [grade for _, grade in made]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate graded sudoku puzzles with a unique solution")
+    parser.add_argument("count", type=int, help="number of puzzles to generate")
+    parser.add_argument("-o", "--output", type=Path,
+                        help=f"write the puzzles to this file instead of stdout (packed binary if the "
+                             f"name ends in {PACKED_SUFFIX})")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="puzzles generated per worker task")
+    parser.add_argument("--difficulty", choices=[difficulty.name.lower() for difficulty in Difficulty],
+                        help="only keep puzzles of this grade")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible run")
+    args = parser.parse_args()
+
+    difficulty = Difficulty[args.difficulty.upper()] if args.difficulty else None
+    if args.workers == 1:
+        generator = PuzzleGenerator(np.random.default_rng(args.seed), difficulty)
+        puzzles = (generator.generate() for _ in range(args.count))
+    else:
+        puzzles = generate_parallel(args.count, args.workers or None, difficulty, args.seed, args.chunk_size)
+
+    if args.output is None:
+        output = nullcontext(sys.stdout)
+    elif args.output.suffix == PACKED_SUFFIX:
+        output = PackedWriter(args.output)
+    else:
+        output = open(args.output, "w")
+    grades = Counter()
+    start = time.perf_counter()
+    with output as output:
+        for frame, difficulty in puzzles:
+            if isinstance(output, PackedWriter):
+                output.write(frame)
+            else:
+                output.write(format_line(frame) + "\n")
+            grades[difficulty] += 1
+    elapsed = time.perf_counter() - start
+    count = sum(grades.values())
+    print(f"Generated {count} puzzles in {elapsed:.2f}s ({count / elapsed:.1f} puzzles/sec)", file=sys.stderr)
+    print(", ".join(f"{difficulty.name.lower()}: {grades[difficulty]}" for difficulty in Difficulty
+                    if grades[difficulty]), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,227 @@
 from pathlib import Path
+from contextlib import nullcontext
+import argparse
+import json
+import sys
+import time
 import numpy as np
 
 from sudoku import SudokuPuzzle
+from bitmask_puzzle import BitmaskPuzzle
 from sudoku_solver import SudokuSolver
+from sudoku_logger import StepLogger
+from solve_trace import TraceRecorder
+from solve_profile import SolveProfile
+from solution_cache import SolutionCache
+from solve_budget import SolveBudget
+from scheduler import TechniqueScheduler, COUNTING_TECHNIQUES
+from enums import SolverEngine
+from puzzle_io import read_puzzles, format_line, PackedWriter, PACKED_SUFFIX
 
 from pprint import pprint
 
-def  read_file(path: Path):
-    rows = []
-    with open(path, "r") as file:
-        for line in file:
-            rows.append(line.strip().split(","))
-    return rows
 
-def convert_to_np_array(l_puzzle):
-    arr = np.array(l_puzzle, dtype=object)
-    arr[arr == ''] = 0
-    return arr.astype(np.int8)
+def solve_file(path: Path, output, workers: int = 1, chunk_size: int = 256, vectorized: bool = False,
+               profile: SolveProfile | None = None, scheduler: TechniqueScheduler | None = None,
+               engine: SolverEngine = SolverEngine.LOGIC, sat_threshold: int | None = None,
+               cache: SolutionCache | None = None, budget: SolveBudget | None = None) -> int:
+    """
+    Streams every puzzle in a file through the solver and writes each final
+    grid to `output` in input order, in the 81-character line format or, if
+    `output` is a PackedWriter, in the packed binary format.
 
+    Args:
+        path (Path): Puzzle file in any format read by `read_puzzles`.
+        output (TextIO | PackedWriter): Stream to write solutions to.
+        workers (int): Number of worker processes; 1 solves in this process.
+        chunk_size (int): Number of puzzles sent to a worker at a time.
+        vectorized (bool): Propagate puzzles in NumPy batches before searching the leftovers.
+        profile (SolveProfile | None): Accumulates solver counters over the whole file, if set.
+        scheduler (TechniqueScheduler | None): Technique order (default: cheapest first).
+        engine (SolverEngine): Search engine that finishes the puzzles.
+        sat_threshold (int | None): Search nodes after which a puzzle is handed to the SAT solver.
+        cache (SolutionCache | None): Answers repeats of puzzles already solved, if set.
+        budget (SolveBudget | None): Limits of each solve; a puzzle that runs out
+            is written as far as it was proved.
+
+    Returns:
+        int: Number of puzzles solved.
+    """
+    if workers == 1:
+        solver = SudokuSolver(BitmaskPuzzle(np.zeros((9, 9), dtype=np.int8)), profile=profile,
+                              scheduler=scheduler, engine=engine, sat_threshold=sat_threshold, cache=cache,
+                              budget=budget)
+        if vectorized:
+            solutions = solver.solve_batch_vectorized(read_puzzles(path))
+        else:
+            solutions = solver.solve_batch(read_puzzles(path))
+    else:
+        solutions = SudokuSolver.solve_parallel(read_puzzles(path), workers or None, chunk_size,
+                                                vectorized, profile, scheduler, engine,
+                                                sat_threshold, cache, budget)
+    count = 0
+    if isinstance(output, PackedWriter):
+        for frame in solutions:
+            output.write(frame)
+            count += 1
+        return count
+    for frame in solutions:
+        output.write(format_line(frame) + "\n")
+        count += 1
+    return count
+
+
+def count_file(path: Path, output, limit: int = 2, vectorized: bool = False,
+               profile: SolveProfile | None = None, scheduler: TechniqueScheduler | None = None,
+               engine: SolverEngine = SolverEngine.LOGIC) -> int:
+    """
+    Counts the solutions of every puzzle in a file, up to `limit`, and writes
+    one count per line to `output`, in input order.
+
+    Args:
+        path (Path): Puzzle file in any format read by `read_puzzles`.
+        output (TextIO): Stream to write the counts to.
+        limit (int): Number of solutions after which to stop counting a puzzle.
+        vectorized (bool): Propagate puzzles in NumPy batches before searching the leftovers.
+        profile (SolveProfile | None): Accumulates solver counters over the whole file, if set.
+        scheduler (TechniqueScheduler | None): Technique order (default: COUNTING_TECHNIQUES).
+        engine (SolverEngine): Search engine that counts the solutions.
+
+    Returns:
+        int: Number of puzzles checked.
+    """
+    scheduler = scheduler or TechniqueScheduler(COUNTING_TECHNIQUES)
+    solver = SudokuSolver(BitmaskPuzzle(np.zeros((9, 9), dtype=np.int8)), profile=profile,
+                          scheduler=scheduler, engine=engine)
+    if vectorized:
+        counts = solver.count_solutions_batch_vectorized(read_puzzles(path), limit)
+    else:
+        counts = solver.count_solutions_batch(read_puzzles(path), limit)
+    count = 0
+    for solutions in counts:
+        output.write(f"{solutions}\n")
+        count += 1
+    return count
 
 
 def main():
     project_root = Path(__file__).resolve().parent.parent
     puzzle_path = project_root / "puzzles"
-    #sudoku01 = puzzle_path / "sudoku01.txt"
-    sudoku01 = puzzle_path / "hard-sudoku04.txt" # hard-sudoku03.txt cannot be solved with singles and locked singles alone
-    puzzle = read_file(sudoku01)
-    np_puzzle = convert_to_np_array(puzzle)
-    sudoku_puzzle = SudokuPuzzle(np_puzzle)
-    sudoku_solver = SudokuSolver(sudoku_puzzle)
-    sudoku_solver.solve()
+    parser = argparse.ArgumentParser(description="Solve sudoku puzzles")
+    parser.add_argument("puzzle_file", nargs="?", type=Path,
+                        default=puzzle_path / "hard-sudoku04.txt", # hard-sudoku03.txt cannot be solved with singles and locked singles alone
+                        help="puzzle file (81-character lines, 9-line CSV grids or packed binary)")
+    parser.add_argument("--batch", action="store_true",
+                        help="solve every puzzle in the file and stream solutions as 81-character lines")
+    parser.add_argument("-o", "--output", type=Path,
+                        help=f"write batch solutions to this file instead of stdout (packed binary if the "
+                             f"name ends in {PACKED_SUFFIX})")
+    parser.add_argument("--trace", type=Path,
+                        help="save a replayable solve trace (JSON lines if the name ends in .jsonl, else binary)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes for --batch (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=256,
+                        help="puzzles sent to a worker at a time with --workers")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="with --batch, propagate puzzles as NumPy arrays and search only the leftovers")
+    parser.add_argument("--count", type=int, nargs="?", const=2, metavar="LIMIT",
+                        help="with --batch, write each puzzle's number of solutions (up to LIMIT, "
+                             "default 2) instead of its solution")
+    parser.add_argument("--engine", choices=[engine.name.lower() for engine in SolverEngine], default="logic",
+                        help="finish puzzles by branching (logic), with Dancing Links exact cover (dlx), "
+                             "or with exact cover after one round of propagation (hybrid)")
+    parser.add_argument("--sat-threshold", type=int, metavar="NODES",
+                        help="with the logic engine, hand a puzzle to the CDCL SAT solver once its "
+                             "search passes this many nodes")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS",
+                        help="give up on a puzzle after this long and keep what was proved so far")
+    parser.add_argument("--node-limit", type=int, metavar="NODES",
+                        help="give up on a puzzle after this many search nodes")
+    parser.add_argument("--cache", type=int, nargs="?", const=4096, metavar="SIZE",
+                        help="with --batch, answer repeats of solved puzzles, up to symmetry, from an LRU "
+                             "cache of SIZE puzzles (default 4096)")
+    parser.add_argument("--cache-dir", type=Path,
+                        help="with --batch, also keep cached solutions in this directory across runs")
+    parser.add_argument("--cnf", type=Path,
+                        help="write the puzzle, propagated, as DIMACS CNF to this file instead of solving it")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-technique and search counters (aggregated over the batch with --batch)")
+    parser.add_argument("--save-profile", type=Path, help="with --profile, also save the counters as JSON")
+    parser.add_argument("--schedule", type=Path,
+                        help="order techniques by their cost per elimination in a profile saved with "
+                             "--save-profile, skipping those that removed nothing")
+    args = parser.parse_args()
+
+    profile = SolveProfile() if args.profile or args.save_profile else None
+    engine = SolverEngine[args.engine.upper()]
+    scheduler = None
+    if args.schedule:
+        learned = SolveProfile.from_dict(json.loads(args.schedule.read_text()))
+        scheduler = TechniqueScheduler.from_profile(learned, skip_unproductive=True)
+    if args.count is not None and args.workers != 1:
+        parser.error("--count runs in a single process; drop --workers")
+    if args.count is not None:
+        # a count cut short by a budget would be written as if it were exact,
+        # and neither the SAT solver nor the cache can count solutions
+        ignored = [option for option, value in (("--time-limit", args.time_limit),
+                                                ("--node-limit", args.node_limit),
+                                                ("--sat-threshold", args.sat_threshold),
+                                                ("--cache", args.cache), ("--cache-dir", args.cache_dir))
+                   if value is not None]
+        if ignored:
+            parser.error(f"--count does not support {', '.join(ignored)}")
+    budget = None
+    if args.time_limit is not None or args.node_limit is not None:
+        budget = SolveBudget(args.time_limit, args.node_limit)
+    cache = None
+    if args.cache is not None or args.cache_dir:
+        cache = SolutionCache(args.cache or 4096, args.cache_dir)
+    if args.batch:
+        start = time.perf_counter()
+        if args.output is None:
+            output = nullcontext(sys.stdout)
+        elif args.output.suffix == PACKED_SUFFIX and args.count is None:
+            output = PackedWriter(args.output)
+        else:
+            output = open(args.output, "w")
+        with output as output:
+            if args.count is not None:
+                count = count_file(args.puzzle_file, output, args.count, args.vectorized, profile, scheduler, engine)
+            else:
+                count = solve_file(args.puzzle_file, output, args.workers, args.chunk_size, args.vectorized,
+                                   profile, scheduler, engine, args.sat_threshold, cache, budget)
+        elapsed = time.perf_counter() - start
+        print(f"{'Checked' if args.count is not None else 'Solved'} {count} puzzles in {elapsed:.2f}s ({count / elapsed:.1f} puzzles/sec)", file=sys.stderr)
+        if cache is not None and args.workers == 1:
+            print(f"Cache: {cache.hits} hits ({cache.disk_hits} from disk), {cache.misses} misses", file=sys.stderr)
+        if profile is not None:
+            print(profile, file=sys.stderr)
+            if args.save_profile:
+                args.save_profile.write_text(json.dumps(profile.to_dict(), indent=2) + "\n")
+        return
+
+    sudoku_puzzle = SudokuPuzzle(next(read_puzzles(args.puzzle_file)))
+    if args.cnf:
+        formula = SudokuSolver(sudoku_puzzle, scheduler=scheduler).to_cnf()
+        args.cnf.write_text(formula.to_dimacs())
+        print(f"Wrote {formula.num_vars} variables and {len(formula.clauses)} clauses to {args.cnf}")
+        return
+    recorder = TraceRecorder() if args.trace else None
+    with StepLogger.to_file("sudoku_steps.log") as log:
+        sudoku_solver = SudokuSolver(sudoku_puzzle, log, recorder, profile, scheduler, engine, args.sat_threshold,
+                                     budget=budget)
+        result = sudoku_solver.solve_report()
+    if budget is not None:
+        print(f"{result.status.name.lower().replace('_', ' ')} after {result.nodes} nodes in {result.seconds:.3f}s")
+    if profile is not None:
+        print(profile)
+        if args.save_profile:
+            args.save_profile.write_text(json.dumps(profile.to_dict(), indent=2) + "\n")
+    if recorder is not None:
+        if args.trace.suffix == ".jsonl":
+            recorder.save_jsonl(args.trace)
+        else:
+            recorder.save(args.trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+Work queue for incremental constraint propagation.
+
+While a PropagationQueue is attached to a puzzle, every value assignment and
+candidate elimination reports the changed cell to it. The queue remembers
+which units (see `units.UNITS`) have changed since the techniques last looked
+at them and which cells are down to a single candidate, so the solver only
+re-checks the parts of the grid that a change can affect.
+"""
+from units import CELL_UNITS
+
+
+class PropagationQueue:
+    """
+    Changed units and pending singles of a puzzle.
+
+    Attributes:
+        singles (list[int]): Indices of cells left with one candidate (or none)
+            since the solver last resolved singles. Cells may repeat or have been
+            solved in the meantime.
+        eliminations (int): Running count of candidates removed while attached.
+    """
+    __slots__ = ("singles", "eliminations", "_units", "_queued")
+
+    def __init__(self):
+        self.singles = []
+        self.eliminations = 0
+        self._units = []
+        self._queued = bytearray(27)
+
+    def fill(self, puzzle):
+        """
+        Queues every unit and every single of a freshly loaded puzzle.
+
+        Args:
+            puzzle (SudokuPuzzle): Puzzle the queue is attached to.
+        """
+        self._units = list(range(27))
+        self._queued = bytearray(b"\x01" * 27)
+        self.singles = [
+            i for i, cell in enumerate(puzzle.cells)
+            if not cell.is_solved and len(cell.candidates) <= 1
+        ]
+
+    def clear(self):
+        """Discards all queued work, e.g. after rolling the puzzle back to a settled state."""
+        self.singles.clear()
+        self._units.clear()
+        self._queued = bytearray(27)
+
+    def assigned(self, index: int):
+        """Records that the cell at `index` was given a value."""
+        queued = self._queued
+        for unit in CELL_UNITS[index]:
+            if not queued[unit]:
+                queued[unit] = 1
+                self._units.append(unit)
+
+    def eliminated(self, index: int, removed: int, remaining: int):
+        """
+        Records that candidates were removed from the cell at `index`.
+
+        Args:
+            index (int): Flat cell index (0-80).
+            removed (int): Number of candidates removed.
+            remaining (int): Number of candidates the cell has left.
+        """
+        self.eliminations += removed
+        queued = self._queued
+        for unit in CELL_UNITS[index]:
+            if not queued[unit]:
+                queued[unit] = 1
+                self._units.append(unit)
+        if remaining <= 1:
+            self.singles.append(index)
+
+    def take_units(self) -> list[int]:
+        """
+        Returns the units changed since the last call and empties that part of the queue.
+
+        Returns:
+            list[int]: Unit numbers, in the order they first changed.
+        """
+        units = self._units
+        self._units = []
+        queued = self._queued
+        for unit in units:
+            queued[unit] = 0
+        return units
+
+    def __bool__(self) -> bool:
+        return bool(self.singles or self._units)
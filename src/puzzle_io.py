@@ -0,0 +1,345 @@
+"""
+Reading and writing puzzle files.
+
+Text files hold one puzzle per 81-character line, or 9-line CSV grids. For
+large corpora there is also a packed binary format: a 16-byte header, then
+every puzzle as a fixed-size record in row-major order, either
+- 81 bytes, one cell value per byte, which can be memory-mapped and handed
+  to the solver as zero-copy views; or
+- 41 bytes, two cells per byte (low nibble first), half the size but
+  decoded a chunk at a time.
+`read_puzzles` accepts both kinds of file, telling them apart by the header.
+
+Usage (converts between the formats; OUTPUT is packed if it ends in .sdk):
+    python puzzle_io.py INPUT OUTPUT [--nibbles]
+"""
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+import argparse
+import struct
+
+import numpy.typing as npt
+import numpy as np
+
+# Characters accepted for an empty cell in the 81-character line format
+EMPTY_CHARS = ".0"
+_EMPTY_TO_ZERO = str.maketrans({char: "0" for char in EMPTY_CHARS})
+
+PACKED_MAGIC = b"SDKP"
+PACKED_VERSION = 1
+PACKED_SUFFIX = ".sdk"
+# magic, version, record size (81 or 41 bytes), puzzle count
+PACKED_HEADER = struct.Struct("<4sBB2xQ")
+BYTE_RECORD = 81
+NIBBLE_RECORD = 41
+
+
+def parse_line(line: str) -> npt.NDArray[np.int8]:
+    """
+    Parses a puzzle in the 81-character line format, e.g. "8.9..1...".
+
+    Args:
+        line (str): 81 characters in row-major order; digits 1-9 are clues and
+                    '.' or '0' mark empty cells.
+
+    Returns:
+        np.ndarray: 9x9 int8 array (0 for empty cells).
+
+    Raises:
+        ValueError: If the line does not describe 81 cells.
+    """
+    if len(line) != 81:
+        raise ValueError(f"Expected 81 characters, got {len(line)}")
+    digits = line.translate(_EMPTY_TO_ZERO)
+    if not digits.isdigit():
+        raise ValueError(f"Invalid puzzle line: {line!r}")
+    return (np.frombuffer(digits.encode("ascii"), dtype=np.uint8) - ord("0")).astype(np.int8).reshape(9, 9)
+
+
+def parse_csv_rows(rows: list[str]) -> npt.NDArray[np.int8]:
+    """
+    Parses a puzzle in the 9-line comma-separated format used by `puzzles/`.
+
+    Args:
+        rows (list[str]): 9 lines of 9 comma-separated values; empty values are empty cells.
+
+    Returns:
+        np.ndarray: 9x9 int8 array (0 for empty cells).
+
+    Raises:
+        ValueError: If the rows do not describe a 9x9 grid.
+    """
+    grid = [[int(val) if val.strip() else 0 for val in row.split(",")] for row in rows]
+    if len(grid) != 9 or any(len(row) != 9 for row in grid):
+        raise ValueError("Sudoku grid must be 9x9")
+    return np.array(grid, dtype=np.int8)
+
+
+def iter_puzzles(file: TextIO) -> Iterator[npt.NDArray[np.int8]]:
+    """
+    Streams puzzles from an open text file, one 9x9 array at a time.
+
+    Lines with 81 characters are read as one puzzle each; lines containing
+    commas are collected in groups of 9 as a CSV grid. Both formats may be
+    mixed in one file. Blank lines and lines starting with '#' are skipped.
+
+    Args:
+        file (TextIO): File to read from.
+
+    Yields:
+        np.ndarray: 9x9 int8 array for each puzzle.
+    """
+    csv_rows = []
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "," in line:
+            csv_rows.append(line)
+            if len(csv_rows) == 9:
+                yield parse_csv_rows(csv_rows)
+                csv_rows = []
+        else:
+            yield parse_line(line)
+    if csv_rows:
+        raise ValueError(f"Incomplete CSV grid at end of file ({len(csv_rows)} rows)")
+
+
+def read_puzzles(path: Path) -> Iterator[npt.NDArray[np.int8]]:
+    """
+    Streams puzzles from a file without loading it into memory.
+
+    Args:
+        path (Path): File in the 81-character line format, the CSV grid format
+            or the packed binary format.
+
+    Yields:
+        np.ndarray: 9x9 int8 array for each puzzle.
+    """
+    if is_packed(path):
+        yield from read_packed(path)
+        return
+    with open(path, "r") as file:
+        yield from iter_puzzles(file)
+
+
+def format_line(frame: npt.NDArray[np.int8]) -> str:
+    """
+    Formats a puzzle state in the 81-character line format.
+
+    Args:
+        frame (np.ndarray): 9x9 array of values (0 if unsolved).
+
+    Returns:
+        str: 81 characters, with '.' for unsolved cells.
+    """
+    return (frame.reshape(81).astype(np.uint8) + ord("0")).tobytes().decode("ascii").replace("0", ".")
+
+
+def is_packed(path: Path) -> bool:
+    """Returns True if the file starts with the packed format's header."""
+    with open(path, "rb") as file:
+        return file.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+
+
+def map_packed(path: Path) -> npt.NDArray[np.int8]:
+    """
+    Memory-maps a packed puzzle file.
+
+    Args:
+        path (Path): File written by `PackedWriter`.
+
+    Returns:
+        np.ndarray: With 81-byte records, an (n, 9, 9) int8 array of every
+            puzzle that is a read-only view of the mapped file, so slicing it
+            copies nothing. With 41-byte records, the raw (n, 41) uint8
+            records, mapped the same way; decode them with `unpack_nibbles`.
+
+    Raises:
+        ValueError: If the file is not a packed puzzle file or is truncated.
+    """
+    with open(path, "rb") as file:
+        header = file.read(PACKED_HEADER.size)
+        file.seek(0, 2)
+        size = file.tell()
+    if len(header) < PACKED_HEADER.size:
+        raise ValueError(f"Not a packed puzzle file: {path}")
+    magic, version, record, count = PACKED_HEADER.unpack(header)
+    if magic != PACKED_MAGIC:
+        raise ValueError(f"Not a packed puzzle file: {path}")
+    if version != PACKED_VERSION:
+        raise ValueError(f"Unsupported packed puzzle version: {version}")
+    if record not in (BYTE_RECORD, NIBBLE_RECORD):
+        raise ValueError(f"Unsupported packed record size: {record}")
+    if size < PACKED_HEADER.size + count * record:
+        raise ValueError(f"Packed puzzle file is truncated: {count} puzzles announced in {size} bytes")
+    shape, dtype = ((count, 9, 9), np.int8) if record == BYTE_RECORD else ((count, NIBBLE_RECORD), np.uint8)
+    if count == 0:
+        # an empty file region cannot be mapped
+        return np.zeros(shape, dtype=dtype)
+    # a plain ndarray view of the map: indexing np.memmap itself is much slower
+    return np.memmap(path, dtype=dtype, mode="r", offset=PACKED_HEADER.size, shape=shape).view(np.ndarray)
+
+
+def read_packed(path: Path, chunk_size: int = 4096) -> Iterator[npt.NDArray[np.int8]]:
+    """
+    Streams the puzzles of a packed file.
+
+    Args:
+        path (Path): File written by `PackedWriter`.
+        chunk_size (int): Number of 41-byte records decoded at a time.
+
+    Yields:
+        np.ndarray: 9x9 int8 array for each puzzle; a view of the mapped file
+            with 81-byte records.
+    """
+    puzzles = map_packed(path)
+    if puzzles.ndim == 3:
+        yield from puzzles
+        return
+    for start in range(0, len(puzzles), chunk_size):
+        yield from unpack_nibbles(puzzles[start:start + chunk_size])
+
+
+def pack_nibbles(frames: npt.NDArray[np.int8]) -> npt.NDArray[np.uint8]:
+    """
+    Packs puzzles two cells per byte.
+
+    Args:
+        frames (np.ndarray): (n, 9, 9) int8 array.
+
+    Returns:
+        np.ndarray: (n, 41) uint8 records; cell 2k is the low nibble of byte k.
+    """
+    cells = np.zeros((len(frames), 2 * NIBBLE_RECORD), dtype=np.uint8)
+    cells[:, :81] = frames.reshape(-1, 81)
+    return cells[:, 0::2] | (cells[:, 1::2] << 4)
+
+
+def unpack_nibbles(records: npt.NDArray[np.uint8]) -> npt.NDArray[np.int8]:
+    """
+    Decodes records written by `pack_nibbles`.
+
+    Args:
+        records (np.ndarray): (n, 41) uint8 array.
+
+    Returns:
+        np.ndarray: (n, 9, 9) int8 array.
+    """
+    cells = np.empty((len(records), 2 * NIBBLE_RECORD), dtype=np.int8)
+    cells[:, 0::2] = records & 0xF
+    cells[:, 1::2] = records >> 4
+    return cells[:, :81].reshape(-1, 9, 9)
+
+
+class PackedWriter:
+    """
+    Writes puzzles to a file in the packed binary format.
+
+    The puzzle count in the header is filled in by `close`, so puzzles can be
+    streamed in without knowing how many there will be. Use it as a context
+    manager.
+
+    Attributes:
+        count (int): Puzzles written so far.
+    """
+    FLUSH_BYTES = 1 << 20
+
+    def __init__(self, path: Path, nibbles: bool = False):
+        """
+        Args:
+            path (Path): File to create.
+            nibbles (bool): Write 41-byte nibble-packed records instead of 81-byte ones.
+        """
+        self._file = open(path, "wb")
+        self._record = NIBBLE_RECORD if nibbles else BYTE_RECORD
+        self._pending = []
+        self._pending_bytes = 0
+        self.count = 0
+        self._file.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, self._record, 0))
+
+    def write(self, frames: npt.NDArray[np.int8]):
+        """
+        Adds one 9x9 puzzle or an (n, 9, 9) array of them.
+
+        Raises:
+            ValueError: If a cell value is not between 0 and 9.
+        """
+        frames = np.asarray(frames, dtype=np.int8).reshape(-1, 9, 9)
+        if frames.size and (frames.min() < 0 or frames.max() > 9):
+            raise ValueError("Cell values must be between 0 and 9")
+        data = (pack_nibbles(frames) if self._record == NIBBLE_RECORD else frames).tobytes()
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        self.count += len(frames)
+        if self._pending_bytes >= self.FLUSH_BYTES:
+            self._flush()
+
+    def _flush(self):
+        self._file.write(b"".join(self._pending))
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def close(self):
+        """Writes the buffered puzzles and the final count, and closes the file."""
+        if self._file.closed:
+            return
+        self._flush()
+        self._file.seek(0)
+        self._file.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, self._record, self.count))
+        self._file.close()
+
+    def __enter__(self) -> "PackedWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_packed(path: Path, frames: Iterable[npt.NDArray[np.int8]], nibbles: bool = False,
+                 chunk_size: int = 4096) -> int:
+    """
+    Writes a stream of puzzles to a packed file.
+
+    Args:
+        path (Path): File to create.
+        frames (Iterable[np.ndarray]): 9x9 int8 arrays.
+        nibbles (bool): Write 41-byte nibble-packed records instead of 81-byte ones.
+        chunk_size (int): Number of puzzles encoded at a time.
+
+    Returns:
+        int: Number of puzzles written.
+    """
+    with PackedWriter(path, nibbles) as writer:
+        chunk = []
+        for frame in frames:
+            chunk.append(frame)
+            if len(chunk) == chunk_size:
+                writer.write(np.stack(chunk))
+                chunk.clear()
+        if chunk:
+            writer.write(np.stack(chunk))
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert puzzle files between the text and packed formats")
+    parser.add_argument("input", type=Path, help="text or packed puzzle file")
+    parser.add_argument("output", type=Path,
+                        help=f"file to write; packed if the name ends in {PACKED_SUFFIX}, else 81-character lines")
+    parser.add_argument("--nibbles", action="store_true", help="pack two cells per byte (41 bytes per puzzle)")
+    args = parser.parse_args()
+
+    if args.output.suffix == PACKED_SUFFIX:
+        count = write_packed(args.output, read_puzzles(args.input), args.nibbles)
+    else:
+        count = 0
+        with open(args.output, "w") as output:
+            for frame in read_puzzles(args.input):
+                output.write(format_line(frame) + "\n")
+                count += 1
+    print(f"Wrote {count} puzzles to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
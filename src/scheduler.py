@@ -0,0 +1,105 @@
+"""
+Order in which SudokuSolver tries its elimination techniques.
+
+Singles are always resolved first. The techniques after them are tried
+cheapest first: as soon as one removes a candidate the solver goes back to
+singles and the cheapest technique, and a costlier technique only runs once
+every cheaper one has nothing left to do. A TechniqueScheduler can be built
+from a SolveProfile of an earlier run so the order follows what each
+technique actually cost per candidate removed on that corpus.
+"""
+from functools import partial
+
+from enums import Technique
+from solve_profile import SolveProfile
+from eliminations.locked_candidates import eliminate_locked_candidates
+from eliminations.hidden_singles import eliminate_hidden_singles
+from eliminations.naked_subsets import eliminate_naked_pairs, eliminate_naked_triples, eliminate_naked_quads
+from eliminations.hidden_subsets import eliminate_hidden_pairs, eliminate_hidden_triples, eliminate_hidden_quads
+from eliminations.fish import eliminate_x_wings, eliminate_swordfish, eliminate_jellyfish
+
+# Techniques applied by `SudokuSolver.propagate` after singles, cheapest first
+TECHNIQUES = (
+    (Technique.HIDDEN_SINGLE, "Find and Eliminate Hidden Singles", eliminate_hidden_singles),
+    (Technique.LOCKED_CANDIDATES, "Find and Eliminate Locked Candidates", eliminate_locked_candidates),
+    (Technique.NAKED_PAIR, "Find and Eliminate Naked Pairs", eliminate_naked_pairs),
+    (Technique.HIDDEN_PAIR, "Find and Eliminate Hidden Pairs", eliminate_hidden_pairs),
+    (Technique.NAKED_TRIPLE, "Find and Eliminate Naked Triples", eliminate_naked_triples),
+    (Technique.HIDDEN_TRIPLE, "Find and Eliminate Hidden Triples", eliminate_hidden_triples),
+    (Technique.NAKED_QUAD, "Find and Eliminate Naked Quads", eliminate_naked_quads),
+    (Technique.HIDDEN_QUAD, "Find and Eliminate Hidden Quads", eliminate_hidden_quads),
+    (Technique.X_WING, "Find and Eliminate X-Wings", eliminate_x_wings),
+    (Technique.SWORDFISH, "Find and Eliminate Swordfish", eliminate_swordfish),
+    (Technique.JELLYFISH, "Find and Eliminate Jellyfish", eliminate_jellyfish),
+)
+
+# Techniques used to count solutions. Counting visits every branch of the
+# search rather than stopping at the first solution, so cheap nodes pay off
+# more than fewer nodes: with hidden singles alone the search visits a few
+# more nodes but counts several times faster than with the whole table.
+COUNTING_TECHNIQUES = TECHNIQUES[:1]
+
+# Techniques that skip the units where everything they could find is also
+# found by the techniques listed, and the techniques they rely on for it.
+# A scheduler without all of those makes them search every unit.
+COMPLEMENTS = {
+    Technique.HIDDEN_PAIR: frozenset({Technique.NAKED_PAIR}),
+    Technique.HIDDEN_TRIPLE: frozenset({Technique.NAKED_PAIR, Technique.NAKED_TRIPLE}),
+    Technique.HIDDEN_QUAD: frozenset({Technique.NAKED_PAIR, Technique.NAKED_TRIPLE, Technique.NAKED_QUAD}),
+    Technique.X_WING: frozenset({Technique.HIDDEN_SINGLE}),
+    Technique.SWORDFISH: frozenset({Technique.HIDDEN_SINGLE, Technique.X_WING}),
+    Technique.JELLYFISH: frozenset({Technique.HIDDEN_SINGLE, Technique.X_WING, Technique.SWORDFISH}),
+}
+
+
+class TechniqueScheduler:
+    """
+    The techniques a solver uses, in the order it escalates through them.
+
+    A technique listed in `COMPLEMENTS` whose complementary techniques are
+    not all scheduled too is called with `skip_complements=False`, so leaving
+    techniques out never hides what the others would find.
+
+    Attributes:
+        techniques (tuple): (Technique, log description, eliminate function) entries,
+            cheapest first.
+    """
+
+    def __init__(self, techniques=TECHNIQUES):
+        techniques = tuple(techniques)
+        scheduled = {technique for technique, _, _ in techniques}
+        self.techniques = tuple(
+            (technique, description, partial(eliminate, skip_complements=False))
+            if not COMPLEMENTS.get(technique, scheduled) <= scheduled else (technique, description, eliminate)
+            for technique, description, eliminate in techniques)
+
+    @classmethod
+    def from_profile(cls, profile: SolveProfile, skip_unproductive: bool = False) -> "TechniqueScheduler":
+        """
+        Orders the techniques by the time they took per candidate removed in a profile.
+
+        Techniques that removed nothing go last, in their default order, or are
+        left out if `skip_unproductive` is set. Leaving a technique out never
+        makes a puzzle unsolvable, since the search finishes whatever the
+        techniques do not, but it can make the search larger.
+
+        Args:
+            profile (SolveProfile): Counters from solving a representative corpus.
+            skip_unproductive (bool): Drop techniques that removed no candidates.
+
+        Returns:
+            TechniqueScheduler: Scheduler with the learned order.
+        """
+        def cost(entry):
+            stats = profile.techniques.get(entry[0])
+            if stats is None or not stats.eliminations:
+                return float("inf")
+            return stats.seconds / stats.eliminations
+
+        techniques = sorted(TECHNIQUES, key=cost)  # stable, so ties keep the default order
+        if skip_unproductive:
+            techniques = [entry for entry in techniques if cost(entry) != float("inf")]
+        return cls(techniques)
+
+    def __repr__(self) -> str:
+        return f"TechniqueScheduler({', '.join(technique.name for technique, _, _ in self.techniques)})"
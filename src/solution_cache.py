@@ -0,0 +1,180 @@
+"""
+Content-addressed cache of solved puzzles.
+
+A repeat of a cached puzzle is found even when it arrives with its digits
+relabelled, or rotated, transposed, or with bands and stacks shuffled: two
+puzzles match when they have the same canonical form (see `canonical`). A
+cached solution is mapped onto the canonical form through the transform of
+its own puzzle, and back to the incoming puzzle through the inverse of the
+incoming puzzle's transform.
+
+Canonical forms are costly next to an easy solve, so they are only computed
+when they can pay off. Entries are filed under their cheap invariant
+`signature`, and a lookup whose signature matches no entry is a miss right
+away. Only a signature match computes the forms of the incoming puzzle and
+of the entries it has to be told apart from. Exact repeats are found by
+their raw cells without any of this.
+
+Entries live in a bounded in-memory LRU. An optional directory also keeps
+every solution on disk, so the cache survives restarts and can be shared by
+the workers of a batch. A file holds the 81 canonical cells of a solution.
+It is named by the hash of the canonical form, inside a folder named by the
+signature. Disk stores therefore always pay for the canonical form.
+"""
+from collections import OrderedDict
+from hashlib import blake2b
+from pathlib import Path
+import os
+
+import numpy.typing as npt
+import numpy as np
+
+from canonical import Transform, canonical_form, signature
+
+
+class _Entry:
+    """A cached puzzle: its solution in its own coordinates, and its canonical key once computed."""
+    __slots__ = ("solution", "signature", "key", "transform")
+
+    def __init__(self, solution: bytes, signature: bytes):
+        self.solution = solution
+        self.signature = signature
+        self.key = None
+        self.transform = None
+
+
+class SolutionCache:
+    """
+    LRU cache of solutions, matched by canonical puzzle form.
+
+    Attributes:
+        capacity (int): Number of puzzles kept in memory.
+        directory (Path | None): Directory of the on-disk tier, if any.
+        hits (int): Lookups answered from memory or disk.
+        disk_hits (int): Lookups answered from disk.
+        misses (int): Lookups that found nothing.
+    """
+
+    def __init__(self, capacity: int = 4096, directory: Path | None = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        # raw puzzle cells -> entry, least recently used first
+        self._entries = OrderedDict()
+        # signature -> raw cells of the entries that have it
+        self._by_signature = {}
+        # raw cells and signature of the last miss, which is usually put next
+        self._missed = (None, None)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, frame: npt.NDArray[np.int8]) -> npt.NDArray[np.int8] | None:
+        """
+        Looks a puzzle up.
+
+        Args:
+            frame (np.ndarray): 9x9 int8 puzzle (0 for empty cells).
+
+        Returns:
+            np.ndarray | None: The 9x9 solution in the puzzle's own coordinates,
+                or None if no equivalent puzzle is cached.
+        """
+        raw = frame.tobytes()
+        entry = self._entries.get(raw)
+        if entry is not None:
+            self._entries.move_to_end(raw)
+            self.hits += 1
+            return _frame(entry.solution)
+
+        puzzle_signature = signature(frame)
+        same = self._by_signature.get(puzzle_signature)
+        folder = self._folder(puzzle_signature) if self.directory is not None else None
+        if not same and (folder is None or not folder.is_dir()):
+            self.misses += 1
+            self._missed = (raw, puzzle_signature)
+            return None
+
+        key, transform = self.key(frame)
+        canonical = None
+        for other in same or ():
+            entry = self._entries[other]
+            if entry.key is None:
+                entry.key, entry.transform = self.key(_frame(other))
+            if entry.key == key:
+                canonical = entry.transform.apply(_frame(entry.solution))
+                break
+        else:
+            path = folder / key.hex() if folder is not None else None
+            if path is None or not path.exists():
+                self.misses += 1
+                self._missed = (raw, puzzle_signature)
+                return None
+            canonical = _frame(path.read_bytes())
+            self.disk_hits += 1
+
+        self.hits += 1
+        solution = transform.invert(canonical)
+        self._remember(raw, _Entry(solution.tobytes(), puzzle_signature))
+        return solution
+
+    def put(self, frame: npt.NDArray[np.int8], solution: npt.NDArray[np.int8]):
+        """
+        Caches the solution of a puzzle.
+
+        Args:
+            frame (np.ndarray): 9x9 int8 puzzle (0 for empty cells).
+            solution (np.ndarray): Its 9x9 solution.
+        """
+        raw = frame.tobytes()
+        missed_raw, puzzle_signature = self._missed
+        if raw != missed_raw:
+            puzzle_signature = signature(frame)
+        entry = _Entry(np.asarray(solution, dtype=np.int8).tobytes(), puzzle_signature)
+        self._remember(raw, entry)
+        if self.directory is None:
+            return
+        entry.key, entry.transform = self.key(frame)
+        folder = self._folder(puzzle_signature)
+        path = folder / entry.key.hex()
+        if not path.exists():
+            folder.mkdir(exist_ok=True)
+            temporary = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary.write_bytes(entry.transform.apply(solution).tobytes())
+            os.replace(temporary, path)
+
+    @staticmethod
+    def key(frame: npt.NDArray[np.int8]) -> tuple[bytes, Transform]:
+        """
+        Returns the hash of a puzzle's canonical form, and the transform that
+        maps the puzzle onto that form.
+        """
+        form, transform = canonical_form(frame)
+        return blake2b(form, digest_size=16).digest(), transform
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, raw: bytes, entry: _Entry):
+        entries = self._entries
+        if raw in entries:
+            entries.move_to_end(raw)
+            return
+        entries[raw] = entry
+        self._by_signature.setdefault(entry.signature, []).append(raw)
+        if len(entries) > self.capacity:
+            old_raw, old = entries.popitem(last=False)
+            same = self._by_signature[old.signature]
+            same.remove(old_raw)
+            if not same:
+                del self._by_signature[old.signature]
+
+    def _folder(self, puzzle_signature: bytes) -> Path:
+        return self.directory / blake2b(puzzle_signature, digest_size=8).hexdigest()
+
+
+def _frame(cells: bytes) -> npt.NDArray[np.int8]:
+    return np.frombuffer(cells, dtype=np.int8).reshape(9, 9)
@@ -0,0 +1,93 @@
+"""
+Limits on how much work a solve may do, and what a limited solve reports.
+
+A SolveBudget caps each solve of a SudokuSolver in wall time, search nodes,
+or both. The solver checks it at every search node and before every
+technique it runs, and passes what is left of it to the exact-cover and SAT
+engines, which check the clock as they go. A solve that runs out stops cleanly. Its guesses are rolled back, so the
+puzzle keeps only what propagation proved before the first guess.
+
+`SudokuSolver.solve_report` returns a SolveResult holding the outcome as a
+SolveStatus, the final or partial grid, and the work it took.
+"""
+from time import perf_counter
+
+import numpy.typing as npt
+import numpy as np
+
+from enums import SolveStatus
+
+
+class SolveBudget:
+    """
+    Limits of one solve.
+
+    Attributes:
+        seconds (float | None): Wall time allowed; None for no time limit.
+        nodes (int | None): Search nodes allowed; None for no node limit. The
+            exact-cover engine counts each choice it tries as a node and the
+            SAT solver each decision.
+
+    Examples:
+        A solve stops close to its deadline, even inside the SAT solver:
+
+        >>> from time import perf_counter
+        >>> from bitmask_puzzle import BitmaskPuzzle
+        >>> from sudoku_solver import SudokuSolver
+        >>> solver = SudokuSolver(BitmaskPuzzle(np.zeros((9, 9), dtype=np.int8)), sat_threshold=0,
+        ...                       budget=SolveBudget(seconds=0.002))
+        >>> start = perf_counter()
+        >>> solver.solve(), solver.exhausted
+        (False, True)
+        >>> perf_counter() - start < 5 * 0.002
+        True
+    """
+    __slots__ = ("seconds", "nodes")
+
+    def __init__(self, seconds: float | None = None, nodes: int | None = None):
+        if seconds is None and nodes is None:
+            raise ValueError("a budget needs a time or a node limit")
+        self.seconds = seconds
+        self.nodes = nodes
+
+    def deadline(self) -> float | None:
+        """Returns the `perf_counter` time at which a solve starting now runs out, if it has a time limit."""
+        return perf_counter() + self.seconds if self.seconds is not None else None
+
+    def __repr__(self) -> str:
+        return f"SolveBudget(seconds={self.seconds}, nodes={self.nodes})"
+
+
+class SolveResult:
+    """
+    Outcome of `SudokuSolver.solve_report`.
+
+    Attributes:
+        status (SolveStatus): How the solve ended.
+        frame (np.ndarray): The 9x9 grid it ended with: the solution if SOLVED,
+            the first solution found if MULTIPLE, otherwise the cells proved
+            before the search gave up or hit the contradiction (0 for unsolved
+            cells); a uniqueness check that gives up proves only the givens.
+        nodes (int): Search nodes visited.
+        seconds (float): Wall time taken.
+    """
+    __slots__ = ("status", "frame", "nodes", "seconds")
+
+    def __init__(self, status: SolveStatus, frame: npt.NDArray[np.int8], nodes: int, seconds: float):
+        self.status = status
+        self.frame = frame
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def solved(self) -> bool:
+        """Returns True if the puzzle was solved."""
+        return self.status == SolveStatus.SOLVED
+
+    def to_dict(self) -> dict:
+        """Returns the result as plain data, e.g. for JSON."""
+        return {"status": self.status.name, "frame": self.frame.tolist(),
+                "nodes": self.nodes, "seconds": self.seconds}
+
+    def __repr__(self) -> str:
+        return f"SolveResult({self.status.name}, nodes={self.nodes}, seconds={self.seconds:.6f})"
@@ -0,0 +1,133 @@
+"""
+Profiling counters for SudokuSolver.
+
+A SolveProfile attached to a solver accumulates, for every technique in the
+propagation loop, how often it ran, how long it took, how many candidates it
+removed and how many of its runs changed nothing, plus search counters
+(nodes, backtracks, maximum depth). Profiles from several solvers, e.g. the
+workers of a parallel batch, can be merged into one.
+"""
+from enums import Technique
+
+
+class TechniqueStats:
+    """
+    Counters for one technique.
+
+    Attributes:
+        calls (int): Number of times the technique ran.
+        seconds (float): Total wall time spent in it.
+        eliminations (int): Candidates removed by it, including those removed
+            from peers when singles are assigned.
+        wasted (int): Runs that changed nothing.
+    """
+    __slots__ = ("calls", "seconds", "eliminations", "wasted")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.eliminations = 0
+        self.wasted = 0
+
+    def merge(self, other: "TechniqueStats"):
+        """Adds the counters of `other` to this one."""
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.eliminations += other.eliminations
+        self.wasted += other.wasted
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds,
+                "eliminations": self.eliminations, "wasted": self.wasted}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TechniqueStats":
+        stats = cls()
+        stats.calls = data["calls"]
+        stats.seconds = data["seconds"]
+        stats.eliminations = data["eliminations"]
+        stats.wasted = data["wasted"]
+        return stats
+
+
+class SolveProfile:
+    """
+    Counters accumulated over every solve made with the profile attached.
+
+    Attributes:
+        puzzles (int): Number of solves.
+        seconds (float): Total wall time of those solves.
+        techniques (dict[Technique, TechniqueStats]): Counters per technique, in
+            the order the techniques first ran.
+        nodes (int): Search nodes visited.
+        backtracks (int): Guesses undone.
+        max_depth (int): Deepest guess nesting reached by any solve.
+    """
+
+    def __init__(self):
+        self.puzzles = 0
+        self.seconds = 0.0
+        self.techniques = {}
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+
+    def record(self, technique: Technique, seconds: float, eliminations: int):
+        """
+        Records one run of a technique.
+
+        Args:
+            technique (Technique): Technique that ran.
+            seconds (float): Wall time it took.
+            eliminations (int): Candidates it removed.
+        """
+        stats = self.techniques.get(technique)
+        if stats is None:
+            stats = self.techniques[technique] = TechniqueStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.eliminations += eliminations
+        if not eliminations:
+            stats.wasted += 1
+
+    def merge(self, other: "SolveProfile"):
+        """Adds the counters of `other` to this profile."""
+        self.puzzles += other.puzzles
+        self.seconds += other.seconds
+        for technique, stats in other.techniques.items():
+            self.techniques.setdefault(technique, TechniqueStats()).merge(stats)
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth)
+
+    def to_dict(self) -> dict:
+        """Returns the counters as plain data, e.g. for JSON."""
+        return {
+            "puzzles": self.puzzles,
+            "seconds": self.seconds,
+            "techniques": {technique.name: stats.to_dict() for technique, stats in self.techniques.items()},
+            "search": {"nodes": self.nodes, "backtracks": self.backtracks, "max_depth": self.max_depth},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SolveProfile":
+        """Rebuilds a profile from the output of `to_dict`."""
+        profile = cls()
+        profile.puzzles = data["puzzles"]
+        profile.seconds = data["seconds"]
+        profile.techniques = {Technique[name]: TechniqueStats.from_dict(stats)
+                              for name, stats in data["techniques"].items()}
+        profile.nodes = data["search"]["nodes"]
+        profile.backtracks = data["search"]["backtracks"]
+        profile.max_depth = data["search"]["max_depth"]
+        return profile
+
+    def __str__(self) -> str:
+        lines = [f"{self.puzzles} puzzles in {self.seconds:.3f}s",
+                 f"{'technique':<18} {'calls':>9} {'time (s)':>10} {'time %':>7} {'eliminated':>11} {'wasted':>9}"]
+        for technique, stats in self.techniques.items():
+            share = stats.seconds / self.seconds * 100 if self.seconds else 0.0
+            lines.append(f"{technique.name:<18} {stats.calls:>9} {stats.seconds:>10.3f} {share:>6.1f}% "
+                         f"{stats.eliminations:>11} {stats.wasted:>9}")
+        lines.append(f"search: {self.nodes} nodes, {self.backtracks} backtracks, max depth {self.max_depth}")
+        return "\n".join(lines)
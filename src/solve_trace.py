@@ -0,0 +1,227 @@
+"""
+Structured, replayable traces of a solve.
+
+A TraceRecorder attached to a SudokuSolver stores one compact event per
+change to the puzzle: the technique that made it, the cell index, the digit
+assigned (0 for an elimination) and the mask of eliminated candidates. Undoing
+a failed guess is recorded as an UNDO event holding the number of changes
+rolled back. A trace can be saved as binary or JSON lines, and `replay`
+rebuilds the puzzle as it was after any event.
+
+Usage:
+    python solve_trace.py TRACE_FILE [--step N]
+"""
+from array import array
+from pathlib import Path
+import argparse
+import json
+import struct
+import sys
+
+import numpy.typing as npt
+import numpy as np
+
+from bitmask_puzzle import BitmaskPuzzle
+from bitmasks import MASK_DIGITS, mask_of
+from enums import Technique
+from puzzle_io import format_line, parse_line
+
+MAGIC = b"SDKT"
+VERSION = 1
+# magic, version, 81 given values, event count
+HEADER = struct.Struct("<4sB81sI")
+# Each event is 3 uint16 words: technique << 8 | cell, digit, mask (or undo count)
+EVENT_WORDS = 3
+
+
+class TraceRecorder:
+    """
+    Records the changes made during a solve into a preallocated buffer.
+
+    Attributes:
+        givens (np.ndarray): 9x9 values of the puzzle when recording started.
+        technique (Technique): Technique credited with the next changes; set by the solver.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Args:
+            capacity (int): Number of events to preallocate; the buffer grows if exceeded.
+        """
+        self._buffer = array("H", bytes(2 * EVENT_WORDS * capacity))
+        self._count = 0
+        self.givens = np.zeros((9, 9), dtype=np.int8)
+        self.technique = Technique.SINGLE
+
+    def start(self, frame: npt.NDArray[np.int8]):
+        """
+        Discards recorded events and starts a new trace from a freshly loaded puzzle.
+
+        Args:
+            frame (np.ndarray): 9x9 values of the puzzle before solving.
+        """
+        self.givens = frame.copy()
+        self._count = 0
+        self.technique = Technique.SINGLE
+
+    def _append(self, technique: int, index: int, digit: int, mask: int):
+        pos = self._count * EVENT_WORDS
+        if pos == len(self._buffer):
+            self._buffer.extend(self._buffer)
+        buffer = self._buffer
+        buffer[pos] = technique << 8 | index
+        buffer[pos + 1] = digit
+        buffer[pos + 2] = mask
+        self._count += 1
+
+    def assign(self, index: int, digit: int):
+        """Records that `digit` was assigned to the cell at `index`."""
+        self._append(self.technique.value, index, digit, 0)
+
+    def eliminate(self, index: int, mask: int):
+        """Records that the candidates in `mask` were removed from the cell at `index`."""
+        self._append(self.technique.value, index, 0, mask)
+
+    def undo(self, count: int):
+        """Records that the last `count` changes still in effect were rolled back."""
+        self._append(Technique.UNDO.value, 0, 0, count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def events(self) -> list[tuple[Technique, int, int, int]]:
+        """
+        Returns the recorded events.
+
+        Returns:
+            list[tuple[Technique, int, int, int]]: (technique, cell index, digit, mask)
+                per event. For UNDO events the mask field is the number of changes undone.
+        """
+        buffer = self._buffer
+        return [
+            (Technique(buffer[pos] >> 8), buffer[pos] & 0xFF, buffer[pos + 1], buffer[pos + 2])
+            for pos in range(0, self._count * EVENT_WORDS, EVENT_WORDS)
+        ]
+
+    def save(self, path: Path | str):
+        """
+        Writes the trace in the compact binary format (a small header plus 6 bytes per event).
+
+        Args:
+            path (Path | str): Output file.
+        """
+        events = self._buffer[:self._count * EVENT_WORDS]
+        if sys.byteorder == "big":
+            events.byteswap()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.givens.astype(np.uint8).tobytes(), self._count))
+            file.write(events.tobytes())
+
+    def save_jsonl(self, path: Path | str):
+        """
+        Writes the trace as JSON lines: a header line with the givens, then one line per event.
+
+        Args:
+            path (Path | str): Output file.
+        """
+        with open(path, "w") as file:
+            file.write(json.dumps({"givens": format_line(self.givens)}) + "\n")
+            for technique, index, digit, mask in self.events():
+                if technique == Technique.UNDO:
+                    event = {"technique": technique.name, "count": mask}
+                else:
+                    event = {"technique": technique.name, "cell": index, "digit": digit,
+                             "eliminated": list(MASK_DIGITS[mask])}
+                file.write(json.dumps(event) + "\n")
+
+    @classmethod
+    def load(cls, path: Path | str) -> "TraceRecorder":
+        """
+        Reads a trace written by `save` or `save_jsonl`.
+
+        Args:
+            path (Path | str): Trace file.
+
+        Returns:
+            TraceRecorder: Recorder holding the trace.
+
+        Raises:
+            ValueError: If the file is not a trace.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        if data.startswith(MAGIC):
+            return cls._from_binary(data)
+        return cls._from_jsonl(data.decode("utf-8"))
+
+    @classmethod
+    def _from_binary(cls, data: bytes) -> "TraceRecorder":
+        magic, version, givens, count = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"Unsupported trace version: {version}")
+        recorder = cls(max(count, 1))
+        recorder.givens = np.frombuffer(givens, dtype=np.uint8).astype(np.int8).reshape(9, 9)
+        events = array("H", data[HEADER.size:HEADER.size + 2 * EVENT_WORDS * count])
+        if sys.byteorder == "big":
+            events.byteswap()
+        recorder._buffer[:len(events)] = events
+        recorder._count = count
+        return recorder
+
+    @classmethod
+    def _from_jsonl(cls, text: str) -> "TraceRecorder":
+        lines = text.splitlines()
+        if not lines:
+            raise ValueError("Empty trace file")
+        recorder = cls(max(len(lines) - 1, 1))
+        recorder.givens = parse_line(json.loads(lines[0])["givens"])
+        for line in lines[1:]:
+            event = json.loads(line)
+            technique = Technique[event["technique"]]
+            if technique == Technique.UNDO:
+                recorder._append(technique.value, 0, 0, event["count"])
+            else:
+                recorder._append(technique.value, event["cell"], event["digit"], mask_of(event["eliminated"]))
+        return recorder
+
+
+def replay(recorder: TraceRecorder, step: int | None = None) -> BitmaskPuzzle:
+    """
+    Rebuilds the puzzle as it was after the first `step` events of a trace.
+
+    Args:
+        recorder (TraceRecorder): Recorded trace.
+        step (int | None): Number of events to apply (default: all of them).
+
+    Returns:
+        BitmaskPuzzle: Puzzle state after those events.
+    """
+    puzzle = BitmaskPuzzle(recorder.givens)
+    # Every change goes on the trail so UNDO events can roll back the same
+    # number of changes as the original solve did.
+    puzzle.mark()
+    for technique, index, digit, mask in recorder.events()[:step]:
+        if technique == Technique.UNDO:
+            puzzle.undo(len(puzzle.trail) - mask)
+        elif digit:
+            puzzle.set_value(index, digit)
+        else:
+            puzzle.eliminate_mask(index, mask)
+    puzzle.clear_trail()
+    return puzzle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a solve trace")
+    parser.add_argument("trace_file", type=Path)
+    parser.add_argument("--step", type=int, help="number of events to replay (default: all)")
+    args = parser.parse_args()
+
+    recorder = TraceRecorder.load(args.trace_file)
+    puzzle = replay(recorder, args.step)
+    print(f"{len(recorder)} events; state after {len(recorder) if args.step is None else args.step}:")
+    print(puzzle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Asyncio front end that solves puzzles concurrently on an executor pool.
+
+A SolverService accepts puzzles from coroutines and solves each one in a
+worker of its executor (worker processes by default). Results come back as
+soon as each solve completes. Three limits keep it well behaved under load:
+- at most `workers` solves are handed to the executor at once;
+- at most `max_pending` requests are admitted at once, running or waiting
+  for a worker. Beyond that `solve` raises asyncio.QueueFull straight away
+  instead of queueing without bound, and `solve_many` waits for room before
+  it submits more;
+- a request that is not answered within its deadline raises TimeoutError.
+  The deadline counts waiting for a worker as well as solving.
+
+Every request builds its own puzzle and solver with the default null logger.
+Nothing is written to a log file and no state is shared between requests.
+The worker gets whatever is left of the deadline as the solve's time budget
+(see `solve_budget`), so a request that times out frees its worker as well.
+
+The service can be used in-process or behind `serve`, a line-based local
+TCP server. Each request line is a puzzle in the 81-character format. Each
+reply is "<n> <result>", where n is the 0-based number of the request line
+on its connection and result is the final grid as 81 characters, or BUSY,
+TIMEOUT or ERROR <reason>. A connection stops reading while the service
+is full, so one client pipelining many lines waits for room rather than
+being answered BUSY; BUSY only comes back when other clients took the
+room first. Replies are written as solves complete, so they may come
+back out of order.
+
+Usage:
+    python solver_service.py [--host HOST] [--port PORT] [-j WORKERS] [--max-pending N] [--timeout SECONDS]
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Iterable
+import argparse
+import asyncio
+import multiprocessing
+import os
+
+import numpy.typing as npt
+import numpy as np
+
+from bitmask_puzzle import BitmaskPuzzle
+from sudoku_solver import SudokuSolver
+from scheduler import TechniqueScheduler
+from solve_budget import SolveBudget
+from enums import SolverEngine, SolveStatus
+from puzzle_io import parse_line, format_line
+
+
+class SolverService:
+    """
+    Solves puzzles for asyncio callers on a bounded executor pool.
+
+    Use it as an async context manager, which starts and shuts down the pool.
+
+    Attributes:
+        workers (int): Maximum number of solves handed to the executor at once.
+        max_pending (int): Maximum number of requests admitted at once.
+        timeout (float | None): Default deadline of a request, in seconds.
+        engine (SolverEngine): Search engine used by the workers.
+        scheduler (TechniqueScheduler | None): Technique order used by the workers.
+        sat_threshold (int | None): Search nodes after which the workers switch to SAT.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int = 64, timeout: float | None = None,
+                 engine: SolverEngine = SolverEngine.LOGIC, scheduler: TechniqueScheduler | None = None,
+                 sat_threshold: int | None = None, executor: Executor | None = None):
+        """
+        Args:
+            workers (int | None): Concurrent solves (default: CPU count).
+            max_pending (int): Requests admitted at once, running or waiting.
+            timeout (float | None): Default deadline of a request, in seconds (None: no deadline).
+            engine (SolverEngine): Search engine used by the workers.
+            scheduler (TechniqueScheduler | None): Technique order used by the workers.
+            sat_threshold (int | None): Search nodes after which the workers switch to SAT.
+            executor (Executor | None): Pool to solve on. By default the service
+                starts a process pool of `workers` processes and shuts it down on exit.
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.engine = engine
+        self.scheduler = scheduler
+        self.sat_threshold = sat_threshold
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._slots = None
+        self._released = None
+        self._admitted = 0
+
+    async def __aenter__(self) -> "SolverService":
+        if self._executor is None:
+            # spawned rather than forked, so workers never inherit client sockets
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._slots = asyncio.Semaphore(self.workers)
+        self._released = asyncio.Event()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def pending(self) -> int:
+        """Number of requests admitted and not answered yet."""
+        return self._admitted
+
+    async def wait_for_room(self):
+        """Waits until fewer than `max_pending` requests are admitted."""
+        self._check_started()
+        while self._admitted >= self.max_pending:
+            self._released.clear()
+            await self._released.wait()
+
+    async def solve(self, frame: npt.NDArray[np.int8], timeout: float | None = None) -> npt.NDArray[np.int8]:
+        """
+        Solves one puzzle.
+
+        Args:
+            frame (np.ndarray): 9x9 int8 puzzle (0 for empty cells).
+            timeout (float | None): Deadline in seconds (default: the service's).
+
+        Returns:
+            np.ndarray: The final 9x9 frame; unsolvable puzzles come back with
+                unsolved cells as 0.
+
+        Raises:
+            asyncio.QueueFull: If `max_pending` requests are already admitted.
+            TimeoutError: If the deadline passed first.
+            ValueError: If the frame is not 9x9.
+        """
+        self._check_started()
+        frame = np.asarray(frame, dtype=np.int8)
+        if frame.shape != (9, 9):
+            raise ValueError("Sudoku grid must be 9x9")
+        if self._admitted >= self.max_pending:
+            raise asyncio.QueueFull(f"{self.max_pending} requests already pending")
+        self._admitted += 1
+        return await self._run(frame, timeout)
+
+    async def solve_many(self, frames: Iterable[npt.NDArray[np.int8]],
+                         timeout: float | None = None) -> AsyncIterator[tuple[int, npt.NDArray[np.int8] | None]]:
+        """
+        Solves a stream of puzzles, submitting more only while the service has
+        room, so the stream is consumed at the pace of the workers.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 puzzles.
+            timeout (float | None): Deadline of each puzzle, in seconds (default: the service's).
+
+        Yields:
+            tuple[int, np.ndarray | None]: Position of the puzzle in `frames` and its
+                final frame, as solves complete; None if its deadline passed.
+        """
+        self._check_started()
+        frames = enumerate(frames)
+        tasks = set()
+        exhausted = False
+        try:
+            while tasks or not exhausted:
+                while not exhausted and self._admitted < self.max_pending:
+                    item = next(frames, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, frame = item
+                    self._admitted += 1
+                    tasks.add(asyncio.ensure_future(self._indexed(index, np.asarray(frame, dtype=np.int8), timeout)))
+                if not tasks:
+                    if exhausted:
+                        break
+                    # other callers hold every admission; wait for one to finish
+                    await self.wait_for_room()
+                    continue
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _check_started(self):
+        if self._slots is None:
+            raise RuntimeError("SolverService must be started with 'async with'")
+
+    async def _indexed(self, index: int, frame: npt.NDArray[np.int8],
+                       timeout: float | None) -> tuple[int, npt.NDArray[np.int8] | None]:
+        try:
+            return index, await self._run(frame, timeout)
+        except TimeoutError:
+            return index, None
+
+    async def _run(self, frame: npt.NDArray[np.int8], timeout: float | None) -> npt.NDArray[np.int8]:
+        """Solves an admitted request and releases its admission."""
+        try:
+            async with asyncio.timeout(self.timeout if timeout is None else timeout) as scope:
+                async with self._slots:
+                    loop = asyncio.get_running_loop()
+                    seconds = scope.when() - loop.time() if scope.when() is not None else None
+                    status, cells = await loop.run_in_executor(self._executor, _solve_cells, frame.tobytes(),
+                                                               self.engine, self.scheduler, self.sat_threshold,
+                                                               seconds)
+        finally:
+            self._admitted -= 1
+            self._released.set()
+        if status == SolveStatus.BUDGET_EXCEEDED:
+            raise TimeoutError("the solve ran out of time")
+        return np.frombuffer(cells, dtype=np.int8).reshape(9, 9)
+
+
+def _solve_cells(cells: bytes, engine: SolverEngine, scheduler: TechniqueScheduler | None,
+                 sat_threshold: int | None, seconds: float | None) -> tuple[SolveStatus, bytes]:
+    """
+    Solves the 81 cell values of one puzzle in a worker within `seconds`, if
+    set, and returns how it went and the final 81 values.
+    """
+    puzzle = BitmaskPuzzle(np.frombuffer(cells, dtype=np.int8).reshape(9, 9))
+    budget = SolveBudget(seconds=max(seconds, 0.0)) if seconds is not None else None
+    solver = SudokuSolver(puzzle, scheduler=scheduler, engine=engine, sat_threshold=sat_threshold, budget=budget)
+    return solver.solve_report().status, puzzle.current_frame().tobytes()
+
+
+async def serve(service: SolverService, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Serves a started SolverService over TCP until cancelled.
+
+    Args:
+        service (SolverService): Service to answer requests with.
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+    """
+    server = await asyncio.start_server(partial(_handle_connection, service), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def _handle_connection(service: SolverService, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter):
+    replies = set()
+    number = 0
+    async for raw in reader:
+        # escape stray bytes so that error replies stay ASCII
+        line = raw.decode("ascii", errors="backslashreplace").strip()
+        if not line:
+            continue
+        # stop reading while the service is full, so a pipelining client is
+        # slowed down instead of answered BUSY
+        await service.wait_for_room()
+        reply = asyncio.create_task(_reply(service, writer, number, line))
+        replies.add(reply)
+        reply.add_done_callback(replies.discard)
+        number += 1
+        # let the reply be admitted before the next line is read
+        await asyncio.sleep(0)
+        # stop reading while the client is not taking its replies
+        await writer.drain()
+    if replies:
+        await asyncio.wait(replies)
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _reply(service: SolverService, writer: asyncio.StreamWriter, number: int, line: str):
+    try:
+        result = format_line(await service.solve(parse_line(line)))
+    except ValueError as error:
+        result = f"ERROR {error}"
+    except asyncio.QueueFull:
+        result = "BUSY"
+    except TimeoutError:
+        result = "TIMEOUT"
+    except Exception as error:
+        # one bad request must not end the connection without a reply
+        result = f"ERROR {type(error).__name__}: {error}"
+    writer.write(f"{number} {result}\n".encode("ascii", errors="backslashreplace"))
+
+
+async def _serve_forever(args: argparse.Namespace):
+    async with SolverService(args.workers, args.max_pending, args.timeout,
+                             SolverEngine[args.engine.upper()]) as service:
+        print(f"Serving on {args.host}:{args.port} with {service.workers} workers")
+        await serve(service, args.host, args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the solver over a local TCP socket")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="requests admitted at once; further requests are answered BUSY")
+    parser.add_argument("--timeout", type=float, help="deadline of each request in seconds")
+    parser.add_argument("--engine", choices=[engine.name.lower() for engine in SolverEngine], default="logic",
+                        help="search engine that finishes the puzzles")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
+from typing import Iterable
+
 import numpy.typing as npt
 import numpy as np
 
 from enums import GroupType
+from bitmasks import ALL_DIGITS_MASK, DIGIT_MASK
+from units import UNITS, PEERS, UNIT_OFFSET
 
 from sudoku_cell import Cell
+from validation import is_solution_values
+from cnf import CNF, encode
 
 class SudokuPuzzle:
     """
@@ -12,6 +18,12 @@ class SudokuPuzzle:
 
     Attributes:
         grid (np.ndarray): 9x9 array of Cell objects.
+        cells (list[Cell]): The 81 cells in row-major order (index = row * 9 + col).
+        units (tuple[tuple[Cell, ...], ...]): Cells of the 27 units, numbered as in `units.UNITS`.
+        peers (tuple[tuple[Cell, ...], ...]): The 20 peers of each cell, by cell index.
+        trail (list | None): Undo trail of cell changes while recording, otherwise None.
+        recorder (TraceRecorder | None): Solve trace recorder while the puzzle is traced.
+        queue (PropagationQueue | None): Propagation queue told about every change while solving.
     """
     ALL_VALUES = set(range(1, 10))
 
@@ -32,13 +44,109 @@ class SudokuPuzzle:
         for row in range(9):
             for col in range(9):
                 box = (row // 3) * 3 + (col // 3)
-                val = int(arr[row, col])
-                cell = Cell(row=row, col=col, box=box)
+                self.grid[row, col] = Cell(row=row, col=col, box=box)
+        self.cells = [cell for row in self.grid for cell in row]
+        self._index_cells()
+        self.trail = None
+        self.recorder = None
+        self.queue = None
+        self.load(arr)
+
+    def _index_cells(self):
+        """Builds this puzzle's unit and peer tuples from the shared index tables."""
+        cells = self.cells
+        self.units = tuple(tuple(cells[i] for i in unit) for unit in UNITS)
+        self.peers = tuple(tuple(cells[i] for i in peers) for peers in PEERS)
+
+    def load(self, arr: npt.NDArray[np.int8]):
+        """
+        Resets the puzzle to a new 9x9 grid, reusing its existing cells.
+
+        Args:
+            arr (np.ndarray): 9x9 integer array representing the puzzle
+                              (0 indicates unsolved cells).
+
+        Raises:
+            ValueError: If the input array is not 9x9.
+        """
+        if arr.shape != (9, 9):
+            raise ValueError("Sudoku grid must be 9x9")
+        self.clear_trail()
+        for row in self.grid:
+            for cell in row:
+                cell.value = 0
+                cell.candidates = set()
+                cell.eliminated_candidates = set()
+                val = int(arr[cell.row, cell.col])
                 if val > 0:
                     cell.set_value(val)
-                self.grid[row, col] = cell
         self.populate_candidates()
 
+    def mark(self) -> int:
+        """
+        Returns the current position on the undo trail, starting to record
+        cell changes if the puzzle is not recording yet.
+
+        Every value assignment and candidate elimination made after the mark
+        can be rolled back with `undo(mark)`.
+
+        Returns:
+            int: Position to pass to `undo`.
+        """
+        if self.trail is None:
+            self.trail = []
+            for cell in self.cells:
+                cell.journal = self.trail
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        """
+        Rolls back every change recorded after `mark`.
+
+        Args:
+            mark (int): Position returned by `mark`.
+        """
+        trail = self.trail
+        if self.recorder is not None and len(trail) > mark:
+            self.recorder.undo(len(trail) - mark)
+        while len(trail) > mark:
+            cell, value, candidates, eliminated = trail.pop()
+            cell.value = value
+            cell.candidates = candidates
+            cell.eliminated_candidates = eliminated
+
+    def clear_trail(self):
+        """Stops recording changes and discards the undo trail."""
+        if self.trail is None:
+            return
+        for cell in self.cells:
+            cell.journal = None
+        self.trail = None
+
+    def set_recorder(self, recorder):
+        """
+        Attaches a solve trace recorder that is told about every value
+        assignment, candidate elimination and undo, or detaches it with None.
+
+        Args:
+            recorder (TraceRecorder | None): Recorder to attach.
+        """
+        self.recorder = recorder
+        for cell in self.cells:
+            cell.recorder = recorder
+
+    def set_queue(self, queue):
+        """
+        Attaches a propagation queue that is told about every value assignment
+        and candidate elimination, or detaches it with None.
+
+        Args:
+            queue (PropagationQueue | None): Queue to attach.
+        """
+        self.queue = queue
+        for cell in self.cells:
+            cell.queue = queue
+
     def has_valid_solution(self) -> bool:
         """
         Returns a boolean value if all cells in the sodoku grid are solved and the solution is valid, 
@@ -47,18 +155,7 @@ class SudokuPuzzle:
         Returns:
             bool: True if the grid has a valid solution, otherwise false
         """
-        if not self.is_solved():
-            return False
-        
-        for row in self.grid:
-            for cell in row:
-                r = {item.value for item in self.row_at(cell.row) if item != cell}
-                c = {item.value for item in self.col_at(cell.col) if item != cell}
-                b = {item.value for item in self.box_at(cell.box) if item != cell}
-                if cell.value in r | b | c:
-                    return False 
-
-        return True
+        return is_solution_values([cell.value for cell in self.cells])
 
     def current_frame(self) -> npt.NDArray[np.int8]:
         """
@@ -70,6 +167,23 @@ class SudokuPuzzle:
         frame = [[col.value for col in row] for row in self.grid]
         return np.array(frame, dtype=np.int8)
     
+    def to_cnf(self, deadline: float | None = None) -> CNF:
+        """
+        Encodes the unsolved cells as a CNF formula over their remaining
+        candidates (see `cnf.encode`); propagating first keeps it small.
+
+        Args:
+            deadline (float | None): `time.perf_counter()` time after which
+                to give up.
+
+        Returns:
+            CNF: Formula whose models are the solutions of the puzzle.
+
+        Raises:
+            TimeoutError: If the deadline was reached first.
+        """
+        return encode(self, deadline)
+
     def cell_at(self, row: int, col: int) -> Cell:
         """
         Returns the Cell object at a specific row and column.
@@ -83,7 +197,7 @@ class SudokuPuzzle:
         """
         return self.grid[row, col]
     
-    def row_at(self, row: int) -> list[Cell]:
+    def row_at(self, row: int) -> tuple[Cell, ...]:
         """
         Returns all cells in a specific row.
 
@@ -91,11 +205,11 @@ class SudokuPuzzle:
             row (int): Row index (0-8).
 
         Returns:
-            list[Cell]: List of 9 cells in the row.
+            tuple[Cell, ...]: The 9 cells in the row.
         """
-        return list(self.grid[row, :])
+        return self.units[row]
     
-    def col_at(self, col: int) -> list[Cell]:
+    def col_at(self, col: int) -> tuple[Cell, ...]:
         """
         Returns all cells in a specific column.
 
@@ -103,11 +217,11 @@ class SudokuPuzzle:
             col (int): Column index (0-8).
 
         Returns:
-            list[Cell]: List of 9 cells in the column.
+            tuple[Cell, ...]: The 9 cells in the column.
         """
-        return list(self.grid[:, col])
+        return self.units[9 + col]
     
-    def box_at(self, box: int) -> list[Cell]:
+    def box_at(self, box: int) -> tuple[Cell, ...]:
         """
         Returns all cells in a specific 3x3 box.
 
@@ -115,10 +229,9 @@ class SudokuPuzzle:
             box (int): Box index (0-8).
 
         Returns:
-            list[Cell]: List of 9 cells in the box.
+            tuple[Cell, ...]: The 9 cells in the box.
         """
-        r0, c0 = (box // 3) * 3, (box % 3) * 3
-        return [self.grid[r, c] for r in range(r0, r0+3) for c in range(c0, c0+3)]
+        return self.units[18 + box]
     
     def excluded_at(self, cell: Cell) -> set[int]:
         """
@@ -131,11 +244,8 @@ class SudokuPuzzle:
             set[int]: Set of values already used in the cell's row, column,
                       box, or previously eliminated from the cell.
         """
-        r = set([c.value for c in self.row_at(cell.row) if c.is_solved])
-        c = set([c.value for c in self.col_at(cell.col) if c.is_solved])
-        box = set([c.value for c in self.box_at(cell.box) if c.is_solved])
-        to_exclude = r | c | box | cell.eliminated_candidates
-        return to_exclude
+        to_exclude = {peer.value for peer in self.peers[cell.row * 9 + cell.col] if peer.is_solved}
+        return to_exclude | cell.eliminated_candidates
     
     def set_candidates(self, cell: Cell):
         """
@@ -163,6 +273,53 @@ class SudokuPuzzle:
         """
         return all(cell.is_solved for row in self.grid for cell in row)
 
+    def has_contradiction(self, units: Iterable[int] | None = None) -> bool:
+        """
+        Checks whether the puzzle can no longer be solved from its current state.
+
+        Args:
+            units (Iterable[int] | None): Unit numbers to check (default: all 27).
+
+        Returns:
+            bool: True if an unsolved cell has no candidates, a value repeats in a
+                  row, column or box, or a group has no place left for a value.
+        """
+        for unit in (self.units if units is None else (self.units[u] for u in units)):
+            placed = 0
+            possible = 0
+            for cell in unit:
+                if cell.is_solved:
+                    bit = DIGIT_MASK[cell.value]
+                    if placed & bit:
+                        return True
+                    placed |= bit
+                else:
+                    mask = cell.candidate_mask
+                    if not mask:
+                        return True
+                    possible |= mask
+            if placed | possible != ALL_DIGITS_MASK:
+                return True
+        return False
+
+    def fewest_candidates_cell(self) -> Cell | None:
+        """
+        Returns the unsolved cell with the fewest candidates (minimum remaining values).
+
+        Returns:
+            Cell | None: The first such cell in grid order, or None if the puzzle is solved.
+        """
+        best = None
+        best_count = 10
+        for row in self.grid:
+            for cell in row:
+                if not cell.is_solved and len(cell.candidates) < best_count:
+                    best = cell
+                    best_count = len(cell.candidates)
+                    if best_count <= 2:
+                        return best
+        return best
+
     def get_singles(self) -> list[Cell]:
         """
         Returns all cells that have only one remaining candidate.
@@ -172,24 +329,20 @@ class SudokuPuzzle:
         """
         return [cell for row in self.grid for cell in row if len(cell.candidates) == 1]
     
-    def group_for_loc(self, loc: int, group_type: GroupType) -> list[Cell]:
-        if group_type == GroupType.ROW:
-            return self.row_at(loc)
-        elif group_type == GroupType.COL:
-            return self.col_at(loc)
-        elif group_type == GroupType.BOX:
-            return self.box_at(loc)
-        else:
+    def group_for_loc(self, loc: int, group_type: GroupType) -> tuple[Cell, ...]:
+        offset = UNIT_OFFSET.get(group_type)
+        if offset is None:
             raise ValueError(f"Invalid group_type: {group_type}")
+        return self.units[offset + loc]
 
 
-    def group_for_cell(self, cell: Cell, group_type: GroupType) -> list[Cell]:
+    def group_for_cell(self, cell: Cell, group_type: GroupType) -> tuple[Cell, ...]:
         if group_type == GroupType.ROW:
-            return self.row_at(cell.row)
+            return self.units[cell.row]
         elif group_type == GroupType.COL:
-            return self.col_at(cell.col)
+            return self.units[9 + cell.col]
         elif group_type == GroupType.BOX:
-            return self.box_at(cell.box)
+            return self.units[18 + cell.box]
         else:
             raise ValueError(f"Invalid group_type: {group_type}")
 
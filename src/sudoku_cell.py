@@ -1,11 +1,17 @@
 from dataclasses import dataclass, field
 
+from bitmasks import DIGIT_MASK, MASK_SETS, mask_of
 
-@dataclass
+
+@dataclass(eq=False, slots=True)
 class Cell:
     """
     Represents a single cell in a Sudoku grid.
 
+    Cells have slots instead of a per-instance dict, but still hold their
+    candidates as sets. `BitmaskCell` is the compact equivalent: a view over
+    the flat state buffer of a `BitmaskPuzzle`.
+
     Attributes:
         row (int): Row index (0-8).
         col (int): Column index (0-8).
@@ -13,6 +19,12 @@ class Cell:
         value (int): Current value of the cell (0 if unsolved).
         candidates (set[int]): Possible candidate values for this cell.
         eliminated_candidates (set[int]): Candidates removed via solving techniques.
+        journal (list | None): Undo trail shared with the owning puzzle while it records
+            changes (see `SudokuPuzzle.mark`), otherwise None.
+        recorder (TraceRecorder | None): Solve trace recorder that is told about every
+            change while the owning puzzle is traced, otherwise None.
+        queue (PropagationQueue | None): Propagation queue that is told about every
+            change while the owning puzzle is being solved, otherwise None.
     """
     row: int
     col: int
@@ -20,11 +32,19 @@ class Cell:
     value: int = 0
     candidates: set[int] = field(default_factory=lambda: set(range(1, 10)))
     eliminated_candidates: set[int] = field(default_factory=lambda: set())
+    journal: list | None = field(default=None, repr=False)
+    recorder: object = field(default=None, repr=False)
+    queue: object = field(default=None, repr=False)
 
     @property
     def is_solved(self) -> bool:
         """Returns True if the cell has a value assigned (i.e., is solved)."""
         return self.value > 0
+
+    @property
+    def candidate_mask(self) -> int:
+        """Returns the candidates of this cell as a 9-bit mask (bit d - 1 for digit d)."""
+        return mask_of(self.candidates)
     
     def eliminate_candidate(self, n: int) -> bool: 
         """
@@ -41,8 +61,13 @@ class Cell:
             - Does nothing if the candidate was already removed or cell is solved.
         """
         if n in self.candidates:
+            self.record()
             self.candidates.remove(n)
             self.eliminated_candidates.add(n)
+            if self.recorder is not None:
+                self.recorder.eliminate(self.row * 9 + self.col, DIGIT_MASK[n])
+            if self.queue is not None:
+                self.queue.eliminated(self.row * 9 + self.col, 1, len(self.candidates))
             return True
         return False
     
@@ -60,13 +85,33 @@ class Cell:
             - Adds the eliminated candidates to `eliminated_candidates`.
             - Does nothing if the candidates were already removed or cell is solved.
         """
-        has_eliminations = False
+        if self.journal is not None and not self.candidates.isdisjoint(s):
+            self.record()
+        if self.recorder is not None:
+            removed = mask_of(self.candidates.intersection(s))
+            if removed:
+                self.recorder.eliminate(self.row * 9 + self.col, removed)
+        removed = 0
         for n in s:
             if n in self.candidates:
                 self.candidates.remove(n)
                 self.eliminated_candidates.add(n)
-                has_eliminations =  True
-        return has_eliminations
+                removed += 1
+        if removed and self.queue is not None:
+            self.queue.eliminated(self.row * 9 + self.col, removed, len(self.candidates))
+        return removed > 0
+
+    def eliminate_mask(self, mask: int) -> bool:
+        """
+        Eliminates all candidate values in a 9-bit mask from this cell.
+
+        Args:
+            mask (int): Mask of candidates to remove.
+
+        Returns:
+            bool: True if any candidate was removed, False if none were present.
+        """
+        return self.eliminate_candidates(MASK_SETS[mask])
     
     def set_value(self, n: int):
         """
@@ -78,8 +123,25 @@ class Cell:
         Side Effects:
             - Clears all remaining candidates.
             - Clears all eliminated candidates
-            - Does not propagate updates to other cells (caller must handle that).
+            - Marks the cell's row, column and box as changed on `queue`, if set.
+              Peers are not touched here; `SudokuSolver.assign` removes the
+              value from them.
         """
+        if self.journal is not None:
+            # the old sets are replaced, not mutated, so they can be kept as is
+            self.journal.append((self, self.value, self.candidates, self.eliminated_candidates))
+        if self.recorder is not None:
+            self.recorder.assign(self.row * 9 + self.col, n)
         self.value = n
         self.candidates = set()
         self.eliminated_candidates = set()
+        if self.queue is not None:
+            self.queue.assigned(self.row * 9 + self.col)
+
+    def record(self):
+        """
+        Saves the current state of the cell on its journal before it is changed.
+        Does nothing unless the owning puzzle is recording an undo trail.
+        """
+        if self.journal is not None:
+            self.journal.append((self, self.value, set(self.candidates), set(self.eliminated_candidates)))
@@ -1,14 +1,72 @@
-import logging
-
-logging.basicConfig(
-    filename="sudoku_steps.log",
-    filemode="w",
-    level=logging.INFO,
-    format="%(message)s"
-)
-
-def log_step(step_description, puzzle=None):
-    logging.info(step_description)
-    if puzzle:
-        logging.info(puzzle)
-    logging.info("\n" + "-"*40 + "\n")
+from pathlib import Path
+from typing import TextIO
+
+
+class StepLogger:
+    """
+    Writes a human-readable trace of the solving steps to a text stream.
+
+    Tracing is opt-in per solver: pass a StepLogger to `SudokuSolver` to record
+    a solve. Callers check `enabled` before building a message, so with the
+    default `NULL_LOGGER` no message is formatted and no puzzle is rendered.
+
+    Attributes:
+        enabled (bool): True if steps are recorded.
+        stream (TextIO): Stream the steps are written to.
+    """
+    enabled = True
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    @classmethod
+    def to_file(cls, path: Path | str = "sudoku_steps.log") -> "StepLogger":
+        """
+        Creates a logger that writes to a file, replacing any previous content.
+
+        Args:
+            path (Path | str): Log file path.
+
+        Returns:
+            StepLogger: Logger that owns the opened file; close it when done.
+        """
+        return cls(open(path, "w"))
+
+    def step(self, step_description: str, puzzle=None):
+        """
+        Records one step, optionally followed by the rendered puzzle.
+
+        Args:
+            step_description (str): Description of the step.
+            puzzle (SudokuPuzzle | None): Puzzle state to render after the description.
+        """
+        self.stream.write(f"{step_description}\n")
+        if puzzle:
+            self.stream.write(f"{puzzle}\n")
+        self.stream.write("\n" + "-" * 40 + "\n\n")
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self) -> "StepLogger":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NullStepLogger(StepLogger):
+    """StepLogger that records nothing; the default for every solve."""
+    enabled = False
+
+    def __init__(self):
+        self.stream = None
+
+    def step(self, step_description: str, puzzle=None):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_LOGGER = NullStepLogger()
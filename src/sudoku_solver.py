@@ -1,82 +1,750 @@
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from time import perf_counter
+from pathlib import Path
+from typing import Iterable, Iterator
+import os
+
+import numpy.typing as npt
+import numpy as np
+
 from sudoku import SudokuPuzzle
-from sudoku_logger import log_step
-from enums import GroupType
-from eliminations.locked_candidates import eliminate_locked_candidates
-from eliminations.hidden_singles import eliminate_hidden_singles
-from eliminations.naked_subsets import eliminate_naked_pairs, eliminate_naked_triples, eliminate_naked_quads
-from eliminations.utils import eliminate_candidate_for_group
-import copy
+from bitmask_puzzle import BitmaskPuzzle
+from sudoku_logger import StepLogger, NULL_LOGGER
+from enums import Technique, SolverEngine, SolveStatus
+from solve_trace import TraceRecorder
+from solve_profile import SolveProfile
+from propagation import PropagationQueue
+from batch_engine import solve_frames, count_frames
+from dlx import DancingLinks
+from cdcl import CDCLSolver
+from cnf import CNF
+from solution_cache import SolutionCache
+from solve_budget import SolveBudget, SolveResult
+from scheduler import TechniqueScheduler, COUNTING_TECHNIQUES
+from eliminations.utils import eliminate_candidate_for_peers
 
 class SudokuSolver:
-    def __init__(self, puzzle: SudokuPuzzle):
+    """
+    Solves a Sudoku puzzle with logical techniques, falling back to a
+    depth-first search when the techniques stall.
+
+    The `engine` picks how a puzzle is finished: LOGIC branches over the
+    candidates of the techniques' search, DLX hands the puzzle straight to the
+    Dancing Links exact-cover engine (see `dlx`), and HYBRID propagates once
+    and lets the exact-cover engine finish from the remaining candidates.
+
+    With a `sat_threshold`, a LOGIC search that visits more nodes than the
+    threshold is abandoned and the puzzle, as propagated before the first
+    guess, is encoded as CNF and handed to the CDCL solver (see `cdcl`).
+
+    With a `cache`, `solve` looks the puzzle up by its canonical form and
+    stores the solutions it finds (see `solution_cache`). The lookup waits
+    until propagation has left the puzzle needing a guess, since a puzzle
+    that propagation solves costs less to solve again than to look up. The
+    DLX engine does not propagate, so it looks every puzzle up first. Traced
+    solves bypass the cache so their trace is complete.
+
+    With a `budget`, every `solve` and `count_solutions` stops once it has
+    used up its time or nodes (see `solve_budget`). `solve_report` tells such
+    a solve apart from an unsolvable puzzle.
+
+    Attributes:
+        puzzle (SudokuPuzzle): Puzzle being solved, changed in place.
+        log (StepLogger): Receives a trace of the solving steps. The default,
+            NULL_LOGGER, records nothing and costs nothing.
+        recorder (TraceRecorder | None): Records a replayable trace of each solve, if set.
+        profile (SolveProfile | None): Accumulates per-technique and search counters
+            over every solve, if set.
+        scheduler (TechniqueScheduler): Techniques used after singles and their order.
+        engine (SolverEngine): Search engine used to finish puzzles.
+        exact_cover (DancingLinks): Exact-cover engine used by DLX and HYBRID.
+        sat_threshold (int | None): Search nodes after which a LOGIC solve
+            switches to the SAT solver; None never switches.
+        escalated (bool): True if the last `solve` switched to the SAT solver.
+        cache (SolutionCache | None): Solutions of earlier puzzles, if set.
+        cache_hit (bool): True if the last `solve` was answered from the cache.
+        queue (PropagationQueue): Cells and units changed since propagation last ran.
+        nodes (int): Number of search nodes visited by the last `solve`.
+        budget (SolveBudget | None): Limits of each solve and count, if set.
+        exhausted (bool): True if the last `solve` or `count_solutions` ran out of its budget.
+        solution (np.ndarray | None): First solution found by the last `count_solutions`, if any.
+    """
+    def __init__(self, puzzle: SudokuPuzzle, log: StepLogger = NULL_LOGGER,
+                 recorder: TraceRecorder | None = None, profile: SolveProfile | None = None,
+                 scheduler: TechniqueScheduler | None = None,
+                 engine: SolverEngine = SolverEngine.LOGIC, sat_threshold: int | None = None,
+                 cache: SolutionCache | None = None, budget: SolveBudget | None = None):
         self.puzzle = puzzle
+        self.log = log
+        self.recorder = recorder
+        self.profile = profile
+        self.scheduler = scheduler or TechniqueScheduler()
+        self.queue = PropagationQueue()
+        self.engine = engine
+        self.exact_cover = DancingLinks()
+        self.sat_threshold = sat_threshold
+        self.escalated = False
+        self.cache = cache
+        self.cache_hit = False
+        self.nodes = 0
+        self.budget = budget
+        self.exhausted = False
+        self.solution = None
+        self._deadline = None
+        self._node_limit = None
+        # puzzle of the current solve still to be looked up, and the one looked up
+        self._lookup = None
+        self._looked_up = None
+
+    def assign(self, cell, value: int):
+        """
+        Sets the value of a cell and removes it from the candidates of its row,
+        column and box.
+
+        Args:
+            cell (Cell): Cell to solve.
+            value (int): Value to assign.
+        """
+        cell.set_value(value)
+        eliminate_candidate_for_peers(self.puzzle, cell, value, self.log)
     
-    def solve_singles(self):
-        singles = self.puzzle.get_singles()
-        for cell in singles:
-            cell.set_value(next(iter(cell.candidates)))     
-            log_step(f"Solve Cell({cell.row}, {cell.col}) with single; Solution: {cell.value}")        
-            eliminate_candidate_for_group(self.puzzle, cell.row, cell.value, GroupType.ROW)
-            eliminate_candidate_for_group(self.puzzle, cell.col, cell.value, GroupType.COL)
-            eliminate_candidate_for_group(self.puzzle, cell.box, cell.value, GroupType.BOX)
-        return len(singles) > 0
-    
-    def backtrack(self, cell):
-        if self.puzzle.is_solved():
+    def solve_singles(self) -> bool:
+        """
+        Assigns the queued cells that are down to a single candidate, including
+        the ones that become singles along the way.
+
+        Returns:
+            bool: True if any cell was solved.
+        """
+        cells = self.puzzle.cells
+        singles = self.queue.singles
+        solved = False
+        i = 0
+        while i < len(singles):
+            cell = cells[singles[i]]
+            i += 1
+            if cell.is_solved or not cell.candidates:
+                # already assigned, or emptied by an earlier single; the
+                # contradiction check catches the latter
+                continue
+            value = next(iter(cell.candidates))
+            if self.log.enabled:
+                self.log.step(f"Solve Cell({cell.row}, {cell.col}) with single; Solution: {value}")        
+            self.assign(cell, value)
+            solved = True
+        singles.clear()
+        return solved
+
+    def propagate(self) -> bool:
+        """
+        Applies the logical techniques until none of them makes progress.
+
+        Work is driven by the propagation queue. Each round resolves the pending
+        singles, then runs the cheapest technique that has changed units left to
+        look at. As soon as a technique removes a candidate the round ends, so
+        the next one starts again from singles and the cheapest technique; a
+        costlier technique only runs once all the cheaper ones have caught up.
+
+        Returns:
+            bool: False as soon as the puzzle reaches a contradiction or the
+                budget's time runs out (see `exhausted`), otherwise True.
+        """
+        log = self.log
+        recorder = self.recorder
+        profile = self.profile
+        queue = self.queue
+        techniques = self.scheduler.techniques
+        deadline = self._deadline
+        # Units each technique has yet to look at
+        pending = [set() for _ in techniques]
+        while True:
+            if deadline is not None and perf_counter() > deadline:
+                # give up like a contradiction; callers check `exhausted`
+                self.exhausted = True
+                log.step("Out of time")
+                return False
+            log.step("Find and Resolve Singles")
+            if recorder is not None:
+                recorder.technique = Technique.SINGLE
+            if profile is None:
+                self.solve_singles()
+            else:
+                start, before = perf_counter(), queue.eliminations
+                self.solve_singles()
+                profile.record(Technique.SINGLE, perf_counter() - start, queue.eliminations - before)
+
+            units = queue.take_units()
+            if units:
+                if self.puzzle.has_contradiction(units):
+                    log.step("Contradiction found")
+                    return False
+                for technique_units in pending:
+                    technique_units.update(units)
+
+            for i, (technique, description, eliminate) in enumerate(techniques):
+                if not pending[i]:
+                    continue
+                if deadline is not None and perf_counter() > deadline:
+                    self.exhausted = True
+                    log.step("Out of time")
+                    return False
+                units, pending[i] = pending[i], set()
+                log.step(description)
+                if recorder is not None:
+                    recorder.technique = technique
+                before = queue.eliminations
+                if profile is None:
+                    eliminate(self.puzzle, log, units)
+                else:
+                    start = perf_counter()
+                    eliminate(self.puzzle, log, units)
+                    profile.record(technique, perf_counter() - start, queue.eliminations - before)
+                if queue.eliminations != before:
+                    break
+            else:
+                # every technique has seen every change without making progress
+                return True
+
+            log.step("Current State", self.puzzle)
+
+    def search(self, depth: int = 0) -> bool:
+        """
+        Depth-first search over the candidates of the cell with the fewest
+        candidates, propagating after every guess. A guess is abandoned as soon
+        as propagation reaches a contradiction, and its changes are rolled back
+        from the puzzle's undo trail.
+
+        Args:
+            depth (int): Number of guesses the current state rests on.
+
+        Returns:
+            bool: True if a valid solution was found, which is left in the puzzle.
+        """
+        self.nodes += 1
+        if self.profile is not None and depth > self.profile.max_depth:
+            self.profile.max_depth = depth
+        if self.budget is not None and self.over_budget():
+            return False
+        if not self.propagate():
+            return False
+        cell = self.puzzle.fewest_candidates_cell()
+        if cell is None:
+            return self.puzzle.has_valid_solution()
+        if self._lookup is not None and self.lookup_cache():
             return True
-        
-        for candidate in cell.candidates:
-            new_puzzle = copy.deepcopy(self.puzzle)
-            new_puzzle.cell_at(cell.row, cell.col).set_value(candidate)
-            new_solver = SudokuSolver(new_puzzle)
-            log_step(f"Try candidate {candidate} in Cell:({cell.row}, {cell.col})")
-            new_solver.solve()
-            if new_puzzle.is_solved() and new_puzzle.has_valid_solution():
-                self.puzzle.grid = new_puzzle.grid
+        if self.sat_threshold is not None and self.nodes > self.sat_threshold:
+            # too much branching; leave the rest to the SAT solver
+            self.escalated = True
+            return False
+
+        for candidate in sorted(cell.candidates):
+            mark = self.puzzle.mark()
+            if self.log.enabled:
+                self.log.step(f"Try candidate {candidate} in Cell:({cell.row}, {cell.col})")
+            if self.recorder is not None:
+                self.recorder.technique = Technique.GUESS
+            self.assign(cell, candidate)
+            if self.search(depth + 1):
                 return True
-            log_step(f"Backtracking from Cell:({cell.row}, {cell.col}) = {candidate}")
+            self.puzzle.undo(mark)
+            # the puzzle is back at the settled state the guess was made from
+            self.queue.clear()
+            if self.escalated or self.exhausted:
+                # unwind to the first guess, for the SAT solver or the caller
+                return False
+            if self.profile is not None:
+                self.profile.backtracks += 1
+            if self.log.enabled:
+                self.log.step(f"Backtracking from Cell:({cell.row}, {cell.col}) = {candidate}")
             
         return False
 
-        
+    def solve_exact_cover(self) -> bool:
+        """
+        Finishes the puzzle from its current state with the exact-cover engine
+        instead of branching. Only the candidates left in each cell are tried,
+        so the engine starts from whatever propagation has ruled out.
 
-    def solve(self):
-        log_step("Begin", self.puzzle)
-        changed = True
-        while changed:
-            log_step("Find and Resolve Singles")
-            solved_singles = self.solve_singles()
+        Returns:
+            bool: True if a solution was found, which is assigned to the puzzle.
+        """
+        start, before = perf_counter(), self.queue.eliminations
+        cells = self.puzzle.cells
+        solution = self.exact_cover.solve([cell.value for cell in cells], [cell.candidate_mask for cell in cells],
+                                          self.nodes_left(), self._deadline)
+        self.nodes += self.exact_cover.nodes
+        self.exhausted = self.exhausted or self.exact_cover.exhausted
+        if solution is not None:
+            if self.recorder is not None:
+                self.recorder.technique = Technique.EXACT_COVER
+            for cell, value in zip(cells, solution):
+                if not cell.is_solved:
+                    if self.log.enabled:
+                        self.log.step(f"Solve Cell({cell.row}, {cell.col}) with exact cover; Solution: {value}")
+                    self.assign(cell, value)
+        if self.profile is not None:
+            self.profile.record(Technique.EXACT_COVER, perf_counter() - start, self.queue.eliminations - before)
+        return solution is not None
 
-            log_step("Find and Eliminate Hidden Singles")
-            eliminated_hidden_singles = eliminate_hidden_singles(self.puzzle)
-            
-            log_step("Find and Eliminate Locked Candidates")
-            eliminated_locked_candidates = eliminate_locked_candidates(self.puzzle)
-            
-            log_step("Find and Eliminate Naked Pairs")
-            eliminated_naked_pairs = eliminate_naked_pairs(self.puzzle)
+    def solve_sat(self) -> bool:
+        """
+        Finishes the puzzle from its current state with the CDCL SAT solver,
+        over a CNF encoding restricted to the candidates left in each cell.
 
-            log_step("Find and Eliminate Naked Triples")
-            eliminated_naked_triples = eliminate_naked_triples(self.puzzle)
+        Returns:
+            bool: True if a solution was found, which is assigned to the puzzle.
+        """
+        if self.over_budget():
+            return False
+        start, before = perf_counter(), self.queue.eliminations
+        try:
+            formula = self.puzzle.to_cnf(self._deadline)
+        except TimeoutError:
+            self.exhausted = True
+            self.log.step("Out of time")
+            return False
+        sat = CDCLSolver(formula.num_vars, formula.clauses)
+        try:
+            model = sat.solve(decision_limit=self.nodes_left(), deadline=self._deadline)
+        except TimeoutError:
+            self.exhausted = True
+            model = None
+        self.nodes += sat.decisions
+        if self.log.enabled:
+            self.log.step(f"SAT: {formula.num_vars} variables, {len(formula.clauses)} clauses, "
+                          f"{sat.decisions} decisions, {sat.conflicts} conflicts")
+        if model is not None:
+            if self.recorder is not None:
+                self.recorder.technique = Technique.SAT
+            cells = self.puzzle.cells
+            for index, value in formula.decode(model).items():
+                cell = cells[index]
+                if self.log.enabled:
+                    self.log.step(f"Solve Cell({cell.row}, {cell.col}) with SAT; Solution: {value}")
+                self.assign(cell, value)
+        if self.profile is not None:
+            self.profile.record(Technique.SAT, perf_counter() - start, self.queue.eliminations - before)
+        return model is not None and self.puzzle.has_valid_solution()
 
-            log_step("Find and Eliminate Naked Quads")
-            eliminated_naked_quads = eliminate_naked_quads(self.puzzle)
-            
+    def to_cnf(self) -> CNF:
+        """
+        Propagates the puzzle in place and encodes what is left of it as CNF.
+
+        Returns:
+            CNF: Formula whose models are the solutions of the puzzle. It is
+                unsatisfiable if propagation found a contradiction.
+        """
+        self.puzzle.set_queue(self.queue)
+        self.queue.fill(self.puzzle)
+        self.propagate()
+        self.puzzle.set_queue(None)
+        self.queue.clear()
+        return self.puzzle.to_cnf()
+
+    def count_exact_cover(self, limit: int) -> int:
+        """
+        Counts the solutions below the current state with the exact-cover engine.
+
+        Args:
+            limit (int): Stop as soon as this many solutions are found.
+
+        Returns:
+            int: Number of solutions found, at most `limit`.
+        """
+        start = perf_counter()
+        cells = self.puzzle.cells
+        found = self.exact_cover.count([cell.value for cell in cells], [cell.candidate_mask for cell in cells],
+                                       limit, self.nodes_left(), self._deadline)
+        self.nodes += self.exact_cover.nodes
+        self.exhausted = self.exhausted or self.exact_cover.exhausted
+        if self.solution is None and self.exact_cover.solution is not None:
+            self.solution = np.array(self.exact_cover.solution, dtype=np.int8).reshape(9, 9)
+        if self.profile is not None:
+            self.profile.record(Technique.EXACT_COVER, perf_counter() - start, 0)
+        return found
+
+    def count(self, limit: int, depth: int = 0) -> int:
+        """
+        Depth-first search like `search`, but counting the solutions below the
+        current state instead of stopping at the first one. Every guess is
+        rolled back, so the puzzle is left as propagation leaves it.
+
+        Args:
+            limit (int): Stop as soon as this many solutions are found.
+            depth (int): Number of guesses the current state rests on.
+
+        Returns:
+            int: Number of solutions found, at most `limit`.
+        """
+        self.nodes += 1
+        if self.profile is not None and depth > self.profile.max_depth:
+            self.profile.max_depth = depth
+        if self.budget is not None and self.over_budget():
+            return 0
+        if not self.propagate():
+            return 0
+        cell = self.puzzle.fewest_candidates_cell()
+        if cell is None:
+            if not self.puzzle.has_valid_solution():
+                return 0
+            if self.solution is None:
+                self.solution = self.puzzle.current_frame()
+            return 1
+
+        found = 0
+        for candidate in sorted(cell.candidates):
+            mark = self.puzzle.mark()
+            if self.log.enabled:
+                self.log.step(f"Try candidate {candidate} in Cell:({cell.row}, {cell.col})")
+            self.assign(cell, candidate)
+            found += self.count(limit - found, depth + 1)
+            self.puzzle.undo(mark)
+            self.queue.clear()
+            if self.profile is not None:
+                self.profile.backtracks += 1
+            if found >= limit or self.exhausted:
+                break
+        return found
+
+    def count_solutions(self, limit: int = 2) -> int:
+        """
+        Counts the solutions of the puzzle, stopping as soon as `limit` are found.
+        With the default limit of 2 this tells apart puzzles with no solution,
+        a unique one, or several. The puzzle is left unchanged.
+
+        The search uses this solver's scheduler; a solver built with
+        `TechniqueScheduler(COUNTING_TECHNIQUES)` counts faster.
+
+        Args:
+            limit (int): Number of solutions after which to stop counting.
+
+        Returns:
+            int: Number of solutions, capped at `limit`.
+        """
+        puzzle = self.puzzle
+        start = perf_counter()
+        self.nodes = 0
+        self.solution = None
+        self.start_budget()
+        outermost = puzzle.trail is None
+        mark = puzzle.mark()
+        puzzle.set_queue(self.queue)
+        self.queue.fill(puzzle)
+        if self.engine == SolverEngine.LOGIC:
+            found = self.count(limit)
+        elif self.engine == SolverEngine.DLX:
+            found = self.count_exact_cover(limit)
+        else:
+            self.nodes += 1
+            found = self.count_exact_cover(limit) if self.propagate() else 0
+        puzzle.set_queue(None)
+        puzzle.undo(mark)
+        self.queue.clear()
+        if outermost:
+            puzzle.clear_trail()
+        if self.profile is not None:
+            self.profile.puzzles += 1
+            self.profile.nodes += self.nodes
+            self.profile.seconds += perf_counter() - start
+        if self.log.enabled:
+            self.log.step(f"Counted {found} solution(s) (limit {limit}) in {self.nodes} nodes"
+                          f"{'; out of budget' if self.exhausted else ''}")
+        return found
+
+    def solve(self) -> bool:
+        """
+        Solves the puzzle in place.
+
+        Returns:
+            bool: True if the puzzle was solved; False if it has no solution or
+                the budget ran out (see `exhausted`), in which case the puzzle
+                holds what propagation deduced before the contradiction was
+                found or the first guess was made.
+        """
+        log = self.log
+        log.step("Begin", self.puzzle)
+        start = perf_counter()
+        self.nodes = 0
+        self.start_budget()
+        self.cache_hit = False
+        self._looked_up = None
+        cache = self.cache if self.recorder is None else None
+        self._lookup = self.puzzle.current_frame() if cache is not None else None
+        if self.recorder is not None:
+            self.recorder.start(self.puzzle.current_frame())
+            self.puzzle.set_recorder(self.recorder)
+        outermost = self.puzzle.trail is None
+        self.puzzle.set_queue(self.queue)
+        self.queue.fill(self.puzzle)
+        if self.engine == SolverEngine.LOGIC:
+            self.escalated = False
+            solved = self.search()
+            if self.escalated and not self.exhausted:
+                if log.enabled:
+                    log.step(f"Search passed {self.sat_threshold} nodes; switching to SAT")
+                solved = self.solve_sat()
+        elif self.engine == SolverEngine.DLX:
+            solved = (self._lookup is not None and self.lookup_cache()) or self.solve_exact_cover()
+        else:
+            self.nodes += 1
+            solved = self.propagate() and (
+                (self._lookup is not None and self.puzzle.fewest_candidates_cell() is not None and
+                 self.lookup_cache()) or self.solve_exact_cover())
+        self.puzzle.set_queue(None)
+        if outermost:
+            self.puzzle.clear_trail()
+        if self.recorder is not None:
+            self.puzzle.set_recorder(None)
+        self._lookup = None
+        if self._looked_up is not None and solved and not self.cache_hit:
+            cache.put(self._looked_up, self.puzzle.current_frame())
+        if self.profile is not None:
+            self.profile.puzzles += 1
+            self.profile.nodes += self.nodes
+            self.profile.seconds += perf_counter() - start
+
+        if log.enabled:
+            log.step(f"Search visited {self.nodes} nodes{'; out of budget' if self.exhausted else ''}")
+        log.step("End", self.puzzle)
+        if log.enabled:
+            log.step(f"The puzzle solution is {'valid' if self.puzzle.has_valid_solution() else 'invalid'}")
+        return solved
+
+    def lookup_cache(self) -> bool:
+        """
+        Looks up the puzzle the current `solve` started from, at most once per solve.
+
+        Returns:
+            bool: True if the cache held its solution, which is loaded into the puzzle.
+        """
+        frame, self._lookup = self._lookup, None
+        self._looked_up = frame
+        solution = self.cache.get(frame)
+        if solution is None:
+            return False
+        self.puzzle.load(solution)
+        # loading queues the new values; there is nothing left to propagate
+        self.queue.clear()
+        self.cache_hit = True
+        self.log.step("Solution found in cache")
+        return True
+
+    def solve_report(self, unique: bool = False) -> SolveResult:
+        """
+        Solves the puzzle in place within this solver's budget, if any, and
+        reports how it went.
+
+        Args:
+            unique (bool): Also check that the solution is unique. The puzzle is
+                searched once for up to two solutions, as `count_solutions` does.
+
+        Returns:
+            SolveResult: SOLVED, UNSOLVABLE, BUDGET_EXCEEDED, or with `unique`,
+                MULTIPLE; the grid the puzzle was left with; nodes and time taken.
+        """
+        start = perf_counter()
+        if not unique:
+            if self.solve():
+                status = SolveStatus.SOLVED
+            else:
+                status = SolveStatus.BUDGET_EXCEEDED if self.exhausted else SolveStatus.UNSOLVABLE
+        else:
+            # counting leaves the puzzle as it was given
+            found = self.count_solutions(2)
+            if self.exhausted and found < 2:
+                status = SolveStatus.BUDGET_EXCEEDED
+            else:
+                status = (SolveStatus.UNSOLVABLE, SolveStatus.SOLVED, SolveStatus.MULTIPLE)[found]
+                if found:
+                    self.puzzle.load(self.solution)
+        return SolveResult(status, self.puzzle.current_frame(), self.nodes, perf_counter() - start)
+
+    def start_budget(self):
+        """Starts the clock and node count of this solver's budget, if any, for a new solve."""
+        self.exhausted = False
+        budget = self.budget
+        if budget is None:
+            self._deadline = self._node_limit = None
+        else:
+            self._deadline = budget.deadline()
+            self._node_limit = budget.nodes
+
+    def over_budget(self) -> bool:
+        """
+        Checks the budget started by `start_budget`.
+
+        Returns:
+            bool: True if the nodes or time are used up, in which case `exhausted` is set.
+        """
+        if (self._node_limit is not None and self.nodes > self._node_limit) or \
+                (self._deadline is not None and perf_counter() > self._deadline):
+            self.exhausted = True
+        return self.exhausted
+
+    def nodes_left(self) -> int | None:
+        """Returns the search nodes left in the started budget, or None if it has no node limit."""
+        return max(self._node_limit - self.nodes, 0) if self._node_limit is not None else None
+
+    def solve_batch(self, frames: Iterable[npt.NDArray[np.int8]]) -> Iterator[npt.NDArray[np.int8]]:
+        """
+        Solves a stream of puzzles, reusing this solver and its puzzle for every grid.
+
+        Each frame is loaded into `self.puzzle` in place, so the puzzle's backend
+        (e.g. BitmaskPuzzle) is used for the whole batch.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+
+        Yields:
+            np.ndarray: The final 9x9 frame for each puzzle, in input order.
+                        Unsolvable puzzles come back with unsolved cells as 0.
+        """
+        for frame in frames:
+            self.puzzle.load(frame)
+            self.solve()
+            yield self.puzzle.current_frame()
+
+    def count_solutions_batch(self, frames: Iterable[npt.NDArray[np.int8]],
+                              limit: int = 2) -> Iterator[int]:
+        """
+        Counts the solutions of a stream of puzzles, reusing this solver and its
+        puzzle for every grid as `solve_batch` does.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+            limit (int): Number of solutions after which to stop counting a puzzle.
+
+        Yields:
+            int: Number of solutions of each puzzle, capped at `limit`, in input order.
+        """
+        for frame in frames:
+            self.puzzle.load(frame)
+            yield self.count_solutions(limit)
+
+    def solve_batch_vectorized(self, frames: Iterable[npt.NDArray[np.int8]],
+                               batch_size: int = 4096) -> Iterator[npt.NDArray[np.int8]]:
+        """
+        Solves a stream of puzzles, propagating `batch_size` of them at a time
+        as NumPy arrays (see `batch_engine`) and searching only the puzzles the
+        vectorized techniques leave unsolved, with this solver and its puzzle.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+            batch_size (int): Number of puzzles propagated together.
+
+        Yields:
+            np.ndarray: The final 9x9 frame for each puzzle, in input order.
+        """
+        yield from solve_frames(frames, self, batch_size)
+
+    def count_solutions_batch_vectorized(self, frames: Iterable[npt.NDArray[np.int8]], limit: int = 2,
+                                         batch_size: int = 4096) -> Iterator[int]:
+        """
+        Counts the solutions of a stream of puzzles, propagating `batch_size` of
+        them at a time as NumPy arrays (see `batch_engine.count_frames`) and
+        searching only the puzzles propagation leaves unfinished.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+            limit (int): Number of solutions after which to stop counting a puzzle.
+            batch_size (int): Number of puzzles propagated together.
+
+        Yields:
+            int: Number of solutions of each puzzle, capped at `limit`, in input order.
+        """
+        yield from count_frames(frames, self, limit, batch_size)
+
+    @staticmethod
+    def solve_parallel(frames: Iterable[npt.NDArray[np.int8]], workers: int | None = None,
+                       chunk_size: int = 256, vectorized: bool = False,
+                       profile: SolveProfile | None = None,
+                       scheduler: TechniqueScheduler | None = None,
+                       engine: SolverEngine = SolverEngine.LOGIC,
+                       sat_threshold: int | None = None,
+                       cache: SolutionCache | None = None,
+                       budget: SolveBudget | None = None) -> Iterator[npt.NDArray[np.int8]]:
+        """
+        Solves a stream of puzzles on a pool of worker processes.
+
+        Puzzles are sent to the workers in chunks of `chunk_size` frames packed
+        into one array, so messaging costs one round trip per chunk rather than
+        per puzzle. Each worker solves a chunk with a single `BitmaskPuzzle` and
+        solver. At most a few chunks per worker are in flight at once, so the
+        input is consumed as a stream.
+
+        Args:
+            frames (Iterable[np.ndarray]): 9x9 int8 arrays (0 for empty cells).
+            workers (int | None): Number of worker processes (default: CPU count).
+            chunk_size (int): Number of puzzles per task sent to a worker.
+            vectorized (bool): Propagate each chunk with the vectorized batch engine
+                before searching its leftovers.
+            profile (SolveProfile | None): If set, the workers profile their solves
+                and their counters are merged into it as chunks come back.
+            scheduler (TechniqueScheduler | None): Technique order used by the workers.
+            engine (SolverEngine): Search engine used by the workers.
+            sat_threshold (int | None): Search nodes after which the workers switch to SAT.
+            cache (SolutionCache | None): Each chunk gets an empty cache of the same
+                capacity and directory, so only the disk tier is shared by the workers.
+            budget (SolveBudget | None): Limits of each solve made by the workers.
+
+        Yields:
+            np.ndarray: The final 9x9 frame for each puzzle, in input order.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        workers = workers or os.cpu_count() or 1
+        max_pending = 4 * workers
+        frames = iter(frames)
+        with Pool(workers) as pool:
+            pending = deque()
+            while chunk := list(islice(frames, chunk_size)):
+                task = (np.stack(chunk), vectorized, profile is not None, scheduler, engine, sat_threshold,
+                        (cache.capacity, cache.directory) if cache is not None else None, budget)
+                pending.append(pool.apply_async(_solve_chunk, task))
+                if len(pending) >= max_pending:
+                    yield from _collect(pending.popleft(), profile)
+            while pending:
+                yield from _collect(pending.popleft(), profile)
+
+
+def count_solutions(puzzle: SudokuPuzzle, limit: int = 2) -> int:
+    """
+    Counts the solutions of a puzzle, stopping as soon as `limit` are found.
+    The search uses the lighter `COUNTING_TECHNIQUES`.
+
+    Args:
+        puzzle (SudokuPuzzle): Puzzle to check; it is left unchanged.
+        limit (int): Number of solutions after which to stop counting.
+
+    Returns:
+        int: Number of solutions, capped at `limit`: with the default limit,
+            0 (unsolvable), 1 (unique) or 2 (several).
+    """
+    return SudokuSolver(puzzle, scheduler=TechniqueScheduler(COUNTING_TECHNIQUES)).count_solutions(limit)
 
-            changed = solved_singles or eliminated_locked_candidates or eliminated_hidden_singles or eliminated_naked_pairs or eliminated_naked_triples or eliminated_naked_quads
-            log_step("Current State", self.puzzle)
-        
-        solved = self.puzzle.is_solved()
-        log_step(f"The puzzle is {'solved' if solved else 'not solved'}")
-        if not solved:
-            unsolved_cells = [cell for row in self.puzzle.grid for cell in row if not cell.is_solved]
-            log_step("Begin backtracking")
-            for cell in unsolved_cells:
-                self.backtrack(cell)
 
+def _solve_chunk(chunk: npt.NDArray[np.int8], vectorized: bool = False, profiled: bool = False,
+                 scheduler: TechniqueScheduler | None = None,
+                 engine: SolverEngine = SolverEngine.LOGIC,
+                 sat_threshold: int | None = None,
+                 cache: tuple[int, Path | None] | None = None,
+                 budget: SolveBudget | None = None) -> tuple[npt.NDArray[np.int8], SolveProfile | None]:
+    """Solves an (n, 9, 9) array of puzzles in a worker process."""
+    solver = SudokuSolver(BitmaskPuzzle(chunk[0]), profile=SolveProfile() if profiled else None,
+                          scheduler=scheduler, engine=engine, sat_threshold=sat_threshold,
+                          cache=SolutionCache(*cache) if cache is not None else None, budget=budget)
+    if vectorized:
+        solutions = np.stack(list(solver.solve_batch_vectorized(chunk, len(chunk))))
+    else:
+        solutions = np.stack(list(solver.solve_batch(chunk)))
+    return solutions, solver.profile
 
-        log_step("End", self.puzzle)
-        
-        log_step(f"The puzzle solution is {'valid' if self.puzzle.has_valid_solution() else 'invalid'}")
 
-    
\ No newline at end of file
+def _collect(result, profile: SolveProfile | None) -> npt.NDArray[np.int8]:
+    """Waits for a chunk from `_solve_chunk`, merging its profile into `profile`."""
+    solutions, chunk_profile = result.get()
+    if profile is not None:
+        profile.merge(chunk_profile)
+    return solutions
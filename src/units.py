@@ -0,0 +1,81 @@
+"""
+Static index tables for the 9x9 grid, built once at import and shared by
+every puzzle.
+
+Cells are numbered 0-80 in row-major order (index = row * 9 + col). Units are
+numbered 0-26: rows 0-8, then columns 9-17, then boxes 18-26.
+"""
+from enums import GroupType
+
+CELL_ROW = tuple(i // 9 for i in range(81))
+CELL_COL = tuple(i % 9 for i in range(81))
+CELL_BOX = tuple((i // 27) * 3 + (i % 9) // 3 for i in range(81))
+
+ROWS = tuple(tuple(r * 9 + c for c in range(9)) for r in range(9))
+COLS = tuple(tuple(r * 9 + c for r in range(9)) for c in range(9))
+BOXES = tuple(tuple(i for i in range(81) if CELL_BOX[i] == b) for b in range(9))
+
+UNITS = ROWS + COLS + BOXES
+
+# First unit number of each group type, so a group is UNITS[UNIT_OFFSET[group_type] + loc]
+UNIT_OFFSET = {GroupType.ROW: 0, GroupType.COL: 9, GroupType.BOX: 18}
+UNIT_TYPE = (GroupType.ROW,) * 9 + (GroupType.COL,) * 9 + (GroupType.BOX,) * 9
+# Row, column or box number of each unit within its group type
+UNIT_LOC = tuple(range(9)) * 3
+
+# The three units (row, column, box) that contain each cell
+CELL_UNITS = tuple((CELL_ROW[i], 9 + CELL_COL[i], 18 + CELL_BOX[i]) for i in range(81))
+
+# The 20 cells that share a unit with each cell
+PEERS = tuple(
+    tuple(sorted(set(ROWS[CELL_ROW[i]] + COLS[CELL_COL[i]] + BOXES[CELL_BOX[i]]) - {i}))
+    for i in range(81)
+)
+
+
+class Intersection:
+    """
+    The three cells shared by a box and a row or column crossing it, used by
+    the locked candidates technique.
+
+    Attributes:
+        box (int): Box number (0-8).
+        line_type (GroupType): GroupType.ROW or GroupType.COL.
+        line (int): Row or column number (0-8).
+        cells (tuple[int, ...]): The 3 cells in both the box and the line.
+        box_rest (tuple[int, ...]): The 6 other cells of the box.
+        line_rest (tuple[int, ...]): The 6 other cells of the line.
+    """
+    __slots__ = ("box", "line_type", "line", "cells", "box_rest", "line_rest")
+
+    def __init__(self, box: int, line_type: GroupType, line: int):
+        line_cells = ROWS[line] if line_type == GroupType.ROW else COLS[line]
+        self.box = box
+        self.line_type = line_type
+        self.line = line
+        self.cells = tuple(i for i in BOXES[box] if i in line_cells)
+        self.box_rest = tuple(i for i in BOXES[box] if i not in line_cells)
+        self.line_rest = tuple(i for i in line_cells if i not in BOXES[box])
+
+
+# 54 box-line intersections: for each box, its 3 rows then its 3 columns
+INTERSECTIONS = tuple(
+    Intersection(box, line_type, line)
+    for box in range(9)
+    for line_type, lines in (
+        (GroupType.ROW, range((box // 3) * 3, (box // 3) * 3 + 3)),
+        (GroupType.COL, range((box % 3) * 3, (box % 3) * 3 + 3)),
+    )
+    for line in lines
+)
+
+BOX_INTERSECTIONS = tuple(tuple(x for x in INTERSECTIONS if x.box == b) for b in range(9))
+ROW_INTERSECTIONS = tuple(
+    tuple(x for x in INTERSECTIONS if x.line_type == GroupType.ROW and x.line == r) for r in range(9)
+)
+COL_INTERSECTIONS = tuple(
+    tuple(x for x in INTERSECTIONS if x.line_type == GroupType.COL and x.line == c) for c in range(9)
+)
+
+# Intersection by (box, line type, line)
+INTERSECTION_AT = {(x.box, x.line_type, x.line): x for x in INTERSECTIONS}
@@ -0,0 +1,265 @@
+"""
+Validation of full and partial grids.
+
+A grid is consistent when every cell holds 0-9 and no digit repeats in a
+row, column or box. It is a solution when it is also full. Both checks run
+on single 9x9 frames or on (n, 9, 9) batches, without a Python loop over the
+grids of a batch:
+1. Each cell is looked up in a table that gives digit d a 4-bit counter at
+   bits 4(d - 1) to 4d - 1 of a 64-bit word.
+2. Adding the words of a unit counts each of its digits in its own counter.
+   Nine cells can never overflow a counter.
+3. A repeat is any counter reaching 2. Values outside 0-9 add 2 << 36
+   instead, and any bit from 36 up fails the grid. Nine of them sum to less
+   than 2^41, so however many a unit holds, the sum keeps a bit set there.
+Rows and boxes are both summed from the sums of row triples, and only the
+grids that fail are examined again to find their conflicting cells.
+
+`is_solution_values` is a loop-free pure-Python check of one grid's cell
+values. The puzzle backends use it as their final check, since NumPy costs
+more than it saves on a single grid.
+
+Usage:
+    python validation.py PUZZLES [-o VALID] [--solutions] [--report]
+"""
+from contextlib import nullcontext
+from functools import reduce
+from itertools import islice
+from operator import add, or_
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+import argparse
+import sys
+import time
+
+import numpy.typing as npt
+import numpy as np
+
+from units import CELL_ROW, CELL_COL, CELL_BOX
+from puzzle_io import read_puzzles, format_line, is_packed, map_packed, unpack_nibbles
+
+# Grids checked per step, small enough for the 64-bit words to stay in cache
+CHUNK_SIZE = 1024
+
+# Counter word of each byte value; 10-255 (and negative int8 values) are out of range
+_COUNTERS = np.full(256, 2 << 36, dtype=np.uint64)
+_COUNTERS[0] = 0
+for _digit in range(1, 10):
+    _COUNTERS[_digit] = 1 << (4 * (_digit - 1))
+del _digit
+# shared by every check, so it must never change
+_COUNTERS.flags.writeable = False
+# Bits that are only set by a repeated digit (bits 1-3 of a counter) or an
+# out-of-range value (any bit from 36 up, wherever the carries of several land)
+_REPEATS = np.uint64(0xFFFFFFFEEEEEEEEE)
+
+# Bit 9 * unit + d - 1 for each unit of cell i holding digit d, at index 10 * i + d
+_CELL_DIGIT_BITS = [0] * 810
+for _cell in range(81):
+    for _digit in range(1, 10):
+        _CELL_DIGIT_BITS[10 * _cell + _digit] = ((1 << (9 * CELL_ROW[_cell] + _digit - 1)) |
+                                                 (1 << (81 + 9 * CELL_COL[_cell] + _digit - 1)) |
+                                                 (1 << (162 + 9 * CELL_BOX[_cell] + _digit - 1)))
+del _cell, _digit
+_CELL_OFFSETS = tuple(range(0, 810, 10))
+# Every digit once in every unit
+_ALL_UNIT_DIGITS = (1 << 243) - 1
+
+
+def is_consistent(frames: npt.NDArray[np.int8]) -> bool | npt.NDArray[np.bool_]:
+    """
+    Checks grids for repeated digits, allowing empty cells.
+
+    Args:
+        frames (np.ndarray): A 9x9 frame or an (n, 9, 9) batch (0 for empty cells).
+
+    Returns:
+        bool | np.ndarray: For a frame, True if every value is 0-9 and no digit
+            repeats in a row, column or box; for a batch, an (n,) bool array.
+
+    Examples:
+        Several out-of-range values in one unit fail, however many there are:
+
+        >>> grid = np.zeros((9, 9), dtype=np.int8)
+        >>> grid[:2, :2] = 10
+        >>> is_consistent(grid), int(conflicts(grid).sum())
+        (False, 4)
+        >>> grid[:, 0] = -1
+        >>> is_consistent(grid), int(conflicts(grid).sum())
+        (False, 11)
+    """
+    frames, single = _batch(frames)
+    consistent = np.empty(len(frames), dtype=bool)
+    for start in range(0, len(frames), CHUNK_SIZE):
+        consistent[start:start + CHUNK_SIZE] = _consistent(frames[start:start + CHUNK_SIZE])
+    return bool(consistent[0]) if single else consistent
+
+
+def is_solution(frames: npt.NDArray[np.int8]) -> bool | npt.NDArray[np.bool_]:
+    """
+    Checks grids for being valid solutions: full and consistent.
+
+    Args:
+        frames (np.ndarray): A 9x9 frame or an (n, 9, 9) batch.
+
+    Returns:
+        bool | np.ndarray: For a frame, True if it is a valid solution; for a
+            batch, an (n,) bool array.
+    """
+    frames, single = _batch(frames)
+    solved = is_consistent(frames)
+    solved &= np.count_nonzero(frames.reshape(len(frames), 81), axis=1) == 81
+    return bool(solved[0]) if single else solved
+
+
+def conflicts(frames: npt.NDArray[np.int8]) -> npt.NDArray[np.bool_]:
+    """
+    Finds the cells that make grids inconsistent.
+
+    Args:
+        frames (np.ndarray): A 9x9 frame or an (n, 9, 9) batch.
+
+    Returns:
+        np.ndarray: Bool array of the same shape, True for every cell whose
+            digit also appears elsewhere in its row, column or box, and every
+            cell holding a value outside 0-9.
+    """
+    frames, single = _batch(frames)
+    found = np.zeros(frames.shape, dtype=bool)
+    bad = np.flatnonzero(~is_consistent(frames))
+    for start in range(0, len(bad), CHUNK_SIZE):
+        grids = bad[start:start + CHUNK_SIZE]
+        found[grids] = _conflicting_cells(frames[grids])
+    return found[0] if single else found
+
+
+def conflicting_cells(frame: npt.NDArray[np.int8]) -> list[tuple[int, int]]:
+    """
+    Lists the cells that make a grid inconsistent (see `conflicts`).
+
+    Args:
+        frame (np.ndarray): 9x9 frame.
+
+    Returns:
+        list[tuple[int, int]]: (row, col) of each conflicting cell, in row-major order.
+    """
+    rows, cols = np.nonzero(conflicts(frame))
+    return list(zip(rows.tolist(), cols.tolist()))
+
+
+def is_solution_values(values: Sequence[int]) -> bool:
+    """
+    Checks one grid for being a valid solution, without NumPy.
+
+    Args:
+        values (Sequence[int]): Cell values 0-9 in row-major order. Only the
+            first 81 are read.
+
+    Returns:
+        bool: True if every cell is filled and no digit repeats in a unit.
+            False if any of the 81 values is outside 0-9.
+
+    Examples:
+        A value out of range fails instead of reading another cell's bits:
+
+        >>> solved = [(row * 3 + row // 3 + col) % 9 + 1 for row in range(9) for col in range(9)]
+        >>> is_solution_values(solved)
+        True
+        >>> solved[80] = 10
+        >>> is_solution_values(solved)
+        False
+        >>> solved[80] = -1
+        >>> is_solution_values(solved)
+        False
+    """
+    cells = values[:81]
+    if min(cells) < 0 or max(cells) > 9:
+        return False
+    # 243 bits, one per unit and digit, are all set only if each is set once
+    return reduce(or_, map(_CELL_DIGIT_BITS.__getitem__, map(add, _CELL_OFFSETS, cells))) == _ALL_UNIT_DIGITS
+
+
+def _batch(frames: npt.NDArray[np.int8]) -> tuple[npt.NDArray[np.int8], bool]:
+    """Returns frames as a contiguous (n, 9, 9) int8 batch, and whether a single frame was given."""
+    frames = np.ascontiguousarray(frames, dtype=np.int8)
+    if frames.shape == (9, 9):
+        return frames.reshape(1, 9, 9), True
+    if frames.ndim != 3 or frames.shape[1:] != (9, 9):
+        raise ValueError(f"Expected a 9x9 frame or an (n, 9, 9) batch, got shape {frames.shape}")
+    return frames, False
+
+
+def _consistent(frames: npt.NDArray[np.int8]) -> npt.NDArray[np.bool_]:
+    """Checks an (n, 9, 9) chunk with the digit counters."""
+    words = _COUNTERS[frames.view(np.uint8)]
+    triples = words[:, :, 0::3] + words[:, :, 1::3]
+    triples += words[:, :, 2::3]
+    units = triples[:, :, 0] + triples[:, :, 1]
+    units += triples[:, :, 2]
+    cols = words[:, 0] + words[:, 1]
+    for row in range(2, 9):
+        cols += words[:, row]
+    units |= cols
+    boxes = triples[:, 0::3] + triples[:, 1::3]
+    boxes += triples[:, 2::3]
+    units |= boxes.reshape(-1, 9)
+    units &= _REPEATS
+    return ~units.any(axis=1)
+
+
+def _conflicting_cells(frames: npt.NDArray[np.int8]) -> npt.NDArray[np.bool_]:
+    """Marks the conflicting cells of an (n, 9, 9) chunk from per-unit digit counts."""
+    digits = frames[..., None] == np.arange(1, 10, dtype=np.int8)
+    row_counts = digits.sum(axis=2, dtype=np.int8)
+    col_counts = digits.sum(axis=1, dtype=np.int8)
+    box_counts = digits.reshape(-1, 3, 3, 3, 3, 9).sum(axis=(2, 4), dtype=np.int8)
+    repeated = (row_counts[:, :, None] > 1) | (col_counts[:, None] > 1) | \
+        (box_counts > 1).repeat(3, axis=1).repeat(3, axis=2)
+    return (digits & repeated).any(axis=3) | (frames < 0) | (frames > 9)
+
+
+def _chunks(path: Path, size: int) -> Iterator[npt.NDArray[np.int8]]:
+    """Streams the puzzles of a file as (n, 9, 9) arrays of up to `size` puzzles."""
+    if is_packed(path):
+        records = map_packed(path)
+        for start in range(0, len(records), size):
+            chunk = records[start:start + size]
+            yield chunk if chunk.ndim == 3 else unpack_nibbles(chunk)
+        return
+    frames = read_puzzles(path)
+    while chunk := list(islice(frames, size)):
+        yield np.stack(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check puzzles for repeated digits")
+    parser.add_argument("puzzle_file", type=Path,
+                        help="puzzle file (81-character lines, 9-line CSV grids or packed binary)")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="write the puzzles that pass to this file as 81-character lines")
+    parser.add_argument("--solutions", action="store_true", help="also require every cell to be filled")
+    parser.add_argument("--report", action="store_true",
+                        help="list the conflicting cells of each puzzle that fails")
+    args = parser.parse_args()
+
+    check = is_solution if args.solutions else is_consistent
+    checked = passed = 0
+    elapsed = 0.0
+    with open(args.output, "w") if args.output else nullcontext() as output:
+        for chunk in _chunks(args.puzzle_file, 64 * CHUNK_SIZE):
+            start = time.perf_counter()
+            ok = check(chunk)
+            elapsed += time.perf_counter() - start
+            if args.output:
+                output.writelines(format_line(frame) + "\n" for frame in chunk[ok])
+            if args.report:
+                for index in np.flatnonzero(~ok).tolist():
+                    print(f"{checked + index}: {conflicting_cells(chunk[index])}")
+            checked += len(chunk)
+            passed += int(np.count_nonzero(ok))
+    rate = checked / elapsed if elapsed else 0.0
+    print(f"{passed} of {checked} puzzles passed ({rate:,.0f} puzzles/sec)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()